@@ -0,0 +1,120 @@
+"""Deterministic synthetic corpora shaped like data/data.csv (10k, 100k, 1M docs)."""
+import csv
+import os
+import re
+from collections import Counter
+
+import numpy as np
+import pandas as pd
+
+DATA_PATH = os.path.join(os.path.dirname(__file__), '..', 'data', 'data.csv')
+COLUMNS = ['Title', 'Link', 'api_key', 'abstract', 'summary', 'category', 'keywords']
+SIZES = {'10k': 10_000, '100k': 100_000, '1M': 1_000_000}
+WORD_RE = re.compile(r"[A-Za-z][A-Za-z\-]{2,}")
+
+
+def parse_size(value):
+    return SIZES.get(value) or int(value)
+
+
+class CorpusModel:
+    """Per-category word and keyword distributions learned from data.csv"""
+
+    def __init__(self, path: str = DATA_PATH, seed: int = 0):
+        df = pd.read_csv(path, usecols=['Title', 'summary', 'category', 'keywords'])
+        df['summary'] = df['summary'].fillna('')
+        df['keywords'] = df['keywords'].fillna('')
+
+        self.seed = seed
+        self.categories = sorted(df['category'].unique().tolist())
+        self.category_weights = df['category'].value_counts(normalize=True).reindex(self.categories).to_numpy()
+        self.words = {}
+        self.keywords = {}
+        for category, group in df.groupby('category'):
+            counts = Counter()
+            for text in group['Title'].tolist() + group['summary'].tolist():
+                counts.update(w.lower() for w in WORD_RE.findall(text))
+            words, freq = zip(*counts.most_common(2000))
+            self.words[category] = (np.array(words), np.array(freq, dtype=np.float64) / sum(freq))
+
+            kw = Counter()
+            for keys in group['keywords']:
+                kw.update(k.strip() for k in keys.split(',') if k.strip())
+            names, freq = zip(*kw.most_common()) if kw else (('space',), (1,))
+            self.keywords[category] = (np.array(names), np.array(freq, dtype=np.float64) / sum(freq))
+
+    def rows(self, n: int, start: int = 0):
+        """Yield n synthetic CSV rows (dicts). Same (seed, start) always gives the same rows."""
+        rng = np.random.default_rng(self.seed + start)
+        cat_idx = rng.choice(len(self.categories), size=n, p=self.category_weights)
+        for i in range(n):
+            category = self.categories[cat_idx[i]]
+            words, p = self.words[category]
+            title = ' '.join(rng.choice(words, size=rng.integers(6, 14), p=p)).capitalize()
+            summary = ' '.join(rng.choice(words, size=rng.integers(40, 90), p=p)).capitalize() + '.'
+            names, kp = self.keywords[category]
+            keywords = rng.choice(names, size=min(len(names), rng.integers(2, 6)), replace=False, p=kp)
+            yield {
+                'Title': title,
+                'Link': f'https://example.org/synthetic/{start + i}',
+                'api_key': '',
+                'abstract': '',
+                'summary': summary,
+                'category': category,
+                'keywords': ', '.join(keywords),
+            }
+
+
+def write_csv(path: str, n: int, seed: int = 0):
+    model = CorpusModel(seed=seed)
+    with open(path, 'w', newline='', encoding='utf-8') as f:
+        writer = csv.DictWriter(f, fieldnames=COLUMNS)
+        writer.writeheader()
+        for row in model.rows(n):
+            writer.writerow(row)
+    return path
+
+
+def synthetic_vectors(n: int, n_topics: int = 6, dim: int = 384, noise: float = 0.8, seed: int = 0, chunk: int = 100_000):
+    """Clustered unit vectors: topic centroid + gaussian noise. Returns (doc_ids, title, summary, topics)."""
+    rng = np.random.default_rng(seed)
+    centroids = rng.standard_normal((n_topics, dim)).astype(np.float32)
+    centroids /= np.linalg.norm(centroids, axis=1, keepdims=True)
+    topics = rng.integers(0, n_topics, size=n)
+
+    title = np.empty((n, dim), dtype=np.float32)
+    summary = np.empty((n, dim), dtype=np.float32)
+    sigma = noise / np.sqrt(dim)
+    for start in range(0, n, chunk):
+        end = min(n, start + chunk)
+        base = centroids[topics[start:end]]
+        for out in (title, summary):
+            out[start:end] = base + rng.normal(0, sigma, (end - start, dim)).astype(np.float32)
+            out[start:end] /= np.linalg.norm(out[start:end], axis=1, keepdims=True)
+    doc_ids = np.arange(1, n + 1, dtype=np.int64)
+    return doc_ids, title, summary, topics
+
+
+def populate_sql(db, n: int, seed: int = 0, batch_size: int = 10_000):
+    """Bulk-load n synthetic documents straight into SQL (bypasses create_document for speed)"""
+    from src.models import Category, Document
+
+    model = CorpusModel(seed=seed)
+    with db.engine.begin() as conn:
+        conn.execute(Category.__table__.insert(), [{'name': c} for c in model.categories])
+        cat_ids = {name: cid for cid, name in conn.execute(Category.__table__.select().with_only_columns(Category.id, Category.name))}
+
+        batch = []
+        for row in model.rows(n):
+            batch.append({
+                'title': row['Title'],
+                'summary': row['summary'],
+                'link': row['Link'],
+                'category_id': cat_ids[row['category']],
+            })
+            if len(batch) >= batch_size:
+                conn.execute(Document.__table__.insert(), batch)
+                batch = []
+        if batch:
+            conn.execute(Document.__table__.insert(), batch)
+    db.rebuild_facets()
@@ -0,0 +1,74 @@
+"""Recall / precision / time of MinHash-LSH near-duplicate detection on a synthetic corpus with injected mirrors.
+
+Each mirror is a copy of a document under another link with a few words edited (casing, punctuation,
+dropped / replaced words), like a PMC page and its DOI mirror.
+Run from backend/: python -m benchmarks.near_duplicates --docs 100000 --mirrors 2000
+"""
+import argparse
+import json
+import time
+
+import numpy as np
+
+from src.near_duplicates import NearDuplicateIndex, clusters_from_pairs
+from .corpus import CorpusModel
+
+
+def mirror(text, rng, edits):
+    words = text.split()
+    for _ in range(edits):
+        i = int(rng.integers(len(words)))
+        if rng.random() < 0.5:
+            words[i] = words[i].upper() + ','
+        elif len(words) > 5:
+            del words[i]
+    return ' '.join(words)
+
+
+def run(n_docs=100_000, n_mirrors=2_000, edits=2, seed=0, config=None):
+    rng = np.random.default_rng(seed)
+    model = CorpusModel(seed=seed)
+    docs = [(row['Title'], row['summary']) for row in model.rows(n_docs)]
+    originals = rng.choice(n_docs, size=n_mirrors, replace=False)
+    expected = set()
+    for j, i in enumerate(originals):
+        title, summary = docs[i]
+        docs.append((mirror(title, rng, 1), mirror(summary, rng, edits)))
+        expected.add((int(i) + 1, n_docs + j + 1))
+
+    index = NearDuplicateIndex(**(config or {}))
+    start = time.perf_counter()
+    for doc_id, (title, summary) in enumerate(docs, start=1):
+        index.add(doc_id, title, summary)
+    index_s = time.perf_counter() - start
+    start = time.perf_counter()
+    found = {(a, b) for a, b, _ in index.pairs()}
+    pairs_s = time.perf_counter() - start
+
+    true_positive = len(found & expected)
+    return {
+        'docs': len(docs),
+        'mirrors': n_mirrors,
+        'bands': index.bands,
+        'rows': index.rows,
+        'threshold': index.threshold,
+        'recall': round(true_positive / max(1, len(expected)), 4),
+        'precision': round(true_positive / max(1, len(found)), 4),
+        'pairs_found': len(found),
+        'clusters': len(clusters_from_pairs((a, b) for a, b in found)),
+        'brute_force_pairs': len(docs) * (len(docs) - 1) // 2,
+        'index_s': round(index_s, 2),
+        'pairs_s': round(pairs_s, 2),
+    }
+
+
+if __name__ == '__main__':
+    parser = argparse.ArgumentParser()
+    parser.add_argument('--docs', type=int, default=100_000)
+    parser.add_argument('--mirrors', type=int, default=2_000)
+    parser.add_argument('--edits', type=int, default=2)
+    parser.add_argument('--bands', type=int, default=16)
+    parser.add_argument('--threshold', type=float, default=0.8)
+    args = parser.parse_args()
+    print(json.dumps(run(args.docs, args.mirrors, args.edits,
+                         config={'bands': args.bands, 'threshold': args.threshold}), indent=2))
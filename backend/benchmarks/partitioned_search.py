@@ -0,0 +1,94 @@
+"""Recall/latency of PartitionedVectorIndex vs full exact search.
+
+Run from backend/: python -m benchmarks.partitioned_search --scale 50
+"""
+import argparse
+import json
+import os
+import time
+
+import numpy as np
+import pandas as pd
+
+from src.vector_index import PartitionedVectorIndex, _normalize
+from .stubs import StubEmbedder
+
+DATA_PATH = os.path.join(os.path.dirname(__file__), '..', 'data', 'data.csv')
+
+
+def scaled_corpus(embedder, scale: int, noise: float, seed: int = 0):
+    """Embed data.csv, then tile it `scale` times; every copy after the first gets gaussian noise on the vectors"""
+    df = pd.read_csv(DATA_PATH, usecols=['Title', 'summary', 'category', 'keywords'])
+    df['summary'] = df['summary'].fillna('')
+    titles = embedder.encode(df['Title'].tolist())
+    summaries = embedder.encode(df['summary'].tolist())
+
+    rng = np.random.default_rng(seed)
+    n, dim = titles.shape
+    # tile: hàng [0, n) là bản gốc, các bản sao nằm sau nên chỉ [n:] bị thêm nhiễu
+    title_vectors = np.tile(titles, (scale, 1))
+    summary_vectors = np.tile(summaries, (scale, 1))
+    if scale > 1:
+        sigma = noise / np.sqrt(dim)
+        title_vectors[n:] += rng.normal(0, sigma, title_vectors[n:].shape).astype(np.float32)
+        summary_vectors[n:] += rng.normal(0, sigma, summary_vectors[n:].shape).astype(np.float32)
+    # summary rỗng -> vector 0: giữ nguyên như _normalize thay vì chia cho 0 (NaN)
+    title_vectors = _normalize(title_vectors)
+    summary_vectors = _normalize(summary_vectors)
+
+    categories = np.tile(df['category'].to_numpy(), scale).tolist()
+    doc_ids = np.arange(1, len(categories) + 1)
+    return df, doc_ids, title_vectors, summary_vectors, categories
+
+
+def make_queries(df, n_queries: int, seed: int = 0):
+    keywords = df['keywords'].dropna().sample(n=n_queries, replace=True, random_state=seed)
+    return [', '.join(k.split(',')[:3]) for k in keywords]
+
+
+def measure(index, query_vectors, truth, k, nprobe):
+    latencies, recalls = [], []
+    for q, expected in zip(query_vectors, truth):
+        start = time.perf_counter()
+        got = index.search(q, k=k, nprobe=nprobe)
+        latencies.append((time.perf_counter() - start) * 1000)
+        recalls.append(len(set(got) & set(expected)) / max(1, len(expected)))
+    return {
+        'nprobe': nprobe,
+        'recall_at_k': round(float(np.mean(recalls)), 4),
+        'p50_ms': round(float(np.percentile(latencies, 50)), 3),
+        'p99_ms': round(float(np.percentile(latencies, 99)), 3),
+    }
+
+
+def run(scale=50, noise=0.5, k=10, n_queries=200, n_clusters=16):
+    embedder = StubEmbedder()
+    df, doc_ids, title_vectors, summary_vectors, categories = scaled_corpus(embedder, scale, noise)
+    query_vectors = embedder.encode(make_queries(df, n_queries))
+
+    report = {'docs': len(doc_ids), 'k': k, 'queries': n_queries, 'modes': {}}
+    for partition_by in ('category', 'kmeans'):
+        index = PartitionedVectorIndex(partition_by=partition_by, n_clusters=n_clusters)
+        start = time.perf_counter()
+        index.build(doc_ids, title_vectors, summary_vectors, categories)
+        build_s = time.perf_counter() - start
+
+        truth = [index.full_search(q, k=k) for q in query_vectors]
+        rows = [measure(index, query_vectors, truth, k, nprobe) for nprobe in range(1, index.n_partitions + 1)]
+        report['modes'][partition_by] = {
+            'partitions': index.n_partitions,
+            'build_s': round(build_s, 3),
+            'results': rows,
+        }
+    return report
+
+
+if __name__ == '__main__':
+    parser = argparse.ArgumentParser()
+    parser.add_argument('--scale', type=int, default=50)
+    parser.add_argument('--noise', type=float, default=0.5)
+    parser.add_argument('--k', type=int, default=10)
+    parser.add_argument('--queries', type=int, default=200)
+    parser.add_argument('--clusters', type=int, default=16)
+    args = parser.parse_args()
+    print(json.dumps(run(args.scale, args.noise, args.k, args.queries, args.clusters), indent=2))
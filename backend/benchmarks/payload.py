@@ -0,0 +1,93 @@
+"""Payload size and latency of the JSON endpoints: identity vs gzip/brotli, and 304 revalidation.
+
+Run from backend/: python -m benchmarks.payload --docs 10k
+Uses the same offline stand-ins as benchmarks.run (SQLite + in-memory vectors + stub embedder).
+"""
+import argparse
+import json
+import os
+import tempfile
+import time
+
+from .corpus import parse_size, populate_sql, synthetic_vectors
+from .run import RESULTS_DIR, load_app, percentiles, serve, sqlite_db, timed
+from .stubs import InMemoryVectorStore, StubEmbedder
+
+ENCODINGS = ['identity', 'gzip', 'br']
+
+
+def measure(session, method, url, encoding, iterations, json_body=None):
+    headers = {'Accept-Encoding': encoding}
+    resp = session.request(method, url, headers=headers, json=json_body, stream=True)
+    resp.raise_for_status()
+    # Bytes đúng như trên dây (chưa giải nén)
+    wire = resp.raw.read(decode_content=False)
+    etag = resp.headers.get('ETag')
+    row = {
+        'encoding': resp.headers.get('Content-Encoding', 'identity'),
+        'bytes': len(wire),
+        **percentiles([timed(session.request, method, url, headers=headers, json=json_body)[1]
+                       for _ in range(iterations)]),
+    }
+    if etag:
+        # Revalidation: client gửi lại ETag, server trả 304 không body
+        revalidate = {**headers, 'If-None-Match': etag}
+        status = session.request(method, url, headers=revalidate, json=json_body).status_code
+        row['revalidate_status'] = status
+        row['revalidate'] = percentiles([timed(session.request, method, url, headers=revalidate, json=json_body)[1]
+                                         for _ in range(iterations)])
+    return row
+
+
+def run(n_docs, iterations=50, limit=50, seed=0):
+    import requests
+
+    results = []
+    with tempfile.TemporaryDirectory() as workdir:
+        db = sqlite_db(workdir, f'payload-{n_docs}.db')
+        populate_sql(db, n_docs, seed=seed)
+        store = InMemoryVectorStore(capacity=n_docs)
+        store.add_documents(*synthetic_vectors(n_docs, seed=seed)[:3])
+        app = load_app(db, store, StubEmbedder())
+
+        category_id = db.get_categories()[0].id
+        endpoints = [
+            ('GET', '/categories', None),
+            ('GET', f'/categories/{category_id}/documents', None),
+            ('POST', '/search', {'query': 'microgravity bone loss', 'limit': limit}),
+        ]
+        with serve(app) as base_url:
+            session = requests.Session()
+            for method, path, body in endpoints:
+                for encoding in ENCODINGS:
+                    row = measure(session, method, base_url + path, encoding, iterations, json_body=body)
+                    results.append({'endpoint': f'{method} {path}', 'docs': n_docs, 'requested': encoding, **row})
+        db.engine.dispose()
+    return results
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__, formatter_class=argparse.RawDescriptionHelpFormatter)
+    parser.add_argument('--docs', default='10k')
+    parser.add_argument('--iterations', type=int, default=50)
+    parser.add_argument('--limit', type=int, default=50, help='/search limit')
+    parser.add_argument('--output', help='JSON output path (default: benchmarks/results/payload-<timestamp>.json)')
+    args = parser.parse_args()
+
+    results = run(parse_size(args.docs), iterations=args.iterations, limit=args.limit)
+    for row in results:
+        reval = row.get('revalidate', {}).get('p50_ms')
+        print(f"{row['endpoint']:<32} {row['requested']:>8} -> {row['encoding']:<9} {row['bytes']:>9} B  "
+              f"p50 {row['p50_ms']:>7.2f} ms  304 p50 {reval if reval is not None else '-'} ms")
+
+    output = args.output
+    if not output:
+        os.makedirs(RESULTS_DIR, exist_ok=True)
+        output = os.path.join(RESULTS_DIR, f"payload-{time.strftime('%Y%m%d-%H%M%S')}.json")
+    with open(output, 'w', encoding='utf-8') as f:
+        json.dump({'docs': args.docs, 'results': results}, f, indent=2)
+    print(f"[INFO] Results written to {output}")
+
+
+if __name__ == '__main__':
+    main()
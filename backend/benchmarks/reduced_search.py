@@ -0,0 +1,79 @@
+"""Recall@k / latency of the reduced-dimension first pass + full-dimension rerank vs exact search.
+
+Run from backend/: python -m benchmarks.reduced_search --scale 50 --dims 32,64,128 --rerank 50,100,200
+"""
+import argparse
+import json
+import time
+
+import numpy as np
+
+from src.vector_index import PartitionedVectorIndex
+from .partitioned_search import make_queries, scaled_corpus
+from .stubs import StubEmbedder
+
+
+def measure(index, query_vectors, truth, k, rerank=None):
+    latencies, recalls = [], []
+    for q, expected in zip(query_vectors, truth):
+        start = time.perf_counter()
+        got = index.search(q, k=k, nprobe=index.n_partitions, rerank=rerank)
+        latencies.append((time.perf_counter() - start) * 1000)
+        recalls.append(len(set(got) & set(expected)) / max(1, len(expected)))
+    return {
+        'recall_at_k': round(float(np.mean(recalls)), 4),
+        'p50_ms': round(float(np.percentile(latencies, 50)), 3),
+        'p99_ms': round(float(np.percentile(latencies, 99)), 3),
+    }
+
+
+def run(scale=50, noise=0.5, k=10, n_queries=200, dims=(32, 64, 128), reranks=(50, 100, 200),
+        reductions=('pca', 'truncate')):
+    embedder = StubEmbedder()
+    df, doc_ids, title_vectors, summary_vectors, categories = scaled_corpus(embedder, scale, noise)
+    query_vectors = embedder.encode(make_queries(df, n_queries))
+
+    # Exact baseline: một partition, không giảm chiều
+    exact = PartitionedVectorIndex(partition_by='category')
+    exact.build(doc_ids, title_vectors, summary_vectors, [0] * len(doc_ids))
+    truth = [exact.full_search(q, k=k) for q in query_vectors]
+    report = {
+        'docs': len(doc_ids),
+        'dim': int(title_vectors.shape[1]),
+        'k': k,
+        'queries': n_queries,
+        'exact': measure(exact, query_vectors, truth, k),
+        'results': [],
+    }
+
+    for reduction in reductions:
+        for n_dims in dims:
+            index = PartitionedVectorIndex(partition_by='category', reduce_dims=n_dims, reduction=reduction)
+            start = time.perf_counter()
+            index.build(doc_ids, title_vectors, summary_vectors, [0] * len(doc_ids))
+            build_s = time.perf_counter() - start
+            for rerank in reranks:
+                report['results'].append({
+                    'reduction': reduction, 'dims': n_dims, 'rerank': rerank, 'build_s': round(build_s, 3),
+                    **measure(index, query_vectors, truth, k, rerank=rerank),
+                })
+    return report
+
+
+def parse_ints(value):
+    return [int(v) for v in value.split(',') if v.strip()]
+
+
+if __name__ == '__main__':
+    parser = argparse.ArgumentParser()
+    parser.add_argument('--scale', type=int, default=50)
+    parser.add_argument('--noise', type=float, default=0.5)
+    parser.add_argument('--k', type=int, default=10)
+    parser.add_argument('--queries', type=int, default=200)
+    parser.add_argument('--dims', default='32,64,128')
+    parser.add_argument('--rerank', default='50,100,200')
+    parser.add_argument('--reductions', default='pca,truncate')
+    args = parser.parse_args()
+    report = run(args.scale, args.noise, args.k, args.queries, parse_ints(args.dims), parse_ints(args.rerank),
+                 args.reductions.split(','))
+    print(json.dumps(report, indent=2))
@@ -0,0 +1,264 @@
+"""Offline benchmark suite: ingestion, SQL fetch, vector search and the /search handler.
+
+Run from backend/:
+    python -m benchmarks.run --sizes 10k,100k --cases all
+Results are printed and written as JSON (benchmarks/results/ by default) so runs can be diffed.
+"""
+import argparse
+import contextlib
+import io
+import json
+import os
+import platform
+import socket
+import subprocess
+import tempfile
+import threading
+import time
+from concurrent.futures import ThreadPoolExecutor
+
+import numpy as np
+
+from .corpus import parse_size, populate_sql, synthetic_vectors, write_csv
+from .stubs import InMemoryVectorStore, StubEmbedder
+
+RESULTS_DIR = os.path.join(os.path.dirname(__file__), 'results')
+CASES = ['ingestion', 'sql_fetch', 'vector_search', 'search_handler']
+
+
+def percentiles(samples_ms):
+    samples = np.asarray(samples_ms)
+    return {
+        'count': int(len(samples)),
+        'p50_ms': round(float(np.percentile(samples, 50)), 3),
+        'p90_ms': round(float(np.percentile(samples, 90)), 3),
+        'p99_ms': round(float(np.percentile(samples, 99)), 3),
+        'mean_ms': round(float(samples.mean()), 3),
+    }
+
+
+def timed(fn, *args, **kwargs):
+    start = time.perf_counter()
+    result = fn(*args, **kwargs)
+    return result, (time.perf_counter() - start) * 1000
+
+
+def sqlite_db(workdir, name):
+    from src.sql_db import SqlDB
+    return SqlDB(url=f"sqlite:///{os.path.join(workdir, name)}")
+
+
+def bench_ingestion(workdir, n_docs, seed=0):
+    from src.ingestion import Ingestion
+
+    csv_path = write_csv(os.path.join(workdir, f'ingest-{n_docs}.csv'), n_docs, seed=seed)
+    ingestion = Ingestion(
+        db=sqlite_db(workdir, f'ingest-{n_docs}.db'),
+        vectorstore=InMemoryVectorStore(),
+        embedder=StubEmbedder(),
+    )
+    with contextlib.redirect_stdout(io.StringIO()):
+        _, elapsed_ms = timed(ingestion.run, path=csv_path, force=True)
+    return {
+        'case': 'ingestion',
+        'docs': n_docs,
+        'seconds': round(elapsed_ms / 1000, 3),
+        'docs_per_s': round(n_docs / (elapsed_ms / 1000), 1),
+        'indexed': ingestion.vectorstore.get_object_count(),
+    }
+
+
+def bench_sql_fetch(db, n_docs, batch_sizes=(10, 100), iterations=300, seed=0):
+    rng = np.random.default_rng(seed)
+    results = []
+    for batch in batch_sizes:
+        samples = []
+        for _ in range(iterations):
+            ids = rng.integers(1, n_docs + 1, size=batch).tolist()
+            _, ms = timed(db.get_documents_by_ids, ids)
+            samples.append(ms)
+        results.append({'case': 'sql_fetch', 'docs': n_docs, 'batch': batch, **percentiles(samples)})
+    return results
+
+
+def bench_vector_search(store, vectors, n_docs, k=10, iterations=200, seed=0):
+    from src.vector_index import PartitionedVectorIndex
+
+    doc_ids, title, summary, topics = vectors
+    rng = np.random.default_rng(seed)
+    picks = rng.integers(0, n_docs, size=iterations)
+    queries = title[picks] + rng.normal(0, 0.05, (iterations, title.shape[1])).astype(np.float32)
+    queries /= np.linalg.norm(queries, axis=1, keepdims=True)
+
+    results = []
+    samples = [timed(store.similarity_search, q, k=k)[1] for q in queries]
+    results.append({'case': 'vector_search', 'engine': 'exact', 'docs': n_docs, 'k': k, **percentiles(samples)})
+
+    index = PartitionedVectorIndex(partition_by='category')
+    index.build(doc_ids, title, summary, topics.tolist())
+    truth = [store.similarity_search(q, k=k) for q in queries]
+    for nprobe in (1, 2):
+        samples, recall = [], []
+        for q, expected in zip(queries, truth):
+            got, ms = timed(index.search, q, k=k, nprobe=nprobe)
+            samples.append(ms)
+            recall.append(len(set(got) & set(expected)) / len(expected))
+        results.append({
+            'case': 'vector_search', 'engine': 'partitioned', 'nprobe': nprobe, 'docs': n_docs, 'k': k,
+            'recall_at_k': round(float(np.mean(recall)), 4), **percentiles(samples),
+        })
+    return results
+
+
+def load_app(db, vectorstore, embedder):
+    """Return src.main.app wired to the given stand-ins instead of SQLite file, Weaviate and the real model"""
+    import src.main
+
+    resources = src.main.resources
+    resources.db, resources.vectorstore, resources.embedder = db, vectorstore, embedder
+    # Mọi client của benchmark đều là 127.0.0.1: tắt per-client rate limit
+    src.main.admission.enabled = False
+    return src.main.app
+
+
+@contextlib.contextmanager
+def serve(app):
+    import uvicorn
+
+    with socket.socket() as s:
+        s.bind(('127.0.0.1', 0))
+        port = s.getsockname()[1]
+    server = uvicorn.Server(uvicorn.Config(app, host='127.0.0.1', port=port, log_level='warning'))
+    thread = threading.Thread(target=server.run, daemon=True)
+    thread.start()
+    while not server.started:
+        time.sleep(0.01)
+    try:
+        yield f'http://127.0.0.1:{port}'
+    finally:
+        server.should_exit = True
+        thread.join()
+
+
+def bench_search_handler(app, n_docs, clients=(1, 8, 32), requests_per_client=50, limit=10, seed=0,
+                         cache_modes=(False, True)):
+    import requests
+
+    queries = ['microgravity bone loss', 'mice spaceflight', 'plant root growth', 'radiation dna damage',
+               'microbial biofilm', 'fungi station', 'immune response astronauts', 'muscle atrophy']
+    results = []
+    with serve(app) as base_url:
+        for use_cache, n_clients in [(c, n) for c in cache_modes for n in clients]:
+            def client(cid):
+                session = requests.Session()
+                rng = np.random.default_rng(seed + cid)
+                samples = []
+                for _ in range(requests_per_client):
+                    query = queries[rng.integers(len(queries))]
+                    body = {'query': query, 'limit': limit, 'no_cache': not use_cache}
+                    resp, ms = timed(session.post, f'{base_url}/search', json=body)
+                    resp.raise_for_status()
+                    samples.append(ms)
+                return samples
+
+            start = time.perf_counter()
+            with ThreadPoolExecutor(max_workers=n_clients) as pool:
+                samples = [ms for chunk in pool.map(client, range(n_clients)) for ms in chunk]
+            wall = time.perf_counter() - start
+            results.append({
+                'case': 'search_handler', 'docs': n_docs, 'clients': n_clients, 'limit': limit, 'cache': use_cache,
+                'rps': round(len(samples) / wall, 1), **percentiles(samples),
+            })
+    return results
+
+
+def git_revision():
+    try:
+        return subprocess.check_output(['git', 'rev-parse', '--short', 'HEAD'], text=True).strip()
+    except Exception:
+        return None
+
+
+def run(sizes, cases, ingest_docs, seed=0):
+    results = []
+    app = None
+    with tempfile.TemporaryDirectory() as workdir:
+        if 'ingestion' in cases:
+            print(f"[INFO] Benchmark ingestion ({ingest_docs} docs)...")
+            results.append(bench_ingestion(workdir, ingest_docs, seed=seed))
+
+        for size in sizes:
+            n_docs = parse_size(size)
+            needs_sql = 'sql_fetch' in cases or 'search_handler' in cases
+            needs_vectors = 'vector_search' in cases or 'search_handler' in cases
+
+            db = None
+            if needs_sql:
+                print(f"[INFO] Loading {n_docs} synthetic documents into SQLite...")
+                db = sqlite_db(workdir, f'corpus-{n_docs}.db')
+                populate_sql(db, n_docs, seed=seed)
+
+            store = None
+            vectors = None
+            if needs_vectors:
+                print(f"[INFO] Generating {n_docs} synthetic vectors...")
+                vectors = synthetic_vectors(n_docs, seed=seed)
+                store = InMemoryVectorStore(capacity=n_docs)
+                store.add_documents(*vectors[:3])
+
+            if 'sql_fetch' in cases:
+                results.extend(bench_sql_fetch(db, n_docs, seed=seed))
+            if 'vector_search' in cases:
+                results.extend(bench_vector_search(store, vectors, n_docs, seed=seed))
+            if 'search_handler' in cases:
+                if app is None:
+                    app = load_app(db, store, StubEmbedder())
+                else:
+                    import src.main
+                    src.main.resources.db, src.main.resources.vectorstore = db, store
+                results.extend(bench_search_handler(app, n_docs, seed=seed))
+
+            del store, vectors
+            if db is not None:
+                db.engine.dispose()
+
+    return {
+        'meta': {
+            'timestamp': time.strftime('%Y-%m-%dT%H:%M:%S'),
+            'git_revision': git_revision(),
+            'python': platform.python_version(),
+            'platform': platform.platform(),
+            'cpu_count': os.cpu_count(),
+            'sizes': sizes,
+            'cases': cases,
+            'seed': seed,
+        },
+        'results': results,
+    }
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__, formatter_class=argparse.RawDescriptionHelpFormatter)
+    parser.add_argument('--sizes', default='10k', help='comma separated: 10k,100k,1M or a number')
+    parser.add_argument('--cases', default='all', help=f"comma separated subset of {','.join(CASES)}")
+    parser.add_argument('--ingest-docs', type=int, default=2000, help='rows written to the CSV for Ingestion.run')
+    parser.add_argument('--seed', type=int, default=0)
+    parser.add_argument('--output', help='JSON output path (default: benchmarks/results/bench-<timestamp>.json)')
+    args = parser.parse_args()
+
+    cases = CASES if args.cases == 'all' else [c.strip() for c in args.cases.split(',')]
+    sizes = [s.strip() for s in args.sizes.split(',') if s.strip()]
+    report = run(sizes, cases, args.ingest_docs, seed=args.seed)
+
+    output = args.output
+    if not output:
+        os.makedirs(RESULTS_DIR, exist_ok=True)
+        output = os.path.join(RESULTS_DIR, f"bench-{time.strftime('%Y%m%d-%H%M%S')}.json")
+    with open(output, 'w', encoding='utf-8') as f:
+        json.dump(report, f, indent=2)
+    print(json.dumps(report, indent=2))
+    print(f"[INFO] Results written to {output}")
+
+
+if __name__ == '__main__':
+    main()
@@ -0,0 +1,149 @@
+"""Memory and throughput of single-worker uvicorn vs gunicorn multi-worker (with/without preload).
+
+Needs the real stack (Weaviate + model). Run from backend/:
+    python -m benchmarks.serving --workers 4 --clients 16 --seconds 30
+--stub serves benchmarks.serving_app instead: synthetic corpus in SQLite, in-memory vectors, stub embedder and a
+--model-mb ballast in place of the model weights, so the comparison runs offline.
+"""
+import argparse
+import json
+import os
+import signal
+import subprocess
+import sys
+import tempfile
+import time
+from concurrent.futures import ThreadPoolExecutor
+
+import requests
+
+from .corpus import parse_size, populate_sql
+from .run import RESULTS_DIR, percentiles, sqlite_db
+
+QUERIES = ['microgravity bone loss', 'mice spaceflight', 'plant root growth', 'radiation dna damage']
+
+
+def process_tree(pid):
+    pids = [pid]
+    for child in open(f'/proc/{pid}/task/{pid}/children').read().split():
+        pids.extend(process_tree(int(child)))
+    return pids
+
+
+def memory_kb(pids):
+    """Tổng RSS và PSS (PSS chia đều page dùng chung giữa các process)"""
+    total = {'rss_kb': 0, 'pss_kb': 0}
+    for pid in pids:
+        for line in open(f'/proc/{pid}/smaps_rollup'):
+            key, _, rest = line.partition(':')
+            if key in ('Rss', 'Pss'):
+                total[f'{key.lower()}_kb'] += int(rest.split()[0])
+    return total
+
+
+def wait_ready(base_url, timeout):
+    deadline = time.time() + timeout
+    while time.time() < deadline:
+        try:
+            if requests.get(f'{base_url}/readyz', timeout=2).status_code == 200:
+                return True
+        except requests.RequestException:
+            pass
+        time.sleep(1)
+    return False
+
+
+def load(base_url, clients, seconds, limit=10):
+    def client(cid):
+        session = requests.Session()
+        samples = []
+        deadline = time.time() + seconds
+        i = cid
+        while time.time() < deadline:
+            start = time.perf_counter()
+            session.post(f'{base_url}/search', json={'query': QUERIES[i % len(QUERIES)], 'limit': limit}).raise_for_status()
+            samples.append((time.perf_counter() - start) * 1000)
+            i += 1
+        return samples
+
+    with ThreadPoolExecutor(max_workers=clients) as pool:
+        samples = [ms for chunk in pool.map(client, range(clients)) for ms in chunk]
+    return {'rps': round(len(samples) / seconds, 1), **percentiles(samples)}
+
+
+def run_mode(name, cmd, env, port, args):
+    proc = subprocess.Popen(cmd, env={**os.environ, **env}, start_new_session=True)
+    base_url = f'http://127.0.0.1:{port}'
+    try:
+        if not wait_ready(base_url, args.startup_timeout):
+            return {'mode': name, 'error': 'not ready'}
+        time.sleep(args.settle)  # để mọi worker xong warm-up
+        before = memory_kb(process_tree(proc.pid))
+        result = load(base_url, args.clients, args.seconds)
+        after = memory_kb(process_tree(proc.pid))
+        return {'mode': name, 'memory_idle': before, 'memory_after_load': after, **result}
+    finally:
+        os.killpg(proc.pid, signal.SIGTERM)
+        proc.wait(timeout=30)
+
+
+def main():
+    parser = argparse.ArgumentParser()
+    parser.add_argument('--workers', type=int, default=4)
+    parser.add_argument('--clients', type=int, default=16)
+    parser.add_argument('--seconds', type=int, default=30)
+    parser.add_argument('--port', type=int, default=8765)
+    parser.add_argument('--settle', type=float, default=5)
+    parser.add_argument('--startup-timeout', type=float, default=300)
+    parser.add_argument('--stub', action='store_true', help='offline stand-ins instead of the model + Weaviate')
+    parser.add_argument('--docs', default='10k', help='--stub: synthetic corpus size')
+    parser.add_argument('--model-mb', type=float, default=90, help='--stub: size of the model weights ballast')
+    parser.add_argument('--output', help='JSON output path (default: benchmarks/results/serving-<timestamp>.json)')
+    args = parser.parse_args()
+
+    with tempfile.TemporaryDirectory() as workdir:
+        app, env = 'src.main:app', {}
+        if args.stub:
+            n_docs = parse_size(args.docs)
+            db = sqlite_db(workdir, 'serving.db')
+            populate_sql(db, n_docs)
+            db.engine.dispose()
+            app = 'benchmarks.serving_app:app'
+            env = {
+                'BENCH_SERVING_DB': f"sqlite:///{os.path.join(workdir, 'serving.db')}",
+                'BENCH_SERVING_DOCS': str(n_docs),
+                'BENCH_SERVING_MODEL_MB': str(args.model_mb),
+            }
+        report = compare(app, env, args)
+    if args.stub:
+        report.update(stub=True, docs=args.docs, model_mb=args.model_mb)
+    print(json.dumps(report, indent=2))
+
+    output = args.output
+    if not output:
+        os.makedirs(RESULTS_DIR, exist_ok=True)
+        output = os.path.join(RESULTS_DIR, f"serving-{time.strftime('%Y%m%d-%H%M%S')}.json")
+    with open(output, 'w', encoding='utf-8') as f:
+        json.dump(report, f, indent=2)
+    print(f"[INFO] Results written to {output}")
+
+
+def compare(app, env, args):
+    bind = f'127.0.0.1:{args.port}'
+    gunicorn = [sys.executable, '-m', 'gunicorn', '-c', 'gunicorn.conf.py', app]
+    modes = [
+        ('uvicorn-1', [sys.executable, '-m', 'uvicorn', app, '--port', str(args.port)], env),
+        (f'gunicorn-{args.workers}-no-preload', gunicorn,
+         {**env, 'WEB_BIND': bind, 'WEB_WORKERS': str(args.workers), 'WEB_PRELOAD': 'false'}),
+        (f'gunicorn-{args.workers}-preload', gunicorn,
+         {**env, 'WEB_BIND': bind, 'WEB_WORKERS': str(args.workers), 'WEB_PRELOAD': 'true'}),
+    ]
+    report = {'cpu_count': os.cpu_count(), 'clients': args.clients, 'seconds': args.seconds, 'results': []}
+    for name, cmd, mode_env in modes:
+        print(f"[INFO] Measuring {name}...")
+        report['results'].append(run_mode(name, cmd, mode_env, args.port, args))
+    return report
+
+
+if __name__ == '__main__':
+    main()
@@ -0,0 +1,44 @@
+"""src.main:app on the offline stand-ins, for `python -m benchmarks.serving --stub` (no model / Weaviate needed).
+
+Env (set by benchmarks.serving):
+    BENCH_SERVING_DB        SQLite URL populated by benchmarks.serving
+    BENCH_SERVING_DOCS      document count (synthetic vectors are regenerated with the same seed)
+    BENCH_SERVING_MODEL_MB  ballast standing in for the model weights, allocated where the model would be loaded
+"""
+import os
+
+import numpy as np
+
+import src.main
+
+from .corpus import synthetic_vectors
+from .run import load_app
+from .stubs import InMemoryVectorStore, StubEmbedder
+
+resources = src.main.resources
+_start = resources.start
+
+
+def load():
+    """Như Resources.preload(): chạy trong master khi preload, nếu không thì trong từng worker"""
+    if resources.embedder is not None:
+        return
+    from src.sql_db import SqlDB
+
+    n_docs = int(os.environ['BENCH_SERVING_DOCS'])
+    store = InMemoryVectorStore(capacity=n_docs)
+    store.add_documents(*synthetic_vectors(n_docs)[:3])
+    embedder = StubEmbedder()
+    # np.ones ghi vào mọi page, giống weights của model sau khi load
+    embedder.weights = np.ones(int(float(os.environ.get('BENCH_SERVING_MODEL_MB', 90)) * 2**20) // 4, dtype=np.float32)
+    load_app(SqlDB(url=os.environ['BENCH_SERVING_DB']), store, embedder)
+
+
+def start():
+    load()
+    _start()
+
+
+resources.preload = load
+resources.start = start
+app = src.main.app
@@ -0,0 +1,128 @@
+import hashlib
+import re
+
+import numpy as np
+
+TOKEN_RE = re.compile(r"[a-z0-9]+")
+
+
+class StubEmbedder:
+    """Deterministic offline embedder: hashed bag-of-words projected to `dim` dims, L2-normalized"""
+
+    def __init__(self, dim: int = 384):
+        self.dim = dim
+        self._token_cache = {}
+
+    def _token_vector(self, token):
+        vec = self._token_cache.get(token)
+        if vec is None:
+            seed = int.from_bytes(hashlib.md5(token.encode('utf-8')).digest()[:8], 'little')
+            vec = np.random.default_rng(seed).standard_normal(self.dim).astype(np.float32)
+            self._token_cache[token] = vec
+        return vec
+
+    def encode(self, texts):
+        out = np.zeros((len(texts), self.dim), dtype=np.float32)
+        for i, text in enumerate(texts):
+            for token in TOKEN_RE.findall(str(text).lower()):
+                out[i] += self._token_vector(token)
+        norms = np.linalg.norm(out, axis=1, keepdims=True)
+        norms[norms == 0] = 1.0
+        return out / norms
+
+    def embed(self, text):
+        return self.encode([text])[0].tolist()
+
+    def embed_batch(self, texts):
+        return self.encode(texts).tolist()
+
+
+class InMemoryVectorStore:
+    """Stand-in for WeaviateVectorStore: exact multi-target search over numpy matrices"""
+
+    def __init__(self, dim: int = 384, capacity: int = 1024):
+        self.dim = dim
+        self._size = 0
+        self._doc_ids = np.zeros(capacity, dtype=np.int64)
+        self._title = np.zeros((capacity, dim), dtype=np.float32)
+        self._summary = np.zeros((capacity, dim), dtype=np.float32)
+        self._positions = {}
+
+    def __len__(self):
+        return self._size
+
+    def _grow(self, needed):
+        capacity = len(self._doc_ids)
+        if needed <= capacity:
+            return
+        capacity = max(needed, capacity * 2)
+        self._doc_ids = np.resize(self._doc_ids, capacity)
+        self._title = np.resize(self._title, (capacity, self.dim))
+        self._summary = np.resize(self._summary, (capacity, self.dim))
+
+    def close(self):
+        pass
+
+    def is_ready(self):
+        return True
+
+    def add_document(self, doc_id, title_embedding, summary_embedding):
+        if doc_id in self._positions:
+            return
+        self.add_documents([doc_id], [title_embedding], [summary_embedding])
+
+    def add_documents(self, doc_ids, title_embeddings, summary_embeddings):
+        keep, seen = [], set()
+        for i, doc_id in enumerate(doc_ids):
+            doc_id = int(doc_id)
+            if doc_id not in self._positions and doc_id not in seen:
+                seen.add(doc_id)
+                keep.append(i)
+        if len(keep) != len(doc_ids):
+            doc_ids = [doc_ids[i] for i in keep]
+            title_embeddings = [title_embeddings[i] for i in keep]
+            summary_embeddings = [summary_embeddings[i] for i in keep]
+        n = len(doc_ids)
+        self._grow(self._size + n)
+        rows = slice(self._size, self._size + n)
+        self._doc_ids[rows] = doc_ids
+        self._title[rows] = title_embeddings
+        self._summary[rows] = summary_embeddings
+        for offset, doc_id in enumerate(doc_ids):
+            self._positions[int(doc_id)] = self._size + offset
+        self._size += n
+        return {}
+
+    def similarity_search(self, query_vector, k: int = 10):
+        if self._size == 0:
+            return []
+        query = np.asarray(query_vector, dtype=np.float32)
+        scores = np.maximum(self._title[:self._size] @ query, self._summary[:self._size] @ query)
+        k = min(k, self._size)
+        top = np.argpartition(-scores, k - 1)[:k]
+        top = top[np.argsort(-scores[top], kind='stable')]
+        return self._doc_ids[top].tolist()
+
+    def fetch_all_vectors(self):
+        n = self._size
+        return self._doc_ids[:n].tolist(), self._title[:n], self._summary[:n]
+
+    def get_object_count(self):
+        return self._size
+
+    def delete_by_doc_id(self, doc_id: int):
+        pos = self._positions.pop(int(doc_id), None)
+        if pos is None:
+            return
+        last = self._size - 1
+        if pos != last:
+            moved = int(self._doc_ids[last])
+            self._doc_ids[pos] = self._doc_ids[last]
+            self._title[pos] = self._title[last]
+            self._summary[pos] = self._summary[last]
+            self._positions[moved] = pos
+        self._size -= 1
+
+    def clear_all(self):
+        self._size = 0
+        self._positions.clear()
@@ -0,0 +1,68 @@
+"""Latency of /suggest prefix lookups on a synthetic vocabulary (Zipf-like doc counts).
+
+Run from backend/: python -m benchmarks.suggest --terms 1000000 --queries 20000
+"""
+import argparse
+import json
+import time
+
+import numpy as np
+
+from src.suggest import SuggestIndex
+
+ALPHABET = np.array(list('etaoinshrdlcumwfgypbvkjxqz'))
+# Tần suất chữ cái gần với tiếng Anh để phân bố prefix không đều như dữ liệu thật
+LETTER_P = np.array([12.7, 9.1, 8.2, 7.5, 7.0, 6.7, 6.3, 6.1, 6.0, 4.3, 4.0, 2.8, 2.8, 2.4, 2.4, 2.2,
+                     2.0, 2.0, 1.9, 1.5, 1.0, 0.8, 0.2, 0.2, 0.1, 0.1])
+
+
+def make_vocabulary(n_terms, seed=0):
+    rng = np.random.default_rng(seed)
+    vocab = {}
+    while len(vocab) < n_terms:
+        lengths = rng.integers(3, 13, size=n_terms)
+        letters = rng.choice(ALPHABET, size=(n_terms, 12), p=LETTER_P / LETTER_P.sum())
+        for row, length in zip(letters, lengths):
+            vocab[''.join(row[:length])] = 0
+            if len(vocab) >= n_terms:
+                break
+    counts = np.maximum(1, (rng.zipf(1.3, size=len(vocab)) % 100000)).tolist()
+    return dict(zip(vocab, counts))
+
+
+def run(n_terms=1_000_000, n_queries=20_000, limit=8, seed=0):
+    token_counts = make_vocabulary(n_terms, seed)
+    start = time.perf_counter()
+    index = SuggestIndex().build(token_counts)
+    build_s = time.perf_counter() - start
+
+    rng = np.random.default_rng(seed + 1)
+    terms = index.terms
+    picks = rng.integers(0, len(terms), size=n_queries)
+    prefix_lengths = rng.integers(1, 7, size=n_queries)
+    queries = [terms[i][:n] for i, n in zip(picks, prefix_lengths)]
+
+    index.suggest(queries[0], limit)
+    latencies = np.empty(n_queries)
+    for j, q in enumerate(queries):
+        t = time.perf_counter()
+        index.suggest(q, limit)
+        latencies[j] = (time.perf_counter() - t) * 1000
+    return {
+        'terms': len(index),
+        'precomputed_prefixes': len(index._top),
+        'build_s': round(build_s, 2),
+        'queries': n_queries,
+        'p50_ms': round(float(np.percentile(latencies, 50)), 4),
+        'p99_ms': round(float(np.percentile(latencies, 99)), 4),
+        'max_ms': round(float(latencies.max()), 4),
+    }
+
+
+if __name__ == '__main__':
+    parser = argparse.ArgumentParser()
+    parser.add_argument('--terms', type=int, default=1_000_000)
+    parser.add_argument('--queries', type=int, default=20_000)
+    parser.add_argument('--limit', type=int, default=8)
+    args = parser.parse_args()
+    print(json.dumps(run(args.terms, args.queries, args.limit), indent=2))
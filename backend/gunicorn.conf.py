@@ -0,0 +1,82 @@
+# Multi-worker serving: gunicorn -c gunicorn.conf.py src.main:app
+# Model weights (and the partitioned index) are loaded once in the master and shared copy-on-write by workers.
+import fcntl
+import gc
+import glob
+import os
+import shutil
+import tempfile
+
+os.environ.setdefault("TOKENIZERS_PARALLELISM", "false")
+
+bind = os.getenv("WEB_BIND", "0.0.0.0:8000")
+workers = int(os.getenv("WEB_WORKERS", 2))
+worker_class = "uvicorn.workers.UvicornWorker"
+preload_app = os.getenv("WEB_PRELOAD", "true").lower() == "true"
+timeout = int(os.getenv("WEB_TIMEOUT", 120))
+
+# Mặc định chia đều core cho các worker để torch không oversubscribe
+torch_threads = int(os.getenv("TORCH_THREADS_PER_WORKER", 0)) or max(1, (os.cpu_count() or 1) // workers)
+
+# File lock chọn worker primary và thư mục metrics multiprocess, riêng cho mỗi lần chạy gunicorn
+runtime_dir = os.getenv("WEB_RUNTIME_DIR") or tempfile.mkdtemp(prefix="backend-gunicorn-")
+primary_lock_path = os.path.join(runtime_dir, "primary.lock")
+# Phải đặt trước khi prometheus_client được import: preload_app load app ngay sau file config, trước on_starting
+os.environ.setdefault("PROMETHEUS_MULTIPROC_DIR", os.path.join(runtime_dir, "prometheus"))
+os.makedirs(os.environ["PROMETHEUS_MULTIPROC_DIR"], exist_ok=True)
+# Bỏ số liệu của lần chạy trước: chỉ xóa file *.db của prometheus_client, thư mục có thể do người dùng trỏ tới
+for stale in glob.glob(os.path.join(os.environ["PROMETHEUS_MULTIPROC_DIR"], "*.db")):
+    os.remove(stale)
+
+_primary_lock = None
+
+
+def when_ready(server):
+    if not preload_app:
+        return
+    from src.main import resources
+
+    resources.preload()
+    # Đưa object hiện có ra khỏi GC để GC của worker không ghi vào các page dùng chung
+    gc.collect()
+    gc.freeze()
+
+
+def acquire_primary_lock():
+    """Worker đầu tiên giữ được flock là primary; lock tự nhả khi worker đó chết nên worker thay thế nhận lại"""
+    global _primary_lock
+    f = open(primary_lock_path, "a")
+    try:
+        fcntl.flock(f, fcntl.LOCK_EX | fcntl.LOCK_NB)
+    except OSError:
+        f.close()
+        return False
+    _primary_lock = f
+    return True
+
+
+def post_fork(server, worker):
+    from src.main import resources
+
+    try:
+        import torch
+
+        torch.set_num_threads(torch_threads)
+    except ImportError:
+        # benchmarks.serving --stub chạy không có torch
+        pass
+    primary = acquire_primary_lock()
+    resources.after_fork(primary=primary)
+    server.log.info(f"Worker {worker.pid}: torch threads={torch_threads}, primary={primary}")
+
+
+def child_exit(server, worker):
+    from prometheus_client import multiprocess
+
+    # Gauge "live*" của worker đã chết không còn được cộng vào /metrics
+    multiprocess.mark_process_dead(worker.pid)
+
+
+def on_exit(server):
+    if not os.getenv("WEB_RUNTIME_DIR"):
+        shutil.rmtree(runtime_dir, ignore_errors=True)
@@ -0,0 +1,155 @@
+import json
+import math
+import threading
+from collections import OrderedDict
+from functools import partial
+
+import anyio
+from prometheus_client import Counter, Gauge
+
+from .config import ADMISSION_CONFIG
+from .profiler import track_thread
+from .rate_limit import TokenBucket
+
+ADMISSION_TOTAL = Counter('backend_admission_total', 'Admission decisions by endpoint', ['endpoint', 'outcome'])
+ADMISSION_IN_FLIGHT = Gauge(
+    'backend_admission_in_flight', 'Admitted requests in flight by endpoint', ['endpoint'], multiprocess_mode='livesum'
+)
+
+
+class AdmissionController:
+    """Per-client token bucket + giới hạn concurrency theo endpoint; từ chối ngay bằng 429 thay vì xếp hàng.
+
+    Crawl / LLM chạy trên CapacityLimiter riêng (slow_workers) nên không chiếm thread pool mặc định của /search.
+    """
+
+    def __init__(self, config: dict = None):
+        config = config or ADMISSION_CONFIG
+        self.enabled = bool(config.get('enabled', True))
+        self.trust_forwarded_for = bool(config.get('trust_forwarded_for', False))
+        self.max_clients = config.get('max_clients', 10000)
+        self.slow_workers = config.get('slow_workers', 4)
+        self.endpoints = config.get('endpoints') or {}
+
+        self._buckets = OrderedDict()
+        self._in_flight = {path: 0 for path in self.endpoints}
+        self._counts = {path: {'admitted': 0, 'rate_limited': 0, 'concurrency_limited': 0} for path in self.endpoints}
+        self._lock = threading.Lock()
+        self._slow_limiter = None
+
+    @property
+    def slow_limiter(self):
+        # Tạo lười vì CapacityLimiter cần event loop đang chạy
+        if self._slow_limiter is None:
+            self._slow_limiter = anyio.CapacityLimiter(self.slow_workers)
+        return self._slow_limiter
+
+    async def run_slow(self, fn, *args, **kwargs):
+        """Chạy hàm blocking (crawl, gọi LLM) trên worker budget riêng"""
+        return await anyio.to_thread.run_sync(partial(track_thread(fn), *args, **kwargs), limiter=self.slow_limiter)
+
+    # ---------- Decisions ----------
+    def tracks(self, path: str):
+        return self.enabled and path in self.endpoints
+
+    def admit(self, path: str, client: str):
+        """Trả về (True, 0) nếu nhận request, ngược lại (False, retry_after_seconds); nhận thì phải release()"""
+        limits = self.endpoints[path]
+        with self._lock:
+            if self._in_flight[path] >= limits.get('max_concurrency', 16):
+                self._record(path, 'concurrency_limited')
+                return False, 1
+
+            wait = self._bucket(path, client, limits).try_acquire()
+            if wait > 0:
+                self._record(path, 'rate_limited')
+                return False, max(1, math.ceil(wait))
+
+            self._in_flight[path] += 1
+            self._record(path, 'admitted')
+        ADMISSION_IN_FLIGHT.labels(path).inc()
+        return True, 0
+
+    def release(self, path: str):
+        with self._lock:
+            self._in_flight[path] -= 1
+        ADMISSION_IN_FLIGHT.labels(path).dec()
+
+    def _bucket(self, path, client, limits):
+        key = (path, client)
+        bucket = self._buckets.get(key)
+        if bucket is None:
+            bucket = TokenBucket(limits.get('rate', 1), limits.get('burst', 5))
+            self._buckets[key] = bucket
+            # Giữ số bucket có giới hạn: bỏ client lâu không gửi request nhất
+            while len(self._buckets) > self.max_clients:
+                self._buckets.popitem(last=False)
+        else:
+            self._buckets.move_to_end(key)
+        return bucket
+
+    def _record(self, path, outcome):
+        self._counts[path][outcome] += 1
+        ADMISSION_TOTAL.labels(path, outcome).inc()
+
+    def client_key(self, scope):
+        if self.trust_forwarded_for:
+            for name, value in scope.get('headers') or []:
+                if name == b'x-forwarded-for':
+                    return value.decode('latin-1').split(',')[0].strip()
+        client = scope.get('client')
+        return client[0] if client else 'unknown'
+
+    def status(self):
+        with self._lock:
+            return {
+                'enabled': self.enabled,
+                'slow_workers': self.slow_workers,
+                'slow_workers_busy': self._slow_limiter.borrowed_tokens if self._slow_limiter else 0,
+                'clients_tracked': len(self._buckets),
+                'endpoints': {
+                    path: {'in_flight': self._in_flight[path], **self._counts[path], **limits}
+                    for path, limits in self.endpoints.items()
+                },
+            }
+
+
+class AdmissionMiddleware:
+    """Pure ASGI middleware: 429 + Retry-After trước khi request vào tới endpoint"""
+
+    def __init__(self, app, controller: AdmissionController):
+        self.app = app
+        self.controller = controller
+
+    async def __call__(self, scope, receive, send):
+        if scope['type'] != 'http' or scope['method'] == 'OPTIONS':
+            await self.app(scope, receive, send)
+            return
+
+        path = scope['path']
+        if not self.controller.tracks(path):
+            await self.app(scope, receive, send)
+            return
+
+        admitted, retry_after = self.controller.admit(path, self.controller.client_key(scope))
+        if not admitted:
+            await _reject(send, retry_after)
+            return
+        try:
+            await self.app(scope, receive, send)
+        finally:
+            self.controller.release(path)
+
+
+async def _reject(send, retry_after):
+    body = json.dumps({'status': 'error', 'error': 'Too many requests'}).encode('utf-8')
+    await send({
+        'type': 'http.response.start',
+        'status': 429,
+        'headers': [
+            (b'content-type', b'application/json'),
+            (b'content-length', str(len(body)).encode('latin-1')),
+            (b'retry-after', str(retry_after).encode('latin-1')),
+        ],
+    })
+    await send({'type': 'http.response.body', 'body': body})
@@ -0,0 +1,341 @@
+from bs4 import BeautifulSoup
+import re
+import html
+import json
+from typing import Dict, Any, List, Tuple
+from urllib.parse import urljoin
+
+from .llm_client import LLMUnavailable, llm_client
+from .metrics import stage
+from .page_fetch import UnsupportedContent, fetch_page
+
+
+def clean_text(s: str) -> str:
+    if not s:
+        return ""
+    return re.sub(r"\s+", " ", s).strip()
+
+
+def extract_article_content(soup: BeautifulSoup) -> Dict[str, str]:
+    """Trích xuất nội dung bài báo"""
+    content = {
+        "abstract": "",
+        "body": "",
+        "full_text": ""
+    }
+    
+    # 1. Tìm abstract
+    abstract_selectors = [
+        {"name": "div", "class_": ["abstract", "Abstract", "article-abstract"]},
+        {"name": "section", "attrs": {"id": re.compile(r"abstract", re.I)}},
+        {"name": "p", "class_": "abstract"},
+        {"name": "div", "attrs": {"id": re.compile(r"abstract", re.I)}},
+    ]
+    
+    for selector in abstract_selectors:
+        abstract_tag = soup.find(**selector)
+        if abstract_tag:
+            content["abstract"] = clean_text(abstract_tag.get_text(" ", strip=True))
+            if len(content["abstract"]) > 100:
+                break
+    
+    if not content["abstract"]:
+        meta_abstract = soup.find("meta", {"name": "description"}) or \
+                       soup.find("meta", {"property": "og:description"})
+        if meta_abstract and meta_abstract.get("content"):
+            content["abstract"] = clean_text(meta_abstract["content"])
+    
+    # 2. Tìm body content
+    body_selectors = [
+        {"name": "article"},
+        {"name": "main"},
+        {"name": "div", "class_": re.compile(r"article-body|content-body|article-text", re.I)},
+        {"name": "div", "attrs": {"id": re.compile(r"article-body|content", re.I)}},
+    ]
+    
+    body_tag = None
+    for selector in body_selectors:
+        body_tag = soup.find(**selector)
+        if body_tag:
+            for unwanted in body_tag.find_all(["script", "style", "nav", "header", "footer", "aside"]):
+                unwanted.decompose()
+            
+            body_text = clean_text(body_tag.get_text(" ", strip=True))
+            if len(body_text) > 500:
+                content["body"] = body_text
+                break
+    
+    if not content["body"]:
+        body_tag = soup.find("body")
+        if body_tag:
+            for unwanted in body_tag.find_all(["script", "style", "nav", "header", "footer", "aside"]):
+                unwanted.decompose()
+            content["body"] = clean_text(body_tag.get_text(" ", strip=True))
+    
+    # 3. Tạo full_text
+    parts = []
+    if content["abstract"]:
+        parts.append(f"ABSTRACT:\n{content['abstract']}")
+    if content["body"]:
+        body_limited = content["body"][:8000]
+        parts.append(f"\nFULL TEXT:\n{body_limited}")
+    
+    content["full_text"] = "\n\n".join(parts)
+    
+    return content
+
+
+def extract_pdf_url(soup: BeautifulSoup, base_url: str) -> str:
+    """Tìm URL PDF"""
+    pdf_url = ""
+    
+    meta_pdf = soup.find("meta", {"name": "citation_pdf_url"})
+    if meta_pdf and meta_pdf.get("content"):
+        return meta_pdf["content"]
+    
+    pdf_links = []
+    for link in soup.find_all("a", href=True):
+        href = link.get("href", "")
+        text = link.get_text().strip().lower()
+        
+        if href.endswith(".pdf"):
+            pdf_links.append(href)
+            continue
+        
+        if any(keyword in text for keyword in ["pdf", "download pdf", "full text pdf"]):
+            if ".pdf" in href or "pdf" in href.lower():
+                pdf_links.append(href)
+    
+    if pdf_links:
+        pdf_url = pdf_links[0]
+        if pdf_url.startswith("/"):
+            pdf_url = urljoin(base_url, pdf_url)
+        elif not pdf_url.startswith("http"):
+            pdf_url = urljoin(base_url, pdf_url)
+    
+    return pdf_url
+
+
+def summarize_with_groq(text: str) -> Dict[str, str]:
+    """Summarize với Groq API"""
+    return summarize_article_text(text)[0]
+
+
+def summarize_article_text(text: str, background: bool = False) -> Tuple[Dict[str, str], bool]:
+    """Summarize với Groq API; cờ thứ 2 = False khi phải dùng fallback (chỉ lưu summary thật từ Groq)"""
+    text = clean_text(text)
+    if not text:
+        return create_empty_summary(), True
+
+    if len(text) > 10000:
+        text = text[:10000] + "..."
+
+    prompt = f"""You are an expert scientific article summarizer. Return ONLY valid JSON with these exact keys:
+{{"Background": "**Context**\\n- Point 1\\n- Point 2", "KeyFindings": "**Results**\\n- Finding 1", "Methodology": "**Design**\\n- Method detail", "EthicalConsiderations": "", "Implications": "**Impact**\\n- Implication", "AdditionalNotes": "", "Conclusion": "**Summary**\\n- Key point"}}
+
+Article: {text}"""
+
+    try:
+        raw = llm_client.chat(
+            [
+                {"role": "system", "content": "Return only valid JSON."},
+                {"role": "user", "content": prompt}
+            ],
+            temperature=0.3,
+            max_tokens=2000,
+            timeout=60,
+            background=background,
+        )
+        
+        if raw.startswith("```"):
+            raw = re.sub(r'^```(?:json)?\s*', '', raw)
+            raw = re.sub(r'\s*```$', '', raw)
+        
+        json_match = re.search(r'\{[\s\S]*\}', raw)
+        if json_match:
+            summary_json = json.loads(json_match.group())
+            return validate_and_format_summary(summary_json), True
+        
+        return create_fallback_summary(text), False
+
+    except LLMUnavailable as e:
+        print(f"Groq unavailable, using fallback: {e}")
+        return create_fallback_summary(text), False
+    except Exception as e:
+        print(f"Groq error: {e}")
+        return create_fallback_summary(text), False
+
+
+def validate_and_format_summary(summary: Dict[str, Any]) -> Dict[str, str]:
+    """Validate summary format"""
+    required_keys = [
+        "Background", "KeyFindings", "Methodology", 
+        "EthicalConsiderations", "Implications", 
+        "AdditionalNotes", "Conclusion"
+    ]
+    
+    result = {}
+    for key in required_keys:
+        val = summary.get(key, "")
+        if isinstance(val, list):
+            val = format_list_as_subsections(val, key)
+        elif not isinstance(val, str):
+            val = str(val) if val else ""
+        
+        if val and "**" not in val and len(val) > 20:
+            val = auto_format_subsection(val, key)
+        
+        result[key] = val
+    
+    return result
+
+
+def auto_format_subsection(text: str, section_name: str) -> str:
+    """Auto format text"""
+    if not text:
+        return ""
+    
+    sentences = [s.strip() + "." for s in text.split('.') if s.strip()]
+    if not sentences:
+        return text
+    
+    heading_map = {
+        "Background": "Study Context",
+        "KeyFindings": "Main Results",
+        "Methodology": "Study Design",
+        "Implications": "Key Implications",
+        "Conclusion": "Summary"
+    }
+    
+    heading = heading_map.get(section_name, "Overview")
+    result = f"**{heading}**\n"
+    
+    for sentence in sentences[:5]:
+        result += f"- {sentence}\n"
+    
+    return result.strip()
+
+
+def format_list_as_subsections(items: List, section_name: str) -> str:
+    """Format list"""
+    if not items:
+        return ""
+    
+    heading_map = {
+        "Background": "Key Points",
+        "KeyFindings": "Main Findings",
+        "Methodology": "Methods",
+        "Implications": "Implications"
+    }
+    
+    heading = heading_map.get(section_name, "Summary")
+    result = f"**{heading}**\n"
+    
+    for item in items:
+        result += f"- {str(item)}\n"
+    
+    return result.strip()
+
+
+def create_empty_summary() -> Dict[str, str]:
+    """Empty summary"""
+    return {
+        "Background": "",
+        "KeyFindings": "",
+        "Methodology": "",
+        "EthicalConsiderations": "",
+        "Implications": "",
+        "AdditionalNotes": "",
+        "Conclusion": "",
+    }
+
+
+def create_fallback_summary(text: str) -> Dict[str, str]:
+    """Fallback summary"""
+    parts = text.split("FULL TEXT:")
+    abstract = ""
+    body = ""
+    
+    if len(parts) > 1:
+        abstract = parts[0].replace("ABSTRACT:", "").strip()
+        body = parts[1].strip()
+    else:
+        body = text
+    
+    background_text = abstract if abstract else body[:800]
+    background = auto_format_subsection(background_text, "Background")
+    
+    body_preview = body[:600] if body else ""
+    findings = auto_format_subsection(body_preview, "KeyFindings") if body_preview else ""
+    
+    return {
+        "Background": background,
+        "KeyFindings": findings,
+        "Methodology": "**Note**\n- Full analysis unavailable.",
+        "EthicalConsiderations": "",
+        "Implications": "",
+        "AdditionalNotes": "**Important**\n- Automated summary.",
+        "Conclusion": "",
+    }
+
+
+def crawl_article(url: str, background: bool = False) -> Tuple[Dict[str, Any], bool]:
+    """Fetch + parse + summarize một bài báo; trả về (data, final). background: call LLM ưu tiên thấp (warmer)"""
+    try:
+        with stage("page_fetch"):
+            page = fetch_page(url)
+    except UnsupportedContent as e:
+        if not e.is_pdf:
+            raise
+        # Link trỏ thẳng tới PDF: không có gì để parse, trả link cho frontend
+        data = {
+            "title": "Article Title Unavailable",
+            "authors": [],
+            "summary": create_empty_summary(),
+            "pdf_url": url
+        }
+        return data, True
+
+    with stage("html_parse"):
+        soup = BeautifulSoup(page, "html.parser")
+
+    # Get title
+    title = ""
+    title_tag = soup.find("h1") or soup.find("title")
+    if title_tag:
+        title = clean_text(title_tag.get_text())
+    
+    if not title:
+        title = "Article Title Unavailable"
+    
+    # Get authors
+    authors = []
+    for meta in soup.find_all("meta", {"name": "citation_author"}):
+        if meta.get("content"):
+            authors.append(meta["content"].strip())
+    
+    if not authors:
+        author_tags = soup.find_all(class_=re.compile(r"author", re.I))
+        for tag in author_tags[:10]:
+            author_text = clean_text(tag.get_text())
+            if author_text and len(author_text) < 100:
+                authors.append(author_text)
+
+    # Extract PDF URL
+    pdf_url = extract_pdf_url(soup, url)
+
+    # Extract content
+    with stage("extract_content"):
+        content = extract_article_content(soup)
+    
+    # Summarize with Groq
+    with stage("groq_summarize"):
+        summary, final = summarize_article_text(content['full_text'], background)
+
+    data = {
+        "title": html.unescape(title),
+        "authors": authors[:15],
+        "summary": summary,
+        "pdf_url": pdf_url
+    }
+    return data, final
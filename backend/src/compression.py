@@ -0,0 +1,143 @@
+import zlib
+
+from prometheus_client import Histogram
+
+from .config import HTTP_CONFIG
+
+try:
+    import brotli
+except ImportError:  # brotli là tùy chọn, không có thì chỉ dùng gzip
+    brotli = None
+
+COMPRESSIBLE_TYPES = ('application/json', 'text/', 'application/javascript', 'image/svg+xml')
+
+RESPONSE_BYTES = Histogram(
+    'backend_response_bytes',
+    'Response body size as sent, by content encoding',
+    ['encoding'],
+    buckets=(256, 1e3, 4e3, 16e3, 64e3, 256e3, 1e6, 4e6),
+)
+
+
+def choose_encoding(accept_encoding: str):
+    accepted = {part.split(';')[0].strip().lower() for part in accept_encoding.split(',')}
+    if brotli is not None and 'br' in accepted:
+        return 'br'
+    if 'gzip' in accepted:
+        return 'gzip'
+    return None
+
+
+class _Compressor:
+    def __init__(self, encoding, config):
+        if encoding == 'br':
+            self._obj = brotli.Compressor(quality=config.get('brotli_quality', 4))
+            self._compress, self._finish = self._obj.process, self._obj.finish
+        else:
+            self._obj = zlib.compressobj(config.get('gzip_level', 6), zlib.DEFLATED, 31)
+            self._compress, self._finish = self._obj.compress, self._obj.flush
+
+    def compress(self, data):
+        return self._compress(data)
+
+    def finish(self):
+        return self._finish()
+
+
+class CompressionMiddleware:
+    """Pure ASGI middleware: nén gzip / brotli các response lớn hơn compression_min_size"""
+
+    def __init__(self, app, config: dict = None):
+        self.app = app
+        config = config or HTTP_CONFIG
+        self.config = config
+        self.min_size = config.get('compression_min_size', 1024)
+
+    async def __call__(self, scope, receive, send):
+        if scope['type'] != 'http':
+            await self.app(scope, receive, send)
+            return
+
+        headers = dict(scope.get('headers') or [])
+        encoding = choose_encoding(headers.get(b'accept-encoding', b'').decode('latin-1'))
+        state = {'start': None, 'compressor': None, 'passthrough': encoding is None}
+
+        async def send_wrapper(message):
+            if message['type'] == 'http.response.start':
+                response_headers = dict(message.get('headers', []))
+                content_type = response_headers.get(b'content-type', b'').decode('latin-1')
+                status = message['status']
+                negotiable = status == 304 or (
+                    status >= 200 and status != 204
+                    and b'content-encoding' not in response_headers
+                    and content_type.startswith(COMPRESSIBLE_TYPES)
+                )
+                if negotiable:
+                    # Cả khi lần này không nén (client không nhận gzip, body nhỏ, 304): cache không được trả lẫn bản nén
+                    message = {**message, 'headers': _add_vary(message.get('headers', []))}
+                if not negotiable or status == 304:
+                    state['passthrough'] = True
+                if state['passthrough']:
+                    await send(message)
+                else:
+                    # Chờ body đầu tiên để biết kích thước trước khi quyết định nén
+                    state['start'] = message
+                return
+
+            if message['type'] != 'http.response.body':
+                await send(message)
+                return
+
+            body = message.get('body', b'')
+            more_body = message.get('more_body', False)
+            if state['passthrough']:
+                RESPONSE_BYTES.labels('identity').observe(len(body))
+                await send(message)
+                return
+
+            start = state.pop('start', None)
+            if start is not None:
+                if not more_body and len(body) < self.min_size:
+                    state['passthrough'] = True
+                    RESPONSE_BYTES.labels('identity').observe(len(body))
+                    await send(start)
+                    await send(message)
+                    return
+                state['compressor'] = _Compressor(encoding, self.config)
+                state['sent'] = 0
+                await send(_compressed_start(start, encoding))
+
+            compressor = state['compressor']
+            data = compressor.compress(body)
+            if not more_body:
+                data += compressor.finish()
+            state['sent'] += len(data)
+            if not more_body:
+                RESPONSE_BYTES.labels(encoding).observe(state['sent'])
+            await send({'type': 'http.response.body', 'body': data, 'more_body': more_body})
+
+        await self.app(scope, receive, send_wrapper)
+
+
+def _compressed_start(message, encoding):
+    headers = []
+    for name, value in message.get('headers', []):
+        if name == b'content-length':
+            continue
+        if name == b'etag':
+            # Strong ETag phải khác nhau giữa các content-coding: "abc" -> "abc-gzip"
+            value = value[:-1] + b'-' + encoding.encode('latin-1') + b'"' if value.endswith(b'"') else value
+        headers.append((name, value))
+    headers.append((b'content-encoding', encoding.encode('latin-1')))
+    return {**message, 'headers': headers}
+
+
+def _add_vary(headers):
+    headers = list(headers)
+    for i, (name, value) in enumerate(headers):
+        if name.lower() == b'vary':
+            if b'accept-encoding' not in value.lower() and value.strip() != b'*':
+                headers[i] = (name, value + b', Accept-Encoding')
+            return headers
+    headers.append((b'vary', b'Accept-Encoding'))
+    return headers
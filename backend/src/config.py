@@ -39,4 +39,22 @@ INGESTION_CONFIG = config['ingestion']
 
 HUGGING_FACE_MODEL_NAME = config['embedders']['hugging_face']['model_name']
 
-POSTGRES_CONFIG = config['postgres']
\ No newline at end of file
+POSTGRES_CONFIG = config['postgres']
+
+SEARCH_CONFIG = config['search']
+
+LLM_CONFIG = config['llm']
+
+WARMUP_CONFIG = config['warmup']
+
+ARTICLE_CONFIG = config['article']
+
+HTTP_CONFIG = config['http']
+
+ADMISSION_CONFIG = config['admission']
+
+SUGGEST_CONFIG = config['suggest']
+
+NEAR_DUPLICATE_CONFIG = config['near_duplicates']
+
+PROFILING_CONFIG = config['profiling']
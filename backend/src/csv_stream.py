@@ -0,0 +1,42 @@
+import pandas as pd
+
+# Chỉ đọc các cột cần cho ingestion (bỏ qua abstract, api_key)
+INGESTION_COLUMNS = ['Title', 'Link', 'summary', 'category', 'keywords']
+
+
+def iter_chunks(path: str, chunk_size: int = 1000, columns=INGESTION_COLUMNS):
+    """Đọc CSV theo từng chunk, chỉ các cột cần thiết"""
+    reader = pd.read_csv(
+        path,
+        usecols=columns,
+        chunksize=chunk_size,
+        dtype=str,
+        keep_default_na=False,
+    )
+    with reader:
+        for chunk in reader:
+            yield chunk
+
+
+def split_keywords(value: str):
+    if not value:
+        return []
+    return list(dict.fromkeys(key.strip() for key in value.split(',') if key.strip()))
+
+
+def iter_records(path: str, chunk_size: int = 1000):
+    """Yield a list of row dicts per chunk; `row` is the 1-based data row number in the file"""
+    row_number = 0
+    for chunk in iter_chunks(path, chunk_size):
+        records = []
+        for title, link, summary, category, keywords in chunk[INGESTION_COLUMNS].itertuples(index=False, name=None):
+            row_number += 1
+            records.append({
+                'row': row_number,
+                'title': title,
+                'link': link,
+                'summary': summary or '',
+                'category': category,
+                'keywords': split_keywords(keywords),
+            })
+        yield records
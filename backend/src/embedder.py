@@ -1,8 +1,9 @@
 from .config import HUGGING_FACE_MODEL_NAME
-from sentence_transformers import SentenceTransformer
 
 class Embedder:
     def __init__(self):
+        # Import ở đây để các module khác (benchmarks) không cần torch khi không dùng model thật
+        from sentence_transformers import SentenceTransformer
         self.model = SentenceTransformer(HUGGING_FACE_MODEL_NAME)
     
     def embed(self, text):
@@ -0,0 +1,45 @@
+import hashlib
+import json
+
+from fastapi import Request, Response
+
+ENCODING_SUFFIXES = ('-gzip', '-br')
+
+
+def make_etag(generation: int, *parts) -> str:
+    """Strong ETag từ data generation + những gì xác định nội dung (path, query, limit...)"""
+    key = json.dumps([generation, *parts], sort_keys=True, default=str)
+    return '"g%d-%s"' % (generation, hashlib.sha1(key.encode('utf-8')).hexdigest()[:16])
+
+
+def etag_matches(request: Request, etag: str):
+    """ETag trong If-None-Match khớp với `etag` (kể cả dạng có hậu tố content-coding), None nếu không khớp.
+
+    Trả về đúng dạng client đã nhận ở response 200 ("abc" hoặc "abc-gzip") để 304 gửi lại cùng ETag đó.
+    """
+    header = request.headers.get('if-none-match')
+    if not header:
+        return None
+    if header.strip() == '*':
+        return etag
+    for candidate in header.split(','):
+        candidate = candidate.strip()
+        tag = candidate[2:] if candidate.startswith('W/') else candidate
+        # Bỏ hậu tố content-coding mà CompressionMiddleware thêm vào
+        base = tag
+        for suffix in ENCODING_SUFFIXES:
+            if tag.endswith(suffix + '"'):
+                base = tag[:-len(suffix) - 1] + '"'
+        if base == etag:
+            return tag
+    return None
+
+
+def not_modified(etag: str) -> Response:
+    return Response(status_code=304, headers={'ETag': etag, 'Cache-Control': 'no-cache'})
+
+
+def set_etag(response: Response, etag: str):
+    response.headers['ETag'] = etag
+    # Trình duyệt luôn hỏi lại server (If-None-Match), server trả 304 khi dữ liệu chưa đổi
+    response.headers['Cache-Control'] = 'no-cache'
@@ -0,0 +1,176 @@
+import os
+import threading
+import time
+import uuid
+
+from .config import INGESTION_CONFIG
+from .csv_stream import iter_chunks
+from .profiler import ProfilerBusy, profiler
+
+
+class JobConflict(Exception):
+    """Đã có một job ingestion khác đang chạy"""
+
+    def __init__(self, job):
+        super().__init__(f"Ingestion job {job['id']} is already {job['status']}")
+        self.job = job
+
+
+class IngestionJobs:
+    """Chạy Ingestion như job nền: một writer tại một thời điểm, tiến độ + hủy qua bảng ingestion_jobs.
+
+    Trạng thái nằm trong DB nên GET / DELETE đến worker nào cũng được; worker chạy job ghi heartbeat mỗi
+    `heartbeat` giây và đọc cờ hủy ở đó.
+    """
+
+    def __init__(self, resources, heartbeat: float = 1.0, stale_after: float = 30.0):
+        self.resources = resources
+        self.heartbeat = heartbeat
+        self.stale_after = stale_after
+        self.running = {}  # job_id -> Ingestion của các job chạy trong process này
+
+    @property
+    def data_dir(self):
+        return os.path.dirname(os.path.abspath(INGESTION_CONFIG['path']))
+
+    def resolve_path(self, path=None):
+        """Chỉ cho phép file CSV trong thư mục data của ingestion.
+
+        None -> ingestion.path trong config; path tương đối: so với thư mục data (vd. "data.csv"),
+        hoặc so với cwd như path trong config (vd. "data/data.csv").
+        """
+        if path is None:
+            candidates = [INGESTION_CONFIG['path']]
+        elif os.path.isabs(path):
+            candidates = [path]
+        else:
+            candidates = [os.path.join(self.data_dir, path), path]
+        candidates = [os.path.abspath(p) for p in candidates]
+        path = next((p for p in candidates if os.path.isfile(p)), candidates[0])
+        if os.path.commonpath([path, self.data_dir]) != self.data_dir:
+            raise ValueError("Path must be inside the ingestion data directory")
+        if not os.path.isfile(path):
+            raise ValueError(f"File not found: {os.path.basename(path)}")
+        return path
+
+    # ---------- Control ----------
+    def submit(self, path=None, allow_existing: bool = True, profile: bool = False):
+        """Tạo và chạy job nền; raise JobConflict nếu đã có job đang chạy. profile: lưu sampling profile của cả job"""
+        path = self.resolve_path(path)
+        job, created = self.resources.db.claim_ingestion_job(uuid.uuid4().hex, path, self.stale_after)
+        if not created:
+            raise JobConflict(job)
+        session = None
+        if profile:
+            try:
+                session = profiler.start('ingestion', f"job_{job['id']}")
+                job['profile_id'] = session.id
+            except ProfilerBusy as e:
+                print(f"[WARNING] Ingestion job {job['id']} runs without profile: {e}")
+        thread = threading.Thread(
+            target=self._run, args=(job['id'], path, allow_existing, session), name=f"ingest-job-{job['id'][:8]}",
+            daemon=True,
+        )
+        thread.start()
+        return job
+
+    def get(self, job_id: str):
+        job = self.resources.db.get_ingestion_job(job_id)
+        return with_rates(job) if job else None
+
+    def cancel(self, job_id: str):
+        job = self.resources.db.cancel_ingestion_job(job_id)
+        if job and job_id in self.running:
+            self.running[job_id].cancel()
+        return job
+
+    @property
+    def active(self):
+        return bool(self.running)
+
+    # ---------- Worker ----------
+    def _run(self, job_id, path, allow_existing, session=None):
+        try:
+            self._execute(job_id, path, allow_existing)
+        finally:
+            if session is not None:
+                session.finish()
+
+    def _execute(self, job_id, path, allow_existing):
+        from .ingestion import Ingestion
+
+        db = self.resources.db
+        ingestion = Ingestion(db=db, vectorstore=self.resources.vectorstore, embedder=self.resources.embedder)
+        self.running[job_id] = ingestion
+        stop = threading.Event()
+        monitor = threading.Thread(target=self._monitor, args=(job_id, ingestion, stop), daemon=True)
+        try:
+            job = db.update_ingestion_job(job_id, status='counting')
+            if not job['cancel_requested']:
+                total = sum(len(chunk) for chunk in iter_chunks(path, INGESTION_CONFIG.get('chunk_size', 1000),
+                                                                columns=['Title']))
+                job = db.update_ingestion_job(job_id, total_rows=total, started_at=time.time())
+            if job['cancel_requested']:
+                db.update_ingestion_job(job_id, status='cancelled', finished_at=time.time())
+                return
+
+            db.update_ingestion_job(job_id, status='running')
+            monitor.start()
+            stats = ingestion.run(path=path, force=True, allow_existing=allow_existing)
+            stop.set()
+            monitor.join()
+
+            if stats is None:
+                db.update_ingestion_job(job_id, status='skipped', error='Database already has data',
+                                        finished_at=time.time())
+                return
+            if stats.get('error'):
+                status = 'failed'
+            else:
+                status = 'cancelled' if stats.get('cancelled') else 'completed'
+            db.update_ingestion_job(
+                job_id, status=status, finished_at=time.time(), error=stats.get('error'),
+                **{key: stats[key] for key in ('rows_read', 'documents', 'vectors', 'failed')},
+            )
+            print(f"[INFO] Ingestion job {job_id} {status}")
+            # Dữ liệu mới: warmer
+            self.resources.after_ingestion()
+            # Generation cuối của job: worker nào cũng thấy nó đổi và build lại index trong bộ nhớ
+            db.bump_data_generation()
+        except Exception as e:
+            print(f"[ERROR] Ingestion job {job_id} failed: {e}")
+            db.update_ingestion_job(job_id, status='failed', error=str(e)[:500], finished_at=time.time())
+        finally:
+            stop.set()
+            self.running.pop(job_id, None)
+
+    def _monitor(self, job_id, ingestion, stop):
+        """Heartbeat: ghi tiến độ, đọc cờ hủy (có thể do worker khác đặt)"""
+        db = self.resources.db
+        while not stop.wait(self.heartbeat):
+            progress = ingestion.progress()
+            try:
+                job = db.update_ingestion_job(
+                    job_id, **{key: progress.get(key, 0) for key in ('rows_read', 'documents', 'vectors', 'failed')}
+                )
+            except Exception as e:
+                print(f"[WARNING] Failed to record ingestion progress: {e}")
+                continue
+            if job and job['cancel_requested']:
+                ingestion.cancel()
+
+
+def with_rates(job):
+    """Thêm throughput / ETA vào job dict"""
+    end = job['finished_at'] or time.time()
+    elapsed = end - job['started_at'] if job['started_at'] else 0
+    rate = job['rows_read'] / elapsed if elapsed > 0 else 0
+    total = job['total_rows']
+    remaining = max(0, total - job['rows_read']) if total is not None else None
+    return {
+        **job,
+        'elapsed_seconds': round(elapsed, 1),
+        'rows_per_second': round(rate, 1),
+        'progress': round(job['rows_read'] / total, 4) if total else None,
+        'eta_seconds': round(remaining / rate) if rate > 0 and remaining is not None and not job['finished_at'] else None,
+    }
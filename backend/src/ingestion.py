@@ -1,30 +1,28 @@
-﻿from .config import INGESTION_CONFIG
-import requests
-import pandas as pd
+﻿from .config import INGESTION_CONFIG, NEAR_DUPLICATE_CONFIG
+from .csv_stream import iter_records
+from .ingestion_pipeline import IngestionPipeline
 from .sql_db import SqlDB
 from .vector_strore import WeaviateVectorStore
 from .embedder import Embedder
-import json
-import requests
-from requests.exceptions import RequestException
-from bs4 import BeautifulSoup
-import time
 
 class Ingestion:
-    def __init__(self):
-        self.db = SqlDB()
-        self.vectorstore = WeaviateVectorStore()
-        self.embedder = Embedder()
+    def __init__(self, db=None, vectorstore=None, embedder=None):
+        self.db = db if db is not None else SqlDB()
+        self.vectorstore = vectorstore if vectorstore is not None else WeaviateVectorStore()
+        self.embedder = embedder if embedder is not None else Embedder()
+        self.pipeline = None
 
     def close(self):
         self.vectorstore.close()
 
-    def run(self):
-        if not INGESTION_CONFIG['run']:
-            print("[INFO] Ingestion is disabled in config.")
-            return
-        
-        # ✅ THÊM: Kiểm tra xem đã có dữ liệu chưa
+    def cancel(self):
+        if self.pipeline is not None:
+            self.pipeline.cancel()
+
+    def progress(self):
+        return self.pipeline.progress() if self.pipeline is not None else {}
+
+    def _has_existing_data(self):
         try:
             existing_categories = self.db.get_categories()
             if len(existing_categories) > 0:
@@ -33,90 +31,52 @@ class Ingestion:
                 print("[INFO] To re-ingest:")
                 print("  1. Clear the database using clear_database.py")
                 print("  2. Or set INGESTION_CONFIG['run'] = False")
-                return
+                return True
         except Exception as e:
             print(f"[INFO] Checking database: {e}")
             print("[INFO] Proceeding with ingestion...")
+        return False
+
+    def run(self, path=None, force=False, allow_existing=False):
+        """allow_existing: chạy cả khi DB đã có dữ liệu (document cùng link được cập nhật, không bị nhân đôi)"""
+        if not force and not INGESTION_CONFIG['run']:
+            print("[INFO] Ingestion is disabled in config.")
+            return
+        
+        # ✅ THÊM: Kiểm tra xem đã có dữ liệu chưa
+        if not allow_existing and self._has_existing_data():
+            return
         
         print("[INFO] Starting data ingestion...")
-        df = pd.read_csv(INGESTION_CONFIG['path'])
-        print(f"[INFO] Loaded {len(df)} documents from CSV")
-
-        # ✅ Tạo categories với kiểm tra trùng
-        categories = df['category'].unique().tolist()
-        cat_map = {}
-        print(f"[INFO] Creating {len(categories)} categories...")
-        for category in categories:
-            obj = self.db.create_category(name=category)
-            cat_map[category] = obj.id
-        print(f"[SUCCESS] Created {len(cat_map)} categories")
+        path = path or INGESTION_CONFIG['path']
+        chunk_size = INGESTION_CONFIG.get('chunk_size', 1000)
 
-        # ✅ Tạo keywords với kiểm tra trùng
-        keywords = set()
-        for row in df.itertuples(index=False):
-            keys = row.keywords
-            if not keys or pd.isna(keys):
-                keys = []
-            else:
-                keys = [k.strip() for k in keys.split(',')]
-            keywords.update(keys)
-        keywords = list(keywords)
-        keyword_map = {}
-        print(f"[INFO] Creating {len(keywords)} keywords...")
-        for key in keywords:
-            if key:  # ✅ Bỏ qua keyword rỗng
-                obj = self.db.create_keyword(name=key)
-                keyword_map[key] = obj.id
-        print(f"[SUCCESS] Created {len(keyword_map)} keywords")
+        near_duplicates = None
+        if NEAR_DUPLICATE_CONFIG.get('check_on_ingest'):
+            from .near_duplicates import build_index
+            near_duplicates = build_index(self.db)
+            print(f"[INFO] Near-duplicate check against {len(near_duplicates)} existing documents")
 
-        # ✅ Tạo documents
-        print(f"[INFO] Creating {len(df)} documents...")
-        success_count = 0
-        for i, row in enumerate(df.itertuples(index=False), start=1):
-            try:
-                title = row.Title
-                link = row.Link
-                summary = row.summary
-                if not summary or pd.isna(summary):
-                    summary = ''
-                
-                keywords = row.keywords
-                if not keywords or pd.isna(keywords):
-                    keywords = []
-                else:
-                    keywords = set([key.strip() for key in keywords.split(',')])
-                    keywords = list(keywords)
-                    
-                keyword_ids = [keyword_map[key] for key in keywords if key in keyword_map]
+        # ✅ Pipeline song song: đọc CSV -> SQL -> embedding -> vector store
+        self.pipeline = pipeline = IngestionPipeline(
+            self.db,
+            self.vectorstore,
+            self.embedder,
+            batch_size=INGESTION_CONFIG.get('batch_size', 64),
+            embed_workers=INGESTION_CONFIG.get('embed_workers', 2),
+            embed_backend=INGESTION_CONFIG.get('embed_backend', 'thread'),
+            queue_size=INGESTION_CONFIG.get('queue_size', 4),
+            error_report=INGESTION_CONFIG.get('error_report'),
+            near_duplicates=near_duplicates,
+            near_duplicate_report=NEAR_DUPLICATE_CONFIG.get('report'),
+        )
+        stats = pipeline.run(iter_records(path, chunk_size))
+        # Generation tăng lúc ghi SQL, trước khi có vector: kết quả search cache / ETag trong khoảng đó đã cũ
+        self.db.bump_data_generation()
 
-                category = row.category
-                category_id = cat_map[category]
-
-                # ✅ Tạo document
-                doc = self.db.create_document(
-                    title=title,
-                    link=link,
-                    summary=summary,
-                    category_id=category_id,
-                    keyword_ids=keyword_ids
-                )
-
-                # ✅ Tạo embeddings
-                title_embedding, summary_embedding = self.embedder.embed_batch([title, summary])
-
-                # ✅ Thêm vào vector store
-                self.vectorstore.add_document(
-                    doc_id=doc.id,
-                    title_embedding=title_embedding,
-                    summary_embedding=summary_embedding
-                )
-                
-                success_count += 1
-                if i % 10 == 0:
-                    print(f"[PROGRESS] Processed {i}/{len(df)} documents...")
-                    
-            except Exception as e:
-                print(f"[ERROR] Failed to process document {i}: {title[:50]}... - {e}")
-                continue
-        
-        print(f"[SUCCESS] Ingestion completed! {success_count}/{len(df)} documents created.")
\ No newline at end of file
+        if stats.get('error'):
+            print(f"[ERROR] Ingestion stopped early: {stats['error']}")
+        print(f"[SUCCESS] Created {stats['categories']} categories, {stats['keywords']} keywords")
+        print(f"[SUCCESS] Ingestion completed in {stats['seconds']}s! "
+              f"{stats['vectors']}/{stats['rows_read']} documents indexed, {stats['failed']} failed.")
+        return stats
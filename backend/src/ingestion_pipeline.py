@@ -0,0 +1,337 @@
+import csv
+import multiprocessing
+import os
+import queue
+import threading
+import time
+from concurrent.futures import ProcessPoolExecutor
+
+_DONE = object()
+
+# Embedder riêng cho mỗi process khi embed_backend = process
+_process_embedder = None
+
+
+def _init_process_embedder():
+    global _process_embedder
+    from .embedder import Embedder
+    _process_embedder = Embedder()
+
+
+def _process_embed_batch(texts):
+    return _process_embedder.embed_batch(texts)
+
+
+class IngestionPipeline:
+    """Producer/consumer ingestion: reader -> SQL writer -> embedding workers -> vector writer.
+
+    Stages run on their own threads and are connected by bounded queues, so encoding one batch
+    overlaps with the SQL and vector writes of its neighbours.
+    """
+
+    def __init__(
+        self,
+        db,
+        vectorstore,
+        embedder,
+        batch_size: int = 64,
+        embed_workers: int = 2,
+        embed_backend: str = 'thread',
+        queue_size: int = 4,
+        error_report: str = None,
+        near_duplicates=None,
+        near_duplicate_report: str = None,
+    ):
+        self.db = db
+        self.vectorstore = vectorstore
+        self.embedder = embedder
+        self.batch_size = batch_size
+        self.embed_workers = max(1, embed_workers)
+        self.embed_backend = embed_backend
+        self.queue_size = queue_size
+        self.error_report = error_report
+        # NearDuplicateIndex của corpus hiện có: dòng mới gần giống document đã có được đánh dấu (vẫn ghi)
+        self.near_duplicates = near_duplicates
+        self.near_duplicate_report = near_duplicate_report
+        self.flagged = []
+
+        self.cat_map = {}
+        self.keyword_map = {}
+        self.errors = []
+        self.stats = {'rows_read': 0, 'documents': 0, 'vectors': 0, 'failed': 0}
+        self._lock = threading.Lock()
+        self._pool = None
+        # doc_id đã ghi vector trong lần chạy này: link trùng (cùng doc_id) chỉ đếm một lần
+        self._indexed = set()
+        self._cancel = threading.Event()
+        self._stopped_early = False
+        self.stage_errors = []
+
+    def cancel(self):
+        """Dừng đọc thêm dữ liệu; các batch đang trong pipeline vẫn được ghi xong"""
+        self._cancel.set()
+
+    @property
+    def cancelled(self):
+        # Hủy sau khi đã đọc hết file thì coi như hoàn thành
+        return self._stopped_early
+
+    def progress(self):
+        with self._lock:
+            return dict(self.stats)
+
+    # ---------- Run ----------
+    def run(self, chunks):
+        """chunks: iterable of record lists (see csv_stream.iter_records)"""
+        start = time.perf_counter()
+        sql_queue = queue.Queue(self.queue_size)
+        embed_queue = queue.Queue(self.queue_size)
+        vector_queue = queue.Queue(self.queue_size)
+
+        if self.embed_backend == 'process':
+            # spawn, không fork: process này đã có nhiều thread (pipeline, uvicorn, torch) khi tạo pool
+            self._pool = ProcessPoolExecutor(
+                self.embed_workers, mp_context=multiprocessing.get_context('spawn'),
+                initializer=_init_process_embedder,
+            )
+
+        threads = [
+            threading.Thread(target=self._read, args=(chunks, sql_queue), name='ingest-reader'),
+            threading.Thread(target=self._write_sql, args=(sql_queue, embed_queue), name='ingest-sql-writer'),
+            threading.Thread(target=self._write_vectors, args=(vector_queue,), name='ingest-vector-writer'),
+        ]
+        threads += [
+            threading.Thread(target=self._embed, args=(embed_queue, vector_queue), name=f'ingest-embed-{i}')
+            for i in range(self.embed_workers)
+        ]
+        try:
+            for thread in threads:
+                thread.start()
+            for thread in threads:
+                thread.join()
+        finally:
+            if self._pool is not None:
+                self._pool.shutdown()
+                self._pool = None
+
+        self.stats['seconds'] = round(time.perf_counter() - start, 3)
+        self.stats['cancelled'] = self.cancelled and not self.stage_errors
+        if self.stage_errors:
+            self.stats['error'] = '; '.join(self.stage_errors)
+        self.stats['categories'] = len(self.cat_map)
+        self.stats['keywords'] = len(self.keyword_map)
+        if self.near_duplicates is not None:
+            self.stats['near_duplicates'] = len(self.flagged)
+        self._write_error_report()
+        self._write_near_duplicate_report()
+        return self.stats
+
+    # ---------- Stages ----------
+    def _read(self, chunks, out):
+        try:
+            for records in chunks:
+                for i in range(0, len(records), self.batch_size):
+                    if self._cancel.is_set():
+                        self._stopped_early = True
+                        return
+                    batch = records[i:i + self.batch_size]
+                    self._count('rows_read', len(batch))
+                    out.put(batch)
+        except Exception as e:
+            self._fail({'row': self.stats['rows_read'] + 1}, 'read', e)
+        finally:
+            out.put(_DONE)
+
+    def _write_sql(self, inp, out):
+        try:
+            while True:
+                batch = inp.get()
+                if batch is _DONE:
+                    return
+                try:
+                    self._create_lookups(batch)
+                    written = self._create_documents(batch)
+                except Exception as e:
+                    for record in batch:
+                        self._fail(record, 'sql', e)
+                    continue
+                if written and self.near_duplicates is not None:
+                    self._flag_near_duplicates(written)
+                if written:
+                    out.put(written)
+        except Exception as e:
+            self._abort('sql', e)
+            self._drain(inp)
+        finally:
+            for _ in range(self.embed_workers):
+                out.put(_DONE)
+
+    def _embed(self, inp, out):
+        try:
+            while True:
+                batch = inp.get()
+                if batch is _DONE:
+                    return
+                texts = [r['title'] for r, _ in batch] + [r['summary'] for r, _ in batch]
+                try:
+                    vectors = self._encode(texts)
+                except Exception as e:
+                    for record, _ in batch:
+                        self._fail(record, 'embed', e)
+                    continue
+                n = len(batch)
+                out.put((batch, vectors[:n], vectors[n:]))
+        except Exception as e:
+            self._abort('embed', e)
+            self._drain(inp)
+        finally:
+            out.put(_DONE)
+
+    def _write_vectors(self, inp):
+        remaining = self.embed_workers
+        try:
+            while remaining:
+                item = inp.get()
+                if item is _DONE:
+                    remaining -= 1
+                    continue
+                batch, title_vectors, summary_vectors = item
+                doc_ids = [doc_id for _, doc_id in batch]
+                try:
+                    failed = self.vectorstore.add_documents(doc_ids, title_vectors, summary_vectors) or {}
+                except Exception as e:
+                    for record, _ in batch:
+                        self._fail(record, 'vector', e)
+                    continue
+                for record, doc_id in batch:
+                    if doc_id in failed:
+                        self._fail(record, 'vector', failed[doc_id])
+                inserted = set(doc_ids) - set(failed) - self._indexed
+                self._indexed |= inserted
+                self._count('vectors', len(inserted))
+        except Exception as e:
+            self._abort('vector', e)
+            self._drain(inp, remaining)
+
+    # ---------- Failure handling ----------
+    def _abort(self, stage, error):
+        """Lỗi ngoài xử lý từng batch: dừng đọc thêm, các stage còn lại chạy hết hàng đợi rồi kết thúc"""
+        with self._lock:
+            self.stage_errors.append(f"{stage}: {error}")
+        print(f"[ERROR] Ingestion {stage} stage failed: {error}")
+        self._cancel.set()
+
+    @staticmethod
+    def _drain(inp, done_markers: int = 1):
+        # Tiếp tục lấy khỏi hàng đợi để stage phía trước không bị chặn ở put()
+        while done_markers:
+            if inp.get() is _DONE:
+                done_markers -= 1
+
+    # ---------- Helpers ----------
+    def _create_lookups(self, batch):
+        # Categories/keywords mới của batch được tạo trước documents
+        for category in dict.fromkeys(r['category'] for r in batch):
+            if category not in self.cat_map:
+                self.cat_map[category] = self.db.create_category(name=category).id
+        for key in dict.fromkeys(k for r in batch for k in r['keywords']):
+            if key not in self.keyword_map:
+                self.keyword_map[key] = self.db.create_keyword(name=key).id
+
+    def _document_item(self, record):
+        return {
+            'title': record['title'],
+            'summary': record['summary'],
+            'link': record['link'],
+            'category_id': self.cat_map[record['category']],
+            'keyword_ids': [self.keyword_map[k] for k in record['keywords'] if k in self.keyword_map],
+        }
+
+    def _create_documents(self, batch):
+        """Returns [(record, doc_id)]; falls back to row-by-row when the bulk insert fails"""
+        try:
+            ids = self.db.create_documents([self._document_item(r) for r in batch])
+            self._count('documents', len(ids))
+            return list(zip(batch, ids))
+        except Exception:
+            pass
+
+        written = []
+        for record in batch:
+            try:
+                doc = self.db.create_document(**self._document_item(record))
+                if doc is None:
+                    raise ValueError("document was not created")
+                written.append((record, doc.id))
+                self._count('documents', 1)
+            except Exception as e:
+                self._fail(record, 'sql', e)
+        return written
+
+    def _flag_near_duplicates(self, written):
+        # Chỉ chạy trên thread SQL writer nên index không cần lock
+        try:
+            self._check_near_duplicates(written)
+        except Exception as e:
+            # Chỉ là kiểm tra phụ: tắt đi, ingestion vẫn tiếp tục
+            print(f"[WARNING] Near-duplicate check disabled: {e}")
+            self.near_duplicates = None
+
+    def _check_near_duplicates(self, written):
+        index = self.near_duplicates
+        for record, doc_id in written:
+            signature = index.hasher.signature(record['title'], record['summary'])
+            if signature is None:
+                continue
+            matches = index.query('', signature=signature, exclude=doc_id)
+            if matches:
+                duplicate_of, score = matches[0]
+                self.flagged.append({
+                    'row': record.get('row'),
+                    'title': (record.get('title') or '')[:200],
+                    'link': record.get('link', ''),
+                    'doc_id': doc_id,
+                    'duplicate_of': duplicate_of,
+                    'jaccard': round(score, 3),
+                })
+            index.add(doc_id, '', signature=signature)
+
+    def _encode(self, texts):
+        if self._pool is not None:
+            return self._pool.submit(_process_embed_batch, texts).result()
+        return self.embedder.embed_batch(texts)
+
+    def _count(self, key, n):
+        with self._lock:
+            self.stats[key] += n
+
+    def _fail(self, record, stage, error):
+        with self._lock:
+            self.stats['failed'] += 1
+            self.errors.append({
+                'row': record.get('row'),
+                'title': (record.get('title') or '')[:200],
+                'link': record.get('link', ''),
+                'stage': stage,
+                'error': str(error)[:500],
+            })
+
+    def _write_error_report(self):
+        if not self.errors or not self.error_report:
+            return
+        os.makedirs(os.path.dirname(os.path.abspath(self.error_report)), exist_ok=True)
+        with open(self.error_report, 'w', newline='', encoding='utf-8') as f:
+            writer = csv.DictWriter(f, fieldnames=['row', 'title', 'link', 'stage', 'error'])
+            writer.writeheader()
+            writer.writerows(sorted(self.errors, key=lambda e: e['row'] or 0))
+        print(f"[WARNING] {len(self.errors)} rows failed, see {self.error_report}")
+
+    def _write_near_duplicate_report(self):
+        if not self.flagged or not self.near_duplicate_report:
+            return
+        os.makedirs(os.path.dirname(os.path.abspath(self.near_duplicate_report)), exist_ok=True)
+        with open(self.near_duplicate_report, 'w', newline='', encoding='utf-8') as f:
+            writer = csv.DictWriter(f, fieldnames=['row', 'title', 'link', 'doc_id', 'duplicate_of', 'jaccard'])
+            writer.writeheader()
+            writer.writerows(sorted(self.flagged, key=lambda e: e['row'] or 0))
+        print(f"[WARNING] {len(self.flagged)} rows look like near-duplicates, see {self.near_duplicate_report}")
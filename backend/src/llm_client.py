@@ -0,0 +1,181 @@
+import os
+import random
+import time
+
+import requests
+from requests.adapters import HTTPAdapter
+from prometheus_client import Counter, Gauge
+
+from .config import LLM_CONFIG
+from .rate_limit import CircuitBreaker, TokenBucket
+
+LLM_REQUESTS = Counter('backend_llm_requests_total', 'LLM calls by outcome', ['outcome'])
+LLM_CIRCUIT_OPEN = Gauge('backend_llm_circuit_open', '1 while the LLM circuit breaker is open', multiprocess_mode='livemax')
+
+RETRY_STATUS = {429, 500, 502, 503, 504}
+
+
+class LLMUnavailable(Exception):
+    """LLM không dùng được (rate limit, circuit mở, hết retry) -> caller dùng fallback"""
+
+
+class LLMClient:
+    """Client dùng chung cho Groq: pooled session, token bucket, retry có jitter, circuit breaker"""
+
+    def __init__(self, config: dict = None):
+        config = config or LLM_CONFIG
+        self.url = config.get('url', 'https://api.groq.com/openai/v1/chat/completions')
+        self.model = config.get('model', 'gemma-7b-it')
+        self.api_key_env = config.get('api_key_env', 'GROQ_API_KEY')
+        self.connect_timeout = config.get('connect_timeout', 3)
+        self.max_retries = config.get('max_retries', 2)
+        self.backoff_base = config.get('backoff_base', 0.5)
+        self.backoff_max = config.get('backoff_max', 8)
+        self.acquire_timeout = config.get('acquire_timeout', 1)
+        self.total_timeout = config.get('total_timeout', 60)
+
+        self.bucket = TokenBucket(config.get('rate_per_second', 0.5), config.get('burst', 5))
+        # Call nền (warmer): bucket riêng + không được rút bucket chung xuống dưới background_reserve
+        self.background_bucket = TokenBucket(
+            config.get('background_rate_per_second', 0.1), config.get('background_burst', 1)
+        )
+        self.background_reserve = config.get('background_reserve', 2)
+        self.breaker = CircuitBreaker(config.get('failure_threshold', 5), config.get('reset_timeout', 30))
+
+        pool_size = config.get('pool_size', 16)
+        self.session = requests.Session()
+        adapter = HTTPAdapter(pool_connections=pool_size, pool_maxsize=pool_size)
+        self.session.mount('https://', adapter)
+        self.session.mount('http://', adapter)
+
+    @property
+    def api_key(self):
+        return os.getenv(self.api_key_env)
+
+    def close(self):
+        self.session.close()
+
+    def chat(self, messages, temperature: float = 0.3, max_tokens: int = 1000, timeout: float = 30,
+             deadline: float = None, background: bool = False):
+        """Gọi chat completion, trả về content; raise LLMUnavailable khi nên dùng fallback.
+
+        timeout: mỗi lần gọi; deadline: tổng thời gian kể cả retry + backoff (mặc định llm/total_timeout)
+        background: call ưu tiên thấp (warmer), không chờ token và nhường quota chung cho request của user
+        """
+        api_key = self.api_key
+        if not api_key:
+            raise LLMUnavailable(f"{self.api_key_env} not configured")
+        if not self.breaker.allow():
+            LLM_REQUESTS.labels('circuit_open').inc()
+            raise LLMUnavailable("LLM circuit is open")
+
+        payload = {
+            'model': self.model,
+            'messages': messages,
+            'temperature': temperature,
+            'max_tokens': max_tokens,
+        }
+        headers = {
+            'Authorization': f'Bearer {api_key}',
+            'Content-Type': 'application/json',
+        }
+
+        end = time.monotonic() + (deadline if deadline is not None else self.total_timeout)
+        settled = False
+        try:
+            content = self._call(payload, headers, timeout, end, background)
+            settled = True
+            return content
+        except LLMUnavailable:
+            settled = True
+            raise
+        finally:
+            if not settled:
+                # Lỗi không lường trước (bug, KeyboardInterrupt...): không giữ lượt thử half-open mãi
+                self.breaker.release()
+
+    def _call(self, payload, headers, timeout, end, background=False):
+        last_error = None
+        for attempt in range(self.max_retries + 1):
+            remaining = end - time.monotonic()
+            if remaining <= 0:
+                last_error = last_error or "deadline exceeded"
+                break
+            if not self._acquire(background, remaining):
+                # Hết quota cục bộ: không tính là lỗi upstream
+                self.breaker.release()
+                LLM_REQUESTS.labels('rate_limited').inc()
+                raise LLMUnavailable("LLM rate limit reached")
+
+            retry_after = None
+            remaining = max(0.1, end - time.monotonic())
+            try:
+                res = self.session.post(
+                    self.url, headers=headers, json=payload,
+                    timeout=(min(self.connect_timeout, remaining), min(timeout, remaining)),
+                )
+                if res.status_code == 200:
+                    content = res.json()['choices'][0]['message']['content'].strip()
+                    self.breaker.record_success()
+                    self._update_gauge()
+                    LLM_REQUESTS.labels('success').inc()
+                    return content
+                last_error = f"HTTP {res.status_code}"
+                if res.status_code not in RETRY_STATUS:
+                    # 4xx khác (sai key, request lỗi): retry không giúp gì, upstream vẫn sống
+                    self.breaker.release()
+                    LLM_REQUESTS.labels('client_error').inc()
+                    raise LLMUnavailable(last_error)
+                retry_after = _parse_retry_after(res.headers.get('Retry-After'))
+            except requests.RequestException as e:
+                # Timeout, ConnectionError, ChunkedEncodingError, TooManyRedirects, ...
+                last_error = str(e) or type(e).__name__
+            except (ValueError, KeyError, IndexError, TypeError) as e:
+                last_error = f"Invalid response: {e}"
+
+            if attempt < self.max_retries:
+                delay = self._backoff(attempt, retry_after)
+                if time.monotonic() + delay >= end:
+                    break
+                LLM_REQUESTS.labels('retry').inc()
+                time.sleep(delay)
+
+        self.breaker.record_failure()
+        self._update_gauge()
+        LLM_REQUESTS.labels('failure').inc()
+        raise LLMUnavailable(f"LLM request failed: {last_error}")
+
+    def _acquire(self, background, remaining):
+        if not background:
+            return self.bucket.acquire(timeout=min(self.acquire_timeout, remaining))
+        if self.background_bucket.try_acquire() != 0:
+            return False
+        return self.bucket.try_acquire(reserve=self.background_reserve) == 0
+
+    def _backoff(self, attempt, retry_after=None):
+        # Full jitter: random trong [0, base * 2^attempt], có tôn trọng Retry-After
+        delay = random.uniform(0, min(self.backoff_max, self.backoff_base * (2 ** attempt)))
+        if retry_after is not None:
+            delay = max(delay, min(retry_after, self.backoff_max))
+        return delay
+
+    def _update_gauge(self):
+        LLM_CIRCUIT_OPEN.set(1 if self.breaker.state == CircuitBreaker.OPEN else 0)
+
+    def status(self):
+        return {
+            'circuit': self.breaker.state,
+            'consecutive_failures': self.breaker.failures,
+            'tokens': round(self.bucket.tokens, 2),
+            'background_tokens': round(self.background_bucket.tokens, 2),
+        }
+
+
+def _parse_retry_after(value):
+    try:
+        return float(value)
+    except (TypeError, ValueError):
+        return None
+
+
+llm_client = LLMClient()
@@ -1,405 +1,270 @@
 # src/main.py
-from .ingestion import Ingestion
-from .config import INGESTION_CONFIG
-
-# Tự động ingest nếu config bật
-if INGESTION_CONFIG.get("run"):
-    ingestion = Ingestion()
-    ingestion.run()
-    ingestion.close()
-    del ingestion
-
-from fastapi import FastAPI, Query
+from contextlib import asynccontextmanager
+from fastapi import FastAPI, Query, Request
 from fastapi.middleware.cors import CORSMiddleware
 from fastapi.staticfiles import StaticFiles
-from fastapi.responses import FileResponse
-from bs4 import BeautifulSoup
+from fastapi.responses import FileResponse, JSONResponse, Response
 from pydantic import BaseModel
 import requests
-import re
-import html
-import json
 import os
-from typing import Dict, Any, List
-from urllib.parse import urljoin
-
-from .embedder import Embedder
-from .sql_db import SqlDB
-from .vector_strore import WeaviateVectorStore
-
-app = FastAPI(title="backend")
-embedder = Embedder()
-db = SqlDB()
-vectorstore = WeaviateVectorStore()
+from typing import List, Optional
+from concurrent.futures import ThreadPoolExecutor
+
+from .article import crawl_article
+from .admission import AdmissionController, AdmissionMiddleware
+from .compression import CompressionMiddleware
+from .config import SEARCH_CONFIG
+from .http_cache import etag_matches, make_etag, not_modified, set_etag
+from .ingest_jobs import JobConflict
+from .llm_client import LLMUnavailable, llm_client
+from .metrics import MetricsMiddleware, render_latest, stage
+from .profiler import ProfiledRoute, ProfilerBusy, ProfilerMiddleware, profiler
+from .resources import Resources
+from .search_cache import SearchCache
+
+# Model, Weaviate và ingestion được khởi tạo nền trong lifespan, không chặn lúc import
+resources = Resources()
+# Rate limit / concurrency theo endpoint, worker budget riêng cho crawl + LLM
+admission = AdmissionController()
+# Query lặp lại (vd. "mice spaceflight") không phải embed + vector search lại
+search_cache = SearchCache.from_config()
+
+
+@asynccontextmanager
+async def lifespan(app: FastAPI):
+    resources.start()
+    yield
+    resources.close()
+    llm_client.close()
+
+
+app = FastAPI(title="backend", lifespan=lifespan)
+# Request profile (X-Profile) lấy mẫu cả thread threadpool đang chạy endpoint
+app.router.route_class = ProfiledRoute
+
+# Pool cho các vector search chạy song song trong /search/batch
+search_executor = ThreadPoolExecutor(
+    max_workers=SEARCH_CONFIG.get("batch_concurrency", 8),
+    thread_name_prefix="batch-search",
+)
 
+# Trong cùng: chỉ profile request đã qua admission
+app.add_middleware(ProfilerMiddleware, profiler=profiler)
+# Trong CORS để response 429 vẫn có header CORS
+app.add_middleware(AdmissionMiddleware, controller=admission)
 app.add_middleware(
     CORSMiddleware,
     allow_origins=["http://localhost:3000", "http://localhost:5173", "*"],
     allow_credentials=True,
     allow_methods=["*"],
     allow_headers=["*"],
+    expose_headers=["Server-Timing", "ETag", "Retry-After", "X-Profile-Id"],
 )
+app.add_middleware(CompressionMiddleware)
+app.add_middleware(MetricsMiddleware)
 
-# ---------- Helpers ----------
-def clean_text(s: str) -> str:
-    if not s:
-        return ""
-    return re.sub(r"\s+", " ", s).strip()
-
-
-def extract_article_content(soup: BeautifulSoup) -> Dict[str, str]:
-    """Trích xuất nội dung bài báo"""
-    content = {
-        "abstract": "",
-        "body": "",
-        "full_text": ""
-    }
-    
-    # 1. Tìm abstract
-    abstract_selectors = [
-        {"name": "div", "class_": ["abstract", "Abstract", "article-abstract"]},
-        {"name": "section", "attrs": {"id": re.compile(r"abstract", re.I)}},
-        {"name": "p", "class_": "abstract"},
-        {"name": "div", "attrs": {"id": re.compile(r"abstract", re.I)}},
-    ]
-    
-    for selector in abstract_selectors:
-        abstract_tag = soup.find(**selector)
-        if abstract_tag:
-            content["abstract"] = clean_text(abstract_tag.get_text(" ", strip=True))
-            if len(content["abstract"]) > 100:
-                break
-    
-    if not content["abstract"]:
-        meta_abstract = soup.find("meta", {"name": "description"}) or \
-                       soup.find("meta", {"property": "og:description"})
-        if meta_abstract and meta_abstract.get("content"):
-            content["abstract"] = clean_text(meta_abstract["content"])
-    
-    # 2. Tìm body content
-    body_selectors = [
-        {"name": "article"},
-        {"name": "main"},
-        {"name": "div", "class_": re.compile(r"article-body|content-body|article-text", re.I)},
-        {"name": "div", "attrs": {"id": re.compile(r"article-body|content", re.I)}},
-    ]
-    
-    body_tag = None
-    for selector in body_selectors:
-        body_tag = soup.find(**selector)
-        if body_tag:
-            for unwanted in body_tag.find_all(["script", "style", "nav", "header", "footer", "aside"]):
-                unwanted.decompose()
-            
-            body_text = clean_text(body_tag.get_text(" ", strip=True))
-            if len(body_text) > 500:
-                content["body"] = body_text
-                break
-    
-    if not content["body"]:
-        body_tag = soup.find("body")
-        if body_tag:
-            for unwanted in body_tag.find_all(["script", "style", "nav", "header", "footer", "aside"]):
-                unwanted.decompose()
-            content["body"] = clean_text(body_tag.get_text(" ", strip=True))
-    
-    # 3. Tạo full_text
-    parts = []
-    if content["abstract"]:
-        parts.append(f"ABSTRACT:\n{content['abstract']}")
-    if content["body"]:
-        body_limited = content["body"][:8000]
-        parts.append(f"\nFULL TEXT:\n{body_limited}")
-    
-    content["full_text"] = "\n\n".join(parts)
-    
-    return content
+# ---------- APIs ----------
+@app.get("/healthz")
+def healthz():
+    return {"status": "ok"}
 
 
-def extract_pdf_url(soup: BeautifulSoup, base_url: str) -> str:
-    """Tìm URL PDF"""
-    pdf_url = ""
-    
-    meta_pdf = soup.find("meta", {"name": "citation_pdf_url"})
-    if meta_pdf and meta_pdf.get("content"):
-        return meta_pdf["content"]
-    
-    pdf_links = []
-    for link in soup.find_all("a", href=True):
-        href = link.get("href", "")
-        text = link.get_text().strip().lower()
-        
-        if href.endswith(".pdf"):
-            pdf_links.append(href)
-            continue
-        
-        if any(keyword in text for keyword in ["pdf", "download pdf", "full text pdf"]):
-            if ".pdf" in href or "pdf" in href.lower():
-                pdf_links.append(href)
-    
-    if pdf_links:
-        pdf_url = pdf_links[0]
-        if pdf_url.startswith("/"):
-            pdf_url = urljoin(base_url, pdf_url)
-        elif not pdf_url.startswith("http"):
-            pdf_url = urljoin(base_url, pdf_url)
-    
-    return pdf_url
+@app.get("/readyz")
+def readyz():
+    status = resources.status()
+    return JSONResponse(status_code=200 if status["ready"] else 503, content=status)
 
 
-def summarize_with_groq(text: str) -> Dict[str, str]:
-    """Summarize với Groq API"""
-    text = clean_text(text)
-    if not text:
-        return create_empty_summary()
+@app.get("/categories")
+def get_categories(request: Request, response: Response):
+    etag = make_etag(resources.db.get_data_generation(), "categories")
+    matched = etag_matches(request, etag)
+    if matched:
+        return not_modified(matched)
+    set_etag(response, etag)
+    return {"status": "success", "data": resources.db.get_categories()}
 
-    if len(text) > 10000:
-        text = text[:10000] + "..."
 
-    GROQ_API_KEY = os.getenv("GROQ_API_KEY")
-    
-    if not GROQ_API_KEY:
-        print("GROQ_API_KEY not found, using fallback")
-        return create_fallback_summary(text)
+@app.get("/categories/{category_id}/documents")
+def get_documents(category_id: int, request: Request, response: Response, include_relations: bool = False):
+    etag = make_etag(resources.db.get_data_generation(), "category_documents", category_id, include_relations)
+    matched = etag_matches(request, etag)
+    if matched:
+        return not_modified(matched)
+    set_etag(response, etag)
+    return {"status": "success", "data": resources.db.get_documents_by_category(category_id, include_relations)}
+
+
+@app.get("/facets")
+def get_facets(
+    request: Request,
+    response: Response,
+    doc_ids: Optional[List[int]] = Query(None),
+    keyword_limit: int = 20,
+):
+    """Số document theo category + top keywords; doc_ids: chỉ tính trong tập kết quả search hiện tại"""
+    try:
+        etag = make_etag(resources.db.get_data_generation(), "facets", sorted(set(doc_ids or [])), keyword_limit)
+        matched = etag_matches(request, etag)
+        if matched:
+            return not_modified(matched)
+        if doc_ids:
+            data = resources.db.get_facets_for_documents(doc_ids, keyword_limit)
+        else:
+            data = resources.db.get_facets(keyword_limit)
+        set_etag(response, etag)
+        return {"status": "success", "data": data}
+    except Exception as e:
+        return {"status": "error", "data": str(e)}
 
-    prompt = f"""You are an expert scientific article summarizer. Return ONLY valid JSON with these exact keys:
-{{"Background": "**Context**\\n- Point 1\\n- Point 2", "KeyFindings": "**Results**\\n- Finding 1", "Methodology": "**Design**\\n- Method detail", "EthicalConsiderations": "", "Implications": "**Impact**\\n- Implication", "AdditionalNotes": "", "Conclusion": "**Summary**\\n- Key point"}}
 
-Article: {text}"""
+@app.get("/suggest")
+def suggest(q: str = "", limit: int = 8):
+    """Gợi ý khi gõ (prefix của từ trong title / keyword), không encode model"""
+    index = resources.suggest_index
+    if index is None:
+        return {"status": "success", "data": []}
+    return {"status": "success", "data": index.suggest(q, limit)}
 
-    try:
-        res = requests.post(
-            "https://api.groq.com/openai/v1/chat/completions",
-            headers={
-                "Authorization": f"Bearer {GROQ_API_KEY}",
-                "Content-Type": "application/json"
-            },
-            json={
-                "model": "gemma-7b-it",
-                "messages": [
-                    {"role": "system", "content": "Return only valid JSON."},
-                    {"role": "user", "content": prompt}
-                ],
-                "temperature": 0.3,
-                "max_tokens": 2000,
-            },
-            timeout=60,
-        )
-        
-        if res.status_code != 200:
-            return create_fallback_summary(text)
-        
-        raw = res.json()["choices"][0]["message"]["content"].strip()
-        
-        if raw.startswith("```"):
-            raw = re.sub(r'^```(?:json)?\s*', '', raw)
-            raw = re.sub(r'\s*```$', '', raw)
-        
-        json_match = re.search(r'\{[\s\S]*\}', raw)
-        if json_match:
-            summary_json = json.loads(json_match.group())
-            return validate_and_format_summary(summary_json)
-        
-        return create_fallback_summary(text)
 
-    except Exception as e:
-        print(f"Groq error: {e}")
-        return create_fallback_summary(text)
+class SearchRequest(BaseModel):
+    query: str
+    limit: int
+    nprobe: Optional[int] = None
+    # True: bỏ qua cache, luôn search lại (kết quả mới vẫn được lưu vào cache)
+    no_cache: bool = False
+    # True: mỗi document kèm category + keywords
+    include_relations: bool = False
 
 
-def validate_and_format_summary(summary: Dict[str, Any]) -> Dict[str, str]:
-    """Validate summary format"""
-    required_keys = [
-        "Background", "KeyFindings", "Methodology", 
-        "EthicalConsiderations", "Implications", 
-        "AdditionalNotes", "Conclusion"
-    ]
-    
-    result = {}
-    for key in required_keys:
-        val = summary.get(key, "")
-        if isinstance(val, list):
-            val = format_list_as_subsections(val, key)
-        elif not isinstance(val, str):
-            val = str(val) if val else ""
-        
-        if val and "**" not in val and len(val) > 20:
-            val = auto_format_subsection(val, key)
-        
-        result[key] = val
-    
-    return result
+def find_doc_ids(query_vector, limit: int, nprobe: Optional[int] = None):
+    vector_index = resources.vector_index
+    if vector_index is not None and len(vector_index):
+        return vector_index.search(query_vector, k=limit, nprobe=nprobe)
+    if resources.vectorstore is None:
+        raise RuntimeError("Vector store is not ready yet")
+    return resources.vectorstore.similarity_search(query_vector=query_vector, k=limit)
 
 
-def auto_format_subsection(text: str, section_name: str) -> str:
-    """Auto format text"""
-    if not text:
-        return ""
-    
-    sentences = [s.strip() + "." for s in text.split('.') if s.strip()]
-    if not sentences:
-        return text
-    
-    heading_map = {
-        "Background": "Study Context",
-        "KeyFindings": "Main Results",
-        "Methodology": "Study Design",
-        "Implications": "Key Implications",
-        "Conclusion": "Summary"
-    }
-    
-    heading = heading_map.get(section_name, "Overview")
-    result = f"**{heading}**\n"
-    
-    for sentence in sentences[:5]:
-        result += f"- {sentence}\n"
-    
-    return result.strip()
+def search_engine():
+    # Kết quả từ index cũ (chưa build lại theo generation mới) không được trả lại sau khi index đổi
+    if resources.vector_index is not None:
+        return f"partitioned:{resources.index_generation}"
+    return "weaviate"
 
 
-def format_list_as_subsections(items: List, section_name: str) -> str:
-    """Format list"""
-    if not items:
-        return ""
-    
-    heading_map = {
-        "Background": "Key Points",
-        "KeyFindings": "Main Findings",
-        "Methodology": "Methods",
-        "Implications": "Implications"
-    }
-    
-    heading = heading_map.get(section_name, "Summary")
-    result = f"**{heading}**\n"
-    
-    for item in items:
-        result += f"- {str(item)}\n"
-    
-    return result.strip()
-
-
-def create_empty_summary() -> Dict[str, str]:
-    """Empty summary"""
-    return {
-        "Background": "",
-        "KeyFindings": "",
-        "Methodology": "",
-        "EthicalConsiderations": "",
-        "Implications": "",
-        "AdditionalNotes": "",
-        "Conclusion": "",
-    }
-
-
-def create_fallback_summary(text: str) -> Dict[str, str]:
-    """Fallback summary"""
-    parts = text.split("FULL TEXT:")
-    abstract = ""
-    body = ""
-    
-    if len(parts) > 1:
-        abstract = parts[0].replace("ABSTRACT:", "").strip()
-        body = parts[1].strip()
-    else:
-        body = text
-    
-    background_text = abstract if abstract else body[:800]
-    background = auto_format_subsection(background_text, "Background")
-    
-    body_preview = body[:600] if body else ""
-    findings = auto_format_subsection(body_preview, "KeyFindings") if body_preview else ""
-    
-    return {
-        "Background": background,
-        "KeyFindings": findings,
-        "Methodology": "**Note**\n- Full analysis unavailable.",
-        "EthicalConsiderations": "",
-        "Implications": "",
-        "AdditionalNotes": "**Important**\n- Automated summary.",
-        "Conclusion": "",
-    }
+def cached_doc_ids(key, generation: int, no_cache: bool):
+    if no_cache:
+        search_cache.bypass()
+        return None
+    return search_cache.get(key, generation)
 
 
-# ---------- APIs ----------
-@app.get("/categories")
-def get_categories():
-    return {"status": "success", "data": db.get_categories()}
+@app.post("/search")
+def search_documents(body: SearchRequest):
+    try:
+        generation = resources.db.get_data_generation()
+        engine = search_engine()
+        key = search_cache.key(body.query, body.limit, body.nprobe, engine)
+        with stage("search_cache"):
+            doc_ids = cached_doc_ids(key, generation, body.no_cache)
+        if doc_ids is None:
+            if resources.embedder is None:
+                raise RuntimeError("Embedding model is not ready yet")
+            with stage("embed"):
+                query_vector = resources.embedder.embed(body.query)
+            with stage("vector_search"):
+                doc_ids = find_doc_ids(query_vector, body.limit, body.nprobe)
+            search_cache.put(key, generation, doc_ids)
+        with stage("sql_fetch"):
+            docs = resources.db.get_documents_by_ids(list(doc_ids), body.include_relations)
+        if resources.warmer is not None:
+            # Kết quả vừa hiển thị là thứ user sắp click: crawl trước
+            resources.warmer.prioritize(doc_ids)
+        return {"status": "success", "data": docs}
+    except Exception as e:
+        return {"status": "error", "data": str(e)}
 
 
-@app.get("/categories/{category_id}/documents")
-def get_documents(category_id: int):
-    return {"status": "success", "data": db.get_documents_by_category(category_id)}
+class BatchQuery(BaseModel):
+    query: str
+    limit: int = 10
+    nprobe: Optional[int] = None
+    no_cache: bool = False
 
 
-class SearchRequest(BaseModel):
-    query: str
-    limit: int
+class BatchSearchRequest(BaseModel):
+    queries: List[BatchQuery]
+    include_relations: bool = False
 
 
-@app.post("/search")
-def search_documents(body: SearchRequest):
+@app.post("/search/batch")
+def search_documents_batch(body: BatchSearchRequest):
+    """Nhiều query trong 1 request: 1 lần embed_batch cho các query chưa có trong cache, search song song, 1 lần query SQL"""
     try:
-        query_vector = embedder.embed(body.query)
-        doc_ids = vectorstore.similarity_search(query_vector=query_vector, k=body.limit)
-        docs = db.get_documents_by_ids(doc_ids)
-        return {"status": "success", "data": docs}
+        max_queries = SEARCH_CONFIG.get("max_batch_queries", 256)
+        if len(body.queries) > max_queries:
+            raise ValueError(f"Too many queries: {len(body.queries)} > {max_queries}")
+        if not body.queries:
+            return {"status": "success", "data": []}
+
+        generation = resources.db.get_data_generation()
+        engine = search_engine()
+        keys = [search_cache.key(q.query, q.limit, q.nprobe, engine) for q in body.queries]
+        with stage("search_cache"):
+            id_lists = [cached_doc_ids(key, generation, q.no_cache) for q, key in zip(body.queries, keys)]
+        misses = [i for i, ids in enumerate(id_lists) if ids is None]
+
+        if misses:
+            if resources.embedder is None:
+                raise RuntimeError("Embedding model is not ready yet")
+            with stage("embed"):
+                query_vectors = resources.embedder.embed_batch([body.queries[i].query for i in misses])
+            with stage("vector_search"):
+                futures = [
+                    search_executor.submit(find_doc_ids, vector, body.queries[i].limit, body.queries[i].nprobe)
+                    for i, vector in zip(misses, query_vectors)
+                ]
+                for i, future in zip(misses, futures):
+                    id_lists[i] = future.result()
+                    search_cache.put(keys[i], generation, id_lists[i])
+        with stage("sql_fetch"):
+            all_ids = list(dict.fromkeys(doc_id for ids in id_lists for doc_id in ids))
+            docs = resources.db.get_documents_by_ids(all_ids, body.include_relations)
+            docs_by_id = {doc["id"] if body.include_relations else doc.id: doc for doc in docs}
+
+        # Kết quả theo đúng thứ tự input
+        data = [
+            {"query": q.query, "data": [docs_by_id[i] for i in ids if i in docs_by_id]}
+            for q, ids in zip(body.queries, id_lists)
+        ]
+        return {"status": "success", "data": data}
     except Exception as e:
         return {"status": "error", "data": str(e)}
 
 
 @app.get("/article_content")
-def get_article_content(url: str = Query(...)):
+async def get_article_content(url: str = Query(...)):
     """Crawl article and return summary"""
+    return await admission.run_slow(article_content, url)
+
+
+def article_content(url: str):
     try:
-        print(f"\nFetching URL: {url}")
-        
-        headers = {
-            "User-Agent": "Mozilla/5.0 (Windows NT 10.0; Win64; x64) AppleWebKit/537.36"
-        }
-        resp = requests.get(url, headers=headers, timeout=20)
-        resp.raise_for_status()
-        
-        soup = BeautifulSoup(resp.text, "html.parser")
+        # Đã được warmer (hoặc lần click trước) crawl + summarize thì trả luôn
+        with stage("summary_store"):
+            stored = resources.db.get_article_summary(url) if resources.db else None
+        if stored:
+            return {"status": "success", "data": stored}
 
-        # Get title
-        title = ""
-        title_tag = soup.find("h1") or soup.find("title")
-        if title_tag:
-            title = clean_text(title_tag.get_text())
-        
-        if not title:
-            title = "Article Title Unavailable"
-        
-        # Get authors
-        authors = []
-        for meta in soup.find_all("meta", {"name": "citation_author"}):
-            if meta.get("content"):
-                authors.append(meta["content"].strip())
-        
-        if not authors:
-            author_tags = soup.find_all(class_=re.compile(r"author", re.I))
-            for tag in author_tags[:10]:
-                author_text = clean_text(tag.get_text())
-                if author_text and len(author_text) < 100:
-                    authors.append(author_text)
-
-        # Extract PDF URL
-        pdf_url = extract_pdf_url(soup, url)
-
-        # Extract content
-        content = extract_article_content(soup)
-        
-        # Summarize with Groq
-        summary = summarize_with_groq(content['full_text'])
+        print(f"\nFetching URL: {url}")
+        data, final = crawl_article(url)
+        if final:
+            resources.db.save_article_summary(url, data)
 
         return {
             "status": "success",
-            "data": {
-                "title": html.unescape(title),
-                "authors": authors[:15],
-                "summary": summary,
-                "pdf_url": pdf_url
-            }
+            "data": data
         }
         
     except requests.Timeout:
@@ -420,12 +285,14 @@ class ChatRequest(BaseModel):
 
 
 @app.post("/chat_article")
-def chat_article(body: ChatRequest):
+async def chat_article(body: ChatRequest):
     """Chat with Groq API"""
+    return await admission.run_slow(chat_with_article, body)
+
+
+def chat_with_article(body: ChatRequest):
     try:
-        GROQ_API_KEY = os.getenv("GROQ_API_KEY")
-        
-        if not GROQ_API_KEY:
+        if not llm_client.api_key:
             return {"status": "error", "answer": "API key not configured"}
         
         context = f"""Article: {body.article_title}
@@ -436,32 +303,132 @@ Question: {body.question}
 
 Answer based on the article."""
 
-        res = requests.post(
-            "https://api.groq.com/openai/v1/chat/completions",
-            headers={
-                "Authorization": f"Bearer {GROQ_API_KEY}",
-                "Content-Type": "application/json"
-            },
-            json={
-                "model": "gemma-7b-it",
-                "messages": [{"role": "user", "content": context}],
-                "temperature": 0.5,
-                "max_tokens": 500,
-            },
-            timeout=30,
-        )
-        
-        if res.status_code != 200:
-            return {"status": "error", "answer": "AI request failed"}
-        
-        answer = res.json()["choices"][0]["message"]["content"].strip()
+        with stage("groq_chat"):
+            answer = llm_client.chat(
+                [{"role": "user", "content": context}],
+                temperature=0.5,
+                max_tokens=500,
+                timeout=30,
+            )
         
         return {"status": "success", "answer": answer}
         
+    except LLMUnavailable as e:
+        print(f"Groq unavailable: {e}")
+        return {"status": "error", "answer": "AI request failed"}
     except Exception as e:
         return {"status": "error", "answer": f"Error: {str(e)}"}
 
 
+class IngestRequest(BaseModel):
+    # File CSV trong thư mục data (mặc định: ingestion.path)
+    path: Optional[str] = None
+    # False: bỏ qua nếu DB đã có dữ liệu
+    allow_existing: bool = True
+    # True (cần X-Admin-Token): lưu sampling profile của cả job
+    profile: bool = False
+
+
+@app.post("/ingest", status_code=202)
+def start_ingest(body: IngestRequest, request: Request):
+    """Chạy ingestion nền; search vẫn phục vụ trên dữ liệu hiện có trong lúc job chạy"""
+    if body.profile and not profiler.is_admin(request.headers.get("x-admin-token")):
+        return JSONResponse(status_code=403, content={"status": "error", "data": "Forbidden"})
+    if resources.embedder is None or resources.vectorstore is None:
+        return JSONResponse(status_code=503, content={"status": "error", "data": "Embedder or vector store not ready"})
+    try:
+        job = resources.jobs.submit(body.path, allow_existing=body.allow_existing, profile=body.profile)
+    except JobConflict as e:
+        return JSONResponse(status_code=409, content={"status": "error", "data": str(e), "job": e.job})
+    except ValueError as e:
+        return JSONResponse(status_code=400, content={"status": "error", "data": str(e)})
+    return {"status": "success", "data": job}
+
+
+@app.get("/ingest/{job_id}")
+def get_ingest_job(job_id: str):
+    job = resources.jobs.get(job_id)
+    if job is None:
+        return JSONResponse(status_code=404, content={"status": "error", "data": "Job not found"})
+    return {"status": "success", "data": job}
+
+
+@app.delete("/ingest/{job_id}")
+def cancel_ingest_job(job_id: str):
+    """Job đang chạy: yêu cầu hủy (dừng sau batch hiện tại); job đã kết thúc: xóa bản ghi"""
+    job = resources.jobs.cancel(job_id)
+    if job is None:
+        return JSONResponse(status_code=404, content={"status": "error", "data": "Job not found"})
+    return {"status": "success", "data": job}
+
+
+class ProfileWindowRequest(BaseModel):
+    seconds: float = 10
+    label: str = ""
+
+
+def require_admin(request: Request):
+    if not profiler.is_admin(request.headers.get("x-admin-token")):
+        return JSONResponse(status_code=403, content={"status": "error", "data": "Forbidden"})
+    return None
+
+
+@app.post("/profiles", status_code=202)
+def start_profile_window(body: ProfileWindowRequest, request: Request):
+    """Profile toàn process trong `seconds` giây (tối đa profiling/max_seconds)"""
+    denied = require_admin(request)
+    if denied:
+        return denied
+    try:
+        profile_id = profiler.window(body.seconds, body.label)
+    except ProfilerBusy as e:
+        return JSONResponse(status_code=409, content={"status": "error", "data": str(e)})
+    return {"status": "success", "data": {"id": profile_id, "seconds": min(body.seconds, profiler.max_seconds)}}
+
+
+@app.get("/profiles")
+def list_profiles(request: Request):
+    denied = require_admin(request)
+    if denied:
+        return denied
+    return {"status": "success", "data": profiler.list()}
+
+
+@app.get("/profiles/{profile_id}")
+def get_profile(profile_id: str, request: Request):
+    """Collapsed stacks, dùng trực tiếp với flamegraph.pl hoặc speedscope"""
+    denied = require_admin(request)
+    if denied:
+        return denied
+    content = profiler.read(profile_id)
+    if content is None:
+        return JSONResponse(status_code=404, content={"status": "error", "data": "Profile not found"})
+    return Response(content=content, media_type="text/plain")
+
+
+@app.get("/warmup/progress")
+def warmup_progress():
+    if resources.warmer is None:
+        return {"status": "success", "data": {"running": False}}
+    return {"status": "success", "data": resources.warmer.progress()}
+
+
+@app.get("/search/cache")
+def search_cache_status():
+    return {"status": "success", "data": search_cache.status()}
+
+
+@app.get("/admission/status")
+def admission_status():
+    return {"status": "success", "data": admission.status()}
+
+
+@app.get("/metrics")
+def metrics():
+    payload, content_type = render_latest()
+    return Response(content=payload, media_type=content_type)
+
+
 @app.get("/api/hello")
 def hello():
     return {"message": "Hello from FastAPI!"}
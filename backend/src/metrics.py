@@ -0,0 +1,94 @@
+import os
+import time
+from contextlib import contextmanager
+from contextvars import ContextVar
+
+from prometheus_client import CONTENT_TYPE_LATEST, CollectorRegistry, Histogram, generate_latest, multiprocess
+
+BUCKETS = (0.001, 0.0025, 0.005, 0.01, 0.025, 0.05, 0.1, 0.25, 0.5, 1, 2.5, 5, 10, 30, 60)
+
+STAGE_SECONDS = Histogram(
+    'backend_stage_duration_seconds',
+    'Time spent in each stage of a request',
+    ['stage'],
+    buckets=BUCKETS,
+)
+
+REQUEST_SECONDS = Histogram(
+    'backend_request_duration_seconds',
+    'End-to-end request latency',
+    ['method', 'route', 'status'],
+    buckets=BUCKETS,
+)
+
+# Danh sách (stage, seconds) của request hiện tại, dùng cho header Server-Timing
+_request_stages: ContextVar = ContextVar('request_stages', default=None)
+_stage_children = {}
+
+
+def _stage_histogram(name):
+    child = _stage_children.get(name)
+    if child is None:
+        child = _stage_children[name] = STAGE_SECONDS.labels(name)
+    return child
+
+
+@contextmanager
+def stage(name: str):
+    """Đo thời gian một stage: `with stage('embed'): ...`"""
+    start = time.perf_counter()
+    try:
+        yield
+    finally:
+        elapsed = time.perf_counter() - start
+        _stage_histogram(name).observe(elapsed)
+        stages = _request_stages.get()
+        if stages is not None:
+            stages.append((name, elapsed))
+
+
+def server_timing(stages, total=None):
+    parts = [f"{name};dur={seconds * 1000:.1f}" for name, seconds in stages]
+    if total is not None:
+        parts.append(f"total;dur={total * 1000:.1f}")
+    return ", ".join(parts)
+
+
+def render_latest():
+    # gunicorn nhiều worker: gộp số liệu của mọi worker (PROMETHEUS_MULTIPROC_DIR do gunicorn.conf.py đặt)
+    if os.getenv('PROMETHEUS_MULTIPROC_DIR'):
+        registry = CollectorRegistry()
+        multiprocess.MultiProcessCollector(registry)
+        return generate_latest(registry), CONTENT_TYPE_LATEST
+    return generate_latest(), CONTENT_TYPE_LATEST
+
+
+class MetricsMiddleware:
+    """Pure ASGI middleware: request histogram + Server-Timing header"""
+
+    def __init__(self, app):
+        self.app = app
+
+    async def __call__(self, scope, receive, send):
+        if scope['type'] != 'http':
+            await self.app(scope, receive, send)
+            return
+
+        stages = []
+        token = _request_stages.set(stages)
+        start = time.perf_counter()
+        status = {'code': 500}
+
+        async def send_wrapper(message):
+            if message['type'] == 'http.response.start':
+                status['code'] = message['status']
+                header = server_timing(stages, time.perf_counter() - start)
+                message['headers'] = list(message.get('headers', [])) + [(b'server-timing', header.encode('latin-1'))]
+            await send(message)
+
+        try:
+            await self.app(scope, receive, send_wrapper)
+        finally:
+            _request_stages.reset(token)
+            route = getattr(scope.get('route'), 'path', None) or 'unmatched'
+            REQUEST_SECONDS.labels(scope['method'], route, str(status['code'])).observe(time.perf_counter() - start)
@@ -1,4 +1,4 @@
-from sqlalchemy import Column, Integer, String, ForeignKey, Text
+from sqlalchemy import Column, Integer, String, ForeignKey, Text, Float, Index
 from sqlalchemy.orm import declarative_base, relationship
 from sqlalchemy import Table
 
@@ -34,3 +34,49 @@ class Document(Base):
 
     category = relationship('Category', back_populates='documents')
     keywords = relationship('Keyword', secondary=document_keywords, back_populates='documents')
+
+class ArticleSummary(Base):
+    """Kết quả crawl + summarize của /article_content (lưu sẵn bởi warmer hoặc lần click trước)"""
+    __tablename__ = 'article_summaries'
+    id = Column(Integer, primary_key=True, index=True)
+    link = Column(String, unique=True, nullable=False, index=True)
+    title = Column(String, nullable=False)
+    authors = Column(Text, nullable=False, default='[]')
+    summary = Column(Text, nullable=False)
+    pdf_url = Column(String, nullable=False, default='')
+    fetched_at = Column(Float, nullable=False)
+
+
+class DataState(Base):
+    """Giá trị đơn lẻ dùng chung giữa các worker, vd. data_generation (tăng mỗi khi dữ liệu đổi)"""
+    __tablename__ = 'data_state'
+    key = Column(String, primary_key=True)
+    value = Column(Integer, nullable=False, default=0)
+
+class FacetCount(Base):
+    """Số document theo category / keyword, cập nhật tăng dần khi document được tạo, sửa, xóa"""
+    __tablename__ = 'facet_counts'
+    facet = Column(String, primary_key=True)  # 'category' | 'keyword'
+    value_id = Column(Integer, primary_key=True)
+    count = Column(Integer, nullable=False, default=0)
+
+    __table_args__ = (Index('ix_facet_counts_facet_count', 'facet', 'count'),)
+
+class IngestionJobRecord(Base):
+    """Trạng thái job ingestion, lưu trong DB để mọi worker đều đọc / hủy được"""
+    __tablename__ = 'ingestion_jobs'
+    id = Column(String, primary_key=True)
+    path = Column(String, nullable=False)
+    status = Column(String, nullable=False, index=True)
+    total_rows = Column(Integer)
+    rows_read = Column(Integer, nullable=False, default=0)
+    documents = Column(Integer, nullable=False, default=0)
+    vectors = Column(Integer, nullable=False, default=0)
+    failed = Column(Integer, nullable=False, default=0)
+    cancel_requested = Column(Integer, nullable=False, default=0)
+    error = Column(Text)
+    created_at = Column(Float, nullable=False)
+    started_at = Column(Float)
+    finished_at = Column(Float)
+    # heartbeat của worker đang chạy job; quá hạn thì job coi như đã chết
+    updated_at = Column(Float, nullable=False)
\ No newline at end of file
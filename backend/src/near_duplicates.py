@@ -0,0 +1,245 @@
+"""Near-duplicate detection: MinHash + LSH over title/summary shingles, optionally confirmed by embedding cosine.
+
+Catches the same paper stored under different links (PMC / DOI mirrors), which link-based
+check_duplicates misses. Run from backend/:
+    python -m src.near_duplicates [--out data/near_duplicates.json] [--cosine]
+"""
+import argparse
+import json
+import re
+import time
+import zlib
+from collections import defaultdict
+
+import numpy as np
+
+from .config import NEAR_DUPLICATE_CONFIG
+from .search_cache import normalize_query
+
+WORD_RE = re.compile(r"\w+")
+# Số nguyên tố > 2^32: hash (a * h + b) mod p với h là crc32 (32 bit), a < 2^31 -> không tràn uint64
+PRIME = np.uint64(4294967311)
+
+
+def shingles(text: str, size: int = 3):
+    """Tập hash crc32 của các cụm `size` từ liên tiếp"""
+    words = WORD_RE.findall(normalize_query(text))
+    if len(words) < size:
+        return {zlib.crc32(' '.join(words).encode())} if words else set()
+    return {zlib.crc32(' '.join(words[i:i + size]).encode()) for i in range(len(words) - size + 1)}
+
+
+class MinHasher:
+    """MinHash signature cố định theo seed: cùng văn bản -> cùng signature ở mọi process"""
+
+    def __init__(self, num_perm: int = 128, shingle_size: int = 3, seed: int = 1):
+        rng = np.random.default_rng(seed)
+        self.num_perm = num_perm
+        self.shingle_size = shingle_size
+        self.a = rng.integers(1, 1 << 31, size=num_perm, dtype=np.uint64)[:, None]
+        self.b = rng.integers(0, 1 << 31, size=num_perm, dtype=np.uint64)[:, None]
+
+    def signature(self, title: str, summary: str = ''):
+        hashes = shingles(f"{title} {summary}", self.shingle_size)
+        if not hashes:
+            return None
+        h = np.fromiter(hashes, dtype=np.uint64, count=len(hashes))[None, :]
+        return ((self.a * h + self.b) % PRIME).min(axis=1)
+
+
+def jaccard(sig_a, sig_b):
+    """Ước lượng Jaccard từ hai signature"""
+    return float(np.mean(sig_a == sig_b))
+
+
+class NearDuplicateIndex:
+    """LSH banding: chỉ so sánh các document trùng ít nhất một band -> không phải so từng cặp.
+
+    Với `bands` band x `rows` hàng, cặp có Jaccard s thành ứng viên với xác suất 1 - (1 - s^rows)^bands
+    (ngưỡng ~ (1/bands)^(1/rows)); ứng viên được giữ lại khi Jaccard ước lượng >= threshold.
+    """
+
+    def __init__(self, num_perm: int = 128, bands: int = 16, shingle_size: int = 3, threshold: float = 0.8,
+                 seed: int = 1):
+        if num_perm % bands:
+            raise ValueError("num_perm must be divisible by bands")
+        self.hasher = MinHasher(num_perm, shingle_size, seed)
+        self.bands = bands
+        self.rows = num_perm // bands
+        self.threshold = threshold
+        self.signatures = {}
+        self._buckets = [defaultdict(list) for _ in range(bands)]
+
+    @classmethod
+    def from_config(cls, config: dict = None):
+        config = config or NEAR_DUPLICATE_CONFIG
+        return cls(
+            num_perm=config.get('num_perm', 128),
+            bands=config.get('bands', 16),
+            shingle_size=config.get('shingle_size', 3),
+            threshold=config.get('threshold', 0.8),
+        )
+
+    def __len__(self):
+        return len(self.signatures)
+
+    def _band_keys(self, signature):
+        return [signature[i * self.rows:(i + 1) * self.rows].tobytes() for i in range(self.bands)]
+
+    def add(self, doc_id, title: str, summary: str = '', signature=None):
+        signature = self.hasher.signature(title, summary) if signature is None else signature
+        if signature is None:
+            return None
+        self.signatures[doc_id] = signature
+        for bucket, key in zip(self._buckets, self._band_keys(signature)):
+            bucket[key].append(doc_id)
+        return signature
+
+    def query(self, title: str, summary: str = '', signature=None, exclude=None):
+        """[(doc_id, jaccard)] của các document đã index giống văn bản này, giảm dần"""
+        signature = self.hasher.signature(title, summary) if signature is None else signature
+        if signature is None:
+            return []
+        candidates = set()
+        for bucket, key in zip(self._buckets, self._band_keys(signature)):
+            candidates.update(bucket.get(key, ()))
+        candidates.discard(exclude)
+        matches = [(doc_id, jaccard(signature, self.signatures[doc_id])) for doc_id in candidates]
+        return sorted([m for m in matches if m[1] >= self.threshold], key=lambda m: (-m[1], m[0]))
+
+    def pairs(self):
+        """Mọi cặp (a, b, jaccard) với a < b, Jaccard ước lượng >= threshold"""
+        seen = set()
+        for bucket in self._buckets:
+            for ids in bucket.values():
+                if len(ids) < 2:
+                    continue
+                for i, a in enumerate(ids):
+                    for b in ids[i + 1:]:
+                        pair = (a, b) if a < b else (b, a)
+                        if pair in seen:
+                            continue
+                        seen.add(pair)
+                        score = jaccard(self.signatures[a], self.signatures[b])
+                        if score >= self.threshold:
+                            yield pair[0], pair[1], score
+
+
+def cosine_filter(pairs, doc_ids, title_vectors, summary_vectors, threshold: float):
+    """Giữ các cặp có cosine trung bình (title, summary) >= threshold; thêm 'cosine' vào mỗi cặp"""
+    row = {int(doc_id): i for i, doc_id in enumerate(doc_ids)}
+    title_vectors = _normalize(title_vectors)
+    summary_vectors = _normalize(summary_vectors)
+    confirmed = []
+    for a, b, score in pairs:
+        if a not in row or b not in row:
+            continue
+        i, j = row[a], row[b]
+        cosine = float((title_vectors[i] @ title_vectors[j] + summary_vectors[i] @ summary_vectors[j]) / 2)
+        if cosine >= threshold:
+            confirmed.append((a, b, score, cosine))
+    return confirmed
+
+
+def _normalize(vectors):
+    vectors = np.asarray(vectors, dtype=np.float32)
+    norms = np.linalg.norm(vectors, axis=1, keepdims=True)
+    return vectors / np.maximum(norms, 1e-12)
+
+
+def clusters_from_pairs(pairs):
+    """Union-find: cặp trùng -> các cụm document (mỗi cụm sắp theo id)"""
+    parent = {}
+
+    def find(x):
+        parent.setdefault(x, x)
+        while parent[x] != x:
+            parent[x] = parent[parent[x]]
+            x = parent[x]
+        return x
+
+    for a, b, *_ in pairs:
+        ra, rb = find(a), find(b)
+        if ra != rb:
+            parent[max(ra, rb)] = min(ra, rb)
+    groups = defaultdict(list)
+    for x in parent:
+        groups[find(x)].append(x)
+    return sorted((sorted(ids) for ids in groups.values()), key=lambda ids: ids[0])
+
+
+def build_index(db, config: dict = None):
+    index = NearDuplicateIndex.from_config(config)
+    for doc_id, title, summary in db.iter_document_texts():
+        index.add(doc_id, title or '', summary or '')
+    return index
+
+
+def find_clusters(db, vectorstore=None, config: dict = None):
+    """Batch job: toàn bộ corpus -> danh sách cụm near-duplicate"""
+    config = config or NEAR_DUPLICATE_CONFIG
+    start = time.perf_counter()
+    index = build_index(db, config)
+    pairs = list(index.pairs())
+    candidate_pairs = len(pairs)
+
+    if vectorstore is not None:
+        doc_ids, title_vectors, summary_vectors = vectorstore.fetch_all_vectors()
+        pairs = cosine_filter(pairs, doc_ids, title_vectors, summary_vectors, config.get('cosine_threshold', 0.95))
+
+    clusters = clusters_from_pairs(pairs)
+    cluster_of = {doc_id: n for n, ids in enumerate(clusters) for doc_id in ids}
+    min_jaccard = [1.0] * len(clusters)
+    for a, b, jac, *_ in pairs:
+        n = cluster_of[a]
+        min_jaccard[n] = min(min_jaccard[n], jac)
+    docs = {d.id: d for d in db.get_documents_by_ids([doc_id for ids in clusters for doc_id in ids])}
+
+    result = [
+        {
+            'doc_ids': ids,
+            'min_jaccard': round(min_jaccard[n], 3),
+            'documents': [
+                {'id': doc_id, 'title': docs[doc_id].title, 'link': docs[doc_id].link}
+                for doc_id in ids if doc_id in docs
+            ],
+        }
+        for n, ids in enumerate(clusters)
+    ]
+    stats = {
+        'documents': len(index),
+        'lsh_pairs': candidate_pairs,
+        'confirmed_pairs': len(pairs),
+        'clusters': len(result),
+        'duplicate_documents': sum(len(ids) - 1 for ids in clusters),
+        'cosine_confirmed': vectorstore is not None,
+        'seconds': round(time.perf_counter() - start, 3),
+    }
+    return {'stats': stats, 'clusters': result}
+
+
+def main():
+    from .sql_db import SqlDB
+
+    parser = argparse.ArgumentParser(description=__doc__, formatter_class=argparse.RawDescriptionHelpFormatter)
+    parser.add_argument('--out', default=NEAR_DUPLICATE_CONFIG.get('clusters_path', 'data/near_duplicates.json'))
+    parser.add_argument('--cosine', action='store_true', help='confirm MinHash pairs with stored embeddings (Weaviate)')
+    args = parser.parse_args()
+
+    db = SqlDB()
+    vectorstore = None
+    if args.cosine:
+        from .vector_strore import WeaviateVectorStore
+        vectorstore = WeaviateVectorStore()
+    try:
+        report = find_clusters(db, vectorstore)
+    finally:
+        if vectorstore is not None:
+            vectorstore.close()
+    with open(args.out, 'w', encoding='utf-8') as f:
+        json.dump(report, f, indent=2, ensure_ascii=False)
+    print(f"[SUCCESS] {report['stats']} -> {args.out}")
+
+
+if __name__ == '__main__':
+    main()
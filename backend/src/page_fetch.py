@@ -0,0 +1,127 @@
+import codecs
+from html.parser import HTMLParser
+
+import requests
+from prometheus_client import Counter, Histogram
+
+from .config import ARTICLE_CONFIG
+
+HEADERS = {
+    "User-Agent": "Mozilla/5.0 (Windows NT 10.0; Win64; x64) AppleWebKit/537.36"
+}
+
+HTML_TYPES = ('text/html', 'application/xhtml+xml')
+PDF_TYPES = ('application/pdf', 'application/x-pdf')
+
+# Các tag mà extract_article_content bỏ đi, nên text trong đó không tính vào budget
+SKIPPED_TAGS = {'script', 'style', 'noscript', 'template', 'nav', 'header', 'footer', 'aside'}
+
+FETCH_BYTES = Histogram(
+    'backend_page_fetch_bytes',
+    'Bytes downloaded per article page',
+    buckets=(16e3, 64e3, 128e3, 256e3, 512e3, 1e6, 2e6, 4e6),
+)
+FETCH_STOPS = Counter('backend_page_fetch_total', 'Article page fetches by how reading stopped', ['reason'])
+
+
+class UnsupportedContent(ValueError):
+    """Response không phải HTML; content_type cho caller biết đó là gì (vd. PDF)"""
+
+    def __init__(self, content_type: str):
+        super().__init__(f"Unsupported content type: {content_type or 'unknown'}")
+        self.content_type = content_type
+
+    @property
+    def is_pdf(self):
+        return self.content_type in PDF_TYPES
+
+
+class BudgetParser(HTMLParser):
+    """Parser tăng dần chỉ để biết khi nào đã đọc đủ: hết <head> và đủ text_budget ký tự text của body"""
+
+    def __init__(self, text_budget: int):
+        super().__init__(convert_charrefs=True)
+        self.text_budget = text_budget
+        self.head_done = False
+        self.in_body = False
+        self.skip_depth = 0
+        self.text_chars = 0
+
+    @property
+    def done(self):
+        return self.head_done and self.text_chars >= self.text_budget
+
+    def handle_starttag(self, tag, attrs):
+        if tag == 'body':
+            self.head_done = self.in_body = True
+        elif tag in SKIPPED_TAGS:
+            self.skip_depth += 1
+
+    def handle_endtag(self, tag):
+        if tag == 'head':
+            self.head_done = True
+        elif tag in SKIPPED_TAGS:
+            self.skip_depth = max(0, self.skip_depth - 1)
+
+    def handle_data(self, data):
+        if self.in_body and not self.skip_depth:
+            self.text_chars += len(data.strip())
+
+
+def fetch_page(url: str, config: dict = None) -> str:
+    """Tải trang HTML theo từng chunk, dừng khi parser báo đủ hoặc hết max_bytes.
+
+    Trả về phần HTML đã đọc (có thể bị cắt giữa chừng, BeautifulSoup vẫn parse được).
+    Raise UnsupportedContent trước khi đọc body nếu content-type không phải HTML.
+    """
+    config = config or ARTICLE_CONFIG
+    timeout = config.get('timeout', 20)
+    if config.get('fetch_mode', 'stream') != 'stream':
+        resp = requests.get(url, headers=HEADERS, timeout=timeout)
+        resp.raise_for_status()
+        return resp.text
+
+    max_bytes = config.get('max_bytes', 2_000_000)
+    chunk_size = config.get('chunk_size', 16384)
+    parser = BudgetParser(config.get('body_text_budget', 8000))
+
+    with requests.get(url, headers=HEADERS, timeout=timeout, stream=True) as resp:
+        resp.raise_for_status()
+        content_type = resp.headers.get('Content-Type', '').split(';')[0].strip().lower()
+        if content_type and content_type not in HTML_TYPES:
+            FETCH_STOPS.labels('unsupported').inc()
+            raise UnsupportedContent(content_type)
+
+        decoder = codecs.getincrementaldecoder(_encoding(resp))(errors='replace')
+        parts = []
+        received = 0
+        reason = 'eof'
+        for chunk in resp.iter_content(chunk_size):
+            chunk = chunk[:max_bytes - received]
+            received += len(chunk)
+            text = decoder.decode(chunk)
+            parts.append(text)
+            parser.feed(text)
+            if parser.done:
+                reason = 'budget'
+                break
+            if received >= max_bytes:
+                reason = 'max_bytes'
+                break
+        parts.append(decoder.decode(b'', final=True))
+
+    FETCH_BYTES.observe(received)
+    FETCH_STOPS.labels(reason).inc()
+    return ''.join(parts)
+
+
+def _encoding(resp):
+    encoding = resp.encoding or 'utf-8'
+    # requests mặc định ISO-8859-1 cho text/* không khai báo charset; trang báo khoa học hầu hết là UTF-8
+    if encoding.lower() == 'iso-8859-1' and 'charset' not in resp.headers.get('Content-Type', '').lower():
+        encoding = 'utf-8'
+    try:
+        codecs.lookup(encoding)
+    except LookupError:
+        encoding = 'utf-8'
+    return encoding
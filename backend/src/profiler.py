@@ -0,0 +1,312 @@
+"""On-demand sampling profiler: collapsed stacks (flamegraph.pl / speedscope) for one request, a time window
+or an ingestion job.
+
+Admin only: set ADMIN_TOKEN and send it as X-Admin-Token.
+    curl -H "X-Admin-Token: $ADMIN_TOKEN" -H "X-Profile: 1" ...   -> X-Profile-Id response header
+    (a request profile only samples the threads running that request: event loop + its threadpool calls)
+    GET /profiles, GET /profiles/{id} (collapsed text)
+"""
+import functools
+import hmac
+import inspect
+import os
+import sys
+import threading
+import time
+import uuid
+from collections import Counter
+from contextvars import ContextVar
+
+import anyio
+from fastapi.routing import APIRoute
+from prometheus_client import Counter as PromCounter
+
+from .config import PROFILING_CONFIG
+
+PROFILES = PromCounter('backend_profiles_total', 'Sampling profiles captured by kind', ['kind'])
+
+# Frame lá của thread đang rảnh (pool worker chờ việc, event loop chờ I/O): bỏ khi include_idle = False
+IDLE_LEAVES = {
+    ('threading.py', 'wait'),
+    ('queue.py', 'get'),
+    ('selectors.py', 'select'),
+    ('thread.py', '_worker'),
+}
+
+
+TRUE_VALUES = {b'1', b'true', b'yes', b'on'}
+
+# Profile của request hiện tại (đặt bởi ProfilerMiddleware, được copy sang thread của threadpool)
+_request_session: ContextVar = ContextVar('request_profile', default=None)
+
+
+class ProfilerBusy(Exception):
+    """Đã đủ số profile chạy đồng thời"""
+
+
+def _frame_label(code):
+    return f"{code.co_name} ({os.path.basename(code.co_filename)}:{code.co_firstlineno})".replace(';', ',')
+
+
+class StackSampler:
+    """Thread đọc sys._current_frames() mỗi `interval` giây, đếm stack theo thread (wall time).
+
+    threads: chỉ lấy mẫu các thread id này (set có thể thêm / bớt khi đang chạy), None = mọi thread
+    """
+
+    def __init__(self, interval: float = 0.01, include_idle: bool = False, max_seconds: float = 60.0, threads=None):
+        self.interval = interval
+        self.include_idle = include_idle
+        self.max_seconds = max_seconds
+        self.threads = threads
+        self.counts = Counter()
+        self.samples = 0
+        self.started_at = None
+        self.seconds = 0.0
+        self._stop = threading.Event()
+        self._thread = None
+        self._labels = {}
+
+    def start(self):
+        self.started_at = time.time()
+        self._thread = threading.Thread(target=self._loop, name='stack-sampler', daemon=True)
+        self._thread.start()
+        return self
+
+    def stop(self):
+        self._stop.set()
+        if self._thread is not None:
+            self._thread.join()
+        return self
+
+    def _loop(self):
+        start = time.perf_counter()
+        own = threading.get_ident()
+        while not self._stop.wait(self.interval):
+            names = {t.ident: t.name for t in threading.enumerate()}
+            threads = self.threads
+            for ident, frame in sys._current_frames().items():
+                if ident != own and (threads is None or ident in threads):
+                    self._record(names.get(ident, str(ident)), frame)
+            self.samples += 1
+            if time.perf_counter() - start > self.max_seconds:
+                break
+        self.seconds = time.perf_counter() - start
+
+    def _record(self, thread_name, frame):
+        code = frame.f_code
+        if not self.include_idle and (os.path.basename(code.co_filename), code.co_name) in IDLE_LEAVES:
+            return
+        stack = []
+        while frame is not None:
+            code = frame.f_code
+            label = self._labels.get(code)
+            if label is None:
+                label = self._labels[code] = _frame_label(code)
+            stack.append(label)
+            frame = frame.f_back
+        stack.append(thread_name.replace(';', ','))
+        self.counts[';'.join(reversed(stack))] += 1
+
+    def collapsed(self):
+        """Định dạng collapsed: 'thread;outer;...;leaf count' mỗi dòng"""
+        return ''.join(f"{stack} {count}\n" for stack, count in self.counts.most_common())
+
+
+class Profiler:
+    """Quản lý các lần profile: giới hạn số profile đồng thời, lưu file .collapsed, chỉ giữ `retention` file mới nhất"""
+
+    def __init__(self, config: dict = None):
+        config = config or PROFILING_CONFIG
+        self.enabled = bool(config.get('enabled', True))
+        self.interval = config.get('interval_ms', 10) / 1000
+        self.include_idle = bool(config.get('include_idle', False))
+        self.max_seconds = config.get('max_seconds', 60)
+        self.max_active = config.get('max_active', 1)
+        self.retention = config.get('retention', 20)
+        self.directory = config.get('dir', 'data/profiles')
+        self.token_env = config.get('admin_token_env', 'ADMIN_TOKEN')
+        self._active = 0
+        self._lock = threading.Lock()
+
+    # ---------- Access ----------
+    @property
+    def admin_token(self):
+        return os.getenv(self.token_env)
+
+    def is_admin(self, token):
+        """Không đặt ADMIN_TOKEN -> tắt hoàn toàn"""
+        expected = self.admin_token
+        if not self.enabled or not expected or not token:
+            return False
+        return hmac.compare_digest(str(token).encode('utf-8'), expected.encode('utf-8'))
+
+    # ---------- Capture ----------
+    def start(self, kind: str, label: str = '', threads=None):
+        with self._lock:
+            if self._active >= self.max_active:
+                raise ProfilerBusy(f"{self._active} profile(s) already running")
+            self._active += 1
+        sampler = StackSampler(self.interval, self.include_idle, self.max_seconds, threads).start()
+        return ProfileSession(self, sampler, kind, label)
+
+    def _finish(self, session):
+        with self._lock:
+            self._active -= 1
+        PROFILES.labels(session.kind).inc()
+        return self.save(session)
+
+    def window(self, seconds: float, label: str = ''):
+        """Profile toàn process trong `seconds` giây, chạy nền; trả về id"""
+        seconds = min(float(seconds), self.max_seconds)
+        session = self.start('window', label)
+        timer = threading.Timer(seconds, session.finish)
+        timer.daemon = True
+        timer.start()
+        return session.id
+
+    # ---------- Storage ----------
+    def save(self, session):
+        os.makedirs(self.directory, exist_ok=True)
+        sampler = session.sampler
+        header = (
+            f"# kind={session.kind} label={session.label} started_at={sampler.started_at:.3f} "
+            f"seconds={sampler.seconds:.3f} samples={sampler.samples} interval_ms={self.interval * 1000:g}\n"
+        )
+        path = os.path.join(self.directory, f"{session.id}.collapsed")
+        with open(path, 'w', encoding='utf-8') as f:
+            f.write(header)
+            f.write(sampler.collapsed())
+        self._prune()
+        print(f"[INFO] Profile {session.id} ({session.kind} {session.label}) saved: "
+              f"{sampler.samples} samples in {sampler.seconds:.1f}s")
+        return path
+
+    def _files(self):
+        if not os.path.isdir(self.directory):
+            return []
+        paths = [os.path.join(self.directory, f) for f in os.listdir(self.directory) if f.endswith('.collapsed')]
+        return sorted(paths, key=os.path.getmtime, reverse=True)
+
+    def _prune(self):
+        for path in self._files()[self.retention:]:
+            try:
+                os.remove(path)
+            except OSError:
+                pass
+
+    def list(self):
+        profiles = []
+        for path in self._files():
+            with open(path, 'r', encoding='utf-8') as f:
+                header = f.readline()
+            info = dict(part.split('=', 1) for part in header[1:].split() if '=' in part)
+            profiles.append({'id': os.path.basename(path)[:-len('.collapsed')], **info})
+        return profiles
+
+    def read(self, profile_id: str):
+        """Nội dung collapsed (bỏ dòng header), None nếu không có"""
+        if not profile_id.isalnum():
+            return None
+        path = os.path.join(self.directory, f"{profile_id}.collapsed")
+        if not os.path.exists(path):
+            return None
+        with open(path, 'r', encoding='utf-8') as f:
+            f.readline()
+            return f.read()
+
+
+class ProfileSession:
+    def __init__(self, profiler, sampler, kind, label):
+        self.id = uuid.uuid4().hex
+        self.profiler = profiler
+        self.sampler = sampler
+        self.kind = kind
+        self.label = label.replace(' ', '_')
+        self._done = False
+
+    def finish(self):
+        if self._done:
+            return None
+        self._done = True
+        self.sampler.stop()
+        return self.profiler._finish(self)
+
+    def __enter__(self):
+        return self
+
+    def __exit__(self, *exc):
+        self.finish()
+        return False
+
+
+class ProfilerMiddleware:
+    """Pure ASGI middleware: X-Profile + X-Admin-Token hợp lệ -> profile đúng request này, trả X-Profile-Id"""
+
+    def __init__(self, app, profiler: Profiler):
+        self.app = app
+        self.profiler = profiler
+
+    async def __call__(self, scope, receive, send):
+        if scope['type'] != 'http':
+            await self.app(scope, receive, send)
+            return
+        headers = dict(scope['headers'])
+        if (
+            headers.get(b'x-profile', b'').strip().lower() not in TRUE_VALUES
+            or not self.profiler.is_admin(headers.get(b'x-admin-token', b'').decode('latin-1'))
+        ):
+            await self.app(scope, receive, send)
+            return
+        try:
+            # Event loop thread; thread của threadpool tự thêm vào qua track_thread
+            session = self.profiler.start(
+                'request', f"{scope['method']}_{scope['path']}", threads={threading.get_ident()}
+            )
+        except ProfilerBusy:
+            await self.app(scope, receive, send)
+            return
+
+        async def send_with_id(message):
+            if message['type'] == 'http.response.start':
+                message['headers'] = list(message.get('headers', [])) + [(b'x-profile-id', session.id.encode('latin-1'))]
+            await send(message)
+
+        token = _request_session.set(session)
+        try:
+            await self.app(scope, receive, send_with_id)
+        finally:
+            _request_session.reset(token)
+            # Dừng sampler (join) + ghi file: không chặn event loop
+            await anyio.to_thread.run_sync(session.finish)
+
+
+def track_thread(fn):
+    """Bọc hàm chạy trong threadpool: khi request đang được profile, thread này được lấy mẫu trong lúc hàm chạy"""
+
+    @functools.wraps(fn)
+    def wrapper(*args, **kwargs):
+        session = _request_session.get()
+        threads = session.sampler.threads if session is not None else None
+        if threads is None:
+            return fn(*args, **kwargs)
+        ident = threading.get_ident()
+        threads.add(ident)
+        try:
+            return fn(*args, **kwargs)
+        finally:
+            threads.discard(ident)
+
+    return wrapper
+
+
+class ProfiledRoute(APIRoute):
+    """route_class: endpoint `def` (chạy trong threadpool) được bọc bằng track_thread"""
+
+    def __init__(self, path, endpoint, **kwargs):
+        if not inspect.iscoroutinefunction(endpoint):
+            endpoint = track_thread(endpoint)
+        super().__init__(path, endpoint, **kwargs)
+
+
+profiler = Profiler()
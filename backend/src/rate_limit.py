@@ -0,0 +1,87 @@
+import threading
+import time
+
+
+class TokenBucket:
+    """Token bucket thread-safe: `rate` token/giây, tối đa `capacity` token"""
+
+    def __init__(self, rate: float, capacity: float):
+        self.rate = float(rate)
+        self.capacity = float(capacity)
+        self.tokens = float(capacity)
+        self.updated = time.monotonic()
+        self._lock = threading.Lock()
+
+    def _refill(self, now):
+        self.tokens = min(self.capacity, self.tokens + (now - self.updated) * self.rate)
+        self.updated = now
+
+    def try_acquire(self, tokens: float = 1.0, reserve: float = 0.0):
+        """Lấy token ngay nếu có (và còn lại ít nhất `reserve`); trả về số giây cần chờ (0 nếu thành công)"""
+        with self._lock:
+            self._refill(time.monotonic())
+            if self.tokens - tokens >= reserve:
+                self.tokens -= tokens
+                return 0.0
+            if self.rate <= 0:
+                return float('inf')
+            return (tokens + reserve - self.tokens) / self.rate
+
+    def acquire(self, tokens: float = 1.0, timeout: float = 0.0):
+        """Chờ tối đa `timeout` giây để lấy token"""
+        deadline = time.monotonic() + timeout
+        while True:
+            wait = self.try_acquire(tokens)
+            if wait == 0:
+                return True
+            if time.monotonic() + wait > deadline:
+                return False
+            time.sleep(wait)
+
+
+class CircuitBreaker:
+    """closed -> open sau `failure_threshold` lỗi liên tiếp; sau `reset_timeout` cho 1 request thử (half-open)"""
+
+    CLOSED = 'closed'
+    OPEN = 'open'
+    HALF_OPEN = 'half_open'
+
+    def __init__(self, failure_threshold: int = 5, reset_timeout: float = 30.0):
+        self.failure_threshold = failure_threshold
+        self.reset_timeout = reset_timeout
+        self.state = self.CLOSED
+        self.failures = 0
+        self.opened_at = 0.0
+        self._trial_in_flight = False
+        self._lock = threading.Lock()
+
+    def allow(self):
+        with self._lock:
+            if self.state == self.CLOSED:
+                return True
+            if self.state == self.OPEN and time.monotonic() - self.opened_at >= self.reset_timeout:
+                self.state = self.HALF_OPEN
+                self._trial_in_flight = False
+            if self.state == self.HALF_OPEN and not self._trial_in_flight:
+                self._trial_in_flight = True
+                return True
+            return False
+
+    def record_success(self):
+        with self._lock:
+            self.state = self.CLOSED
+            self.failures = 0
+            self._trial_in_flight = False
+
+    def release(self):
+        """Request được phép nhưng không gọi upstream (hoặc lỗi phía client): trả lại lượt thử half-open"""
+        with self._lock:
+            self._trial_in_flight = False
+
+    def record_failure(self):
+        with self._lock:
+            self.failures += 1
+            if self.state == self.HALF_OPEN or self.failures >= self.failure_threshold:
+                self.state = self.OPEN
+                self.opened_at = time.monotonic()
+            self._trial_in_flight = False
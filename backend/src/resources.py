@@ -0,0 +1,301 @@
+import threading
+import time
+from functools import partial
+
+from .config import INGESTION_CONFIG, SEARCH_CONFIG, WARMUP_CONFIG
+from .embedder import Embedder
+from .ingest_jobs import IngestionJobs, JobConflict
+from .sql_db import SqlDB
+from .vector_index import PartitionedVectorIndex
+from .vector_strore import WeaviateVectorStore
+
+
+class Resources:
+    """Tài nguyên dùng chung của API, khởi tạo nền trong lifespan thay vì lúc import"""
+
+    def __init__(self, reconnect_interval: float = 5.0, max_backoff: float = 60.0):
+        self.reconnect_interval = reconnect_interval
+        self.max_backoff = max_backoff
+
+        self.db = None
+        self.embedder = None
+        self.vectorstore = None
+        self.vector_index = None
+        self.suggest_index = None
+        # Data generation mà vector_index / suggest_index được build từ đó
+        self.index_generation = None
+        self._pending_generation = None
+        self.warmer = None
+        self.jobs = IngestionJobs(
+            self,
+            heartbeat=INGESTION_CONFIG.get('job_heartbeat', 1.0),
+            stale_after=INGESTION_CONFIG.get('job_stale_after', 30.0),
+        )
+
+        self.errors = {}
+        self.run_startup_ingestion = bool(INGESTION_CONFIG.get('run'))
+        # Chỉ một worker (primary) chạy các tác vụ nền ghi dữ liệu: ingestion, warmer
+        self.primary = True
+        self._stop = threading.Event()
+        self._threads = []
+
+    # ---------- Lifecycle ----------
+    def preload(self):
+        """Load read-only state in the gunicorn master so forked workers share it copy-on-write.
+
+        No warm-up encode here: torch's thread pool must be created after fork, inside each worker.
+        The Weaviate client is only used to build the index and is closed before forking.
+        """
+        start = time.perf_counter()
+        if self.db is None:
+            self.db = SqlDB()
+        if self.embedder is None:
+            try:
+                self.embedder = Embedder()
+            except Exception as e:
+                print(f"[WARNING] Model preload failed, workers will load it themselves: {e}")
+
+        if SEARCH_CONFIG.get('mode') == 'partitioned' and self.vector_index is None:
+            # Đọc trước khi build: dữ liệu đổi trong lúc build sẽ được worker build lại
+            self.index_generation = self._data_generation()
+            try:
+                self.vectorstore = WeaviateVectorStore()
+                self.build_vector_index()
+            except Exception as e:
+                print(f"[WARNING] Preload of partitioned index skipped, workers will build it: {e}")
+            finally:
+                if self.vectorstore is not None:
+                    self.vectorstore.close()
+                self.vectorstore = None
+        print(f"[INFO] Preloaded shared resources in {time.perf_counter() - start:.1f}s")
+
+    def after_fork(self, primary: bool = True):
+        """Reset per-process state inherited from the master; only the primary worker ingests"""
+        if self.db is not None:
+            # Không dùng lại connection SQLite của master
+            self.db.engine.dispose(close=False)
+        self.errors = {}
+        self._threads = []
+        self.primary = primary
+        self.run_startup_ingestion = self.run_startup_ingestion and primary
+
+    def start(self):
+        self._stop.clear()
+        if self.db is None:
+            self.db = SqlDB()
+        self._spawn(self._load_embedder, 'embedder-loader')
+        if self.index_generation is None:
+            self.index_generation = self._data_generation()
+        self._spawn(self._vectorstore_loop, 'vectorstore-connector')
+        self._spawn(self.build_suggest_index, 'suggest-index')
+        if self.run_startup_ingestion:
+            self._spawn(self._startup_ingestion, 'startup-ingestion')
+        if WARMUP_CONFIG.get('enabled') and self.primary:
+            self.start_warmer()
+
+    def close(self):
+        self._stop.set()
+        if self.warmer is not None:
+            self.warmer.stop()
+        for thread in self._threads:
+            thread.join(timeout=5)
+        self._threads = []
+        if self.vectorstore is not None:
+            self.vectorstore.close()
+
+    def _spawn(self, target, name):
+        thread = threading.Thread(target=target, name=name, daemon=True)
+        thread.start()
+        self._threads.append(thread)
+
+    # ---------- Components ----------
+    def _load_embedder(self):
+        if self.embedder is None:
+            try:
+                start = time.perf_counter()
+                self.embedder = Embedder()
+                print(f"[INFO] Embedding model loaded in {time.perf_counter() - start:.1f}s")
+            except Exception as e:
+                self.errors['embedder'] = str(e)
+                print(f"[ERROR] Failed to load embedding model: {e}")
+                return
+        self.warm_up()
+
+    def warm_up(self):
+        """Encode một lần để request đầu tiên không phải trả chi phí cold-start"""
+        try:
+            start = time.perf_counter()
+            self.embedder.embed("warm up")
+            self.embedder.embed_batch(["warm up title", "warm up summary"])
+            self.errors.pop('embedder', None)
+            print(f"[INFO] Embedder warm-up done in {(time.perf_counter() - start) * 1000:.0f}ms")
+        except Exception as e:
+            self.errors['embedder'] = str(e)
+            print(f"[ERROR] Embedder warm-up failed: {e}")
+
+    def _vectorstore_loop(self):
+        """Kết nối Weaviate, sau đó theo dõi và kết nối lại khi mất kết nối.
+
+        Mỗi vòng cũng poll data generation: index trong bộ nhớ được build lại ở mọi worker, không chỉ
+        worker chạy ingestion; build lỗi được thử lại với backoff.
+        """
+        backoff = self.reconnect_interval
+        index_backoff = self.reconnect_interval
+        while not self._stop.is_set():
+            if self.vectorstore is not None and self.vectorstore.is_ready():
+                backoff = self.reconnect_interval
+                if not self.refresh_indexes():
+                    print(f"[WARNING] Partitioned index build failed, retrying in {index_backoff:.0f}s")
+                    self._stop.wait(index_backoff)
+                    index_backoff = min(index_backoff * 2, self.max_backoff)
+                    continue
+                index_backoff = self.reconnect_interval
+                self._stop.wait(self.reconnect_interval)
+                continue
+
+            try:
+                store = WeaviateVectorStore(max_retries=1)
+            except Exception as e:
+                self.errors['vectorstore'] = str(e)[:200]
+                print(f"[WARNING] Weaviate not available, retrying in {backoff:.0f}s")
+                self._stop.wait(backoff)
+                backoff = min(backoff * 2, self.max_backoff)
+                continue
+
+            old, self.vectorstore = self.vectorstore, store
+            self.errors.pop('vectorstore', None)
+            if old is not None:
+                old.close()
+
+    def _data_generation(self):
+        try:
+            return self.db.get_data_generation()
+        except Exception as e:
+            print(f"[WARNING] Failed to read data generation: {e}")
+            return None
+
+    def refresh_indexes(self):
+        """Build lại vector_index + suggest_index khi data generation đổi; False nếu build vector_index lỗi.
+
+        Ingestion tăng generation theo từng batch: chỉ build khi generation đứng yên qua một lần poll.
+        """
+        generation = self._data_generation()
+        if self.index_generation is None:
+            self.index_generation = generation
+        if generation is None or generation == self.index_generation:
+            self._pending_generation = None
+            return self.build_vector_index() if self.needs_vector_index() else True
+        if generation != self._pending_generation:
+            self._pending_generation = generation
+            return True
+
+        print(f"[INFO] Data generation {self.index_generation} -> {generation}, rebuilding in-memory indexes")
+        if not self.build_vector_index():
+            return False
+        self.build_suggest_index()
+        self.index_generation = generation
+        self._pending_generation = None
+        return True
+
+    def needs_vector_index(self):
+        """Chưa có index, hoặc lần build gần nhất lỗi (vd. sau ingestion: index cũ vẫn phục vụ nhưng đã lỗi thời)"""
+        return SEARCH_CONFIG.get('mode') == 'partitioned' and (self.vector_index is None or 'vector_index' in self.errors)
+
+    def build_vector_index(self):
+        """True nếu build xong (hoặc không dùng partitioned mode)"""
+        if SEARCH_CONFIG.get('mode') != 'partitioned':
+            return True
+        try:
+            index = PartitionedVectorIndex.from_store(
+                self.vectorstore,
+                self.db,
+                partition_by=SEARCH_CONFIG.get('partition_by', 'category'),
+                n_clusters=SEARCH_CONFIG.get('n_clusters', 16),
+                nprobe=SEARCH_CONFIG.get('nprobe', 2),
+                reduce_dims=SEARCH_CONFIG.get('reduce_dims', 0),
+                reduction=SEARCH_CONFIG.get('reduction', 'pca'),
+                rerank=SEARCH_CONFIG.get('rerank_candidates', 100),
+            )
+            self.vector_index = index
+            self.errors.pop('vector_index', None)
+            print(f"[INFO] Partitioned index ready: {len(index)} docs, {index.n_partitions} partitions")
+            return True
+        except Exception as e:
+            self.errors['vector_index'] = str(e)
+            print(f"[ERROR] Failed to build partitioned index: {e}")
+            return False
+
+    def build_suggest_index(self):
+        from .suggest import SuggestIndex
+
+        try:
+            self.suggest_index = SuggestIndex.from_db(self.db)
+            self.errors.pop('suggest_index', None)
+        except Exception as e:
+            self.errors['suggest_index'] = str(e)
+            print(f"[ERROR] Failed to build suggest index: {e}")
+
+    def start_warmer(self):
+        from .article import crawl_article
+        from .llm_client import llm_client
+        from .warmer import ArticleWarmer
+
+        if not llm_client.api_key:
+            # Không có key thì chỉ có summary fallback, không được lưu: warmer chỉ crawl vô ích
+            print(f"[WARNING] Warmer disabled: {llm_client.api_key_env} not configured")
+            return
+        self.warmer = ArticleWarmer(
+            self.db,
+            partial(crawl_article, background=True),
+            concurrency=WARMUP_CONFIG.get('concurrency', 2),
+            host_delay=WARMUP_CONFIG.get('host_delay', 5),
+            retry_delay=WARMUP_CONFIG.get('retry_delay', 60),
+            max_attempts=WARMUP_CONFIG.get('max_attempts', 3),
+        )
+        self.warmer.start()
+
+    def _startup_ingestion(self):
+        while not self._stop.is_set() and not (self.embedder and self.vectorstore):
+            if 'embedder' in self.errors and self.embedder is None:
+                return
+            self._stop.wait(1)
+        if self._stop.is_set():
+            return
+
+        # Chạy như một job thường: tiến độ xem được qua GET /ingest/{job_id}
+        try:
+            job = self.jobs.submit(None, allow_existing=False)
+            print(f"[INFO] Startup ingestion running as job {job['id']}")
+        except JobConflict as e:
+            print(f"[INFO] Startup ingestion skipped: {e}")
+        except Exception as e:
+            print(f"[ERROR] Startup ingestion failed: {e}")
+
+    def after_ingestion(self):
+        """Dữ liệu mới: warmer nhận các document chưa có summary.
+
+        Index trong bộ nhớ được _vectorstore_loop của từng worker build lại khi thấy generation đổi.
+        """
+        if self.warmer is not None:
+            self.warmer.refresh()
+
+    # ---------- Probes ----------
+    def is_ready(self):
+        if self.embedder is None or 'embedder' in self.errors:
+            return False
+        if self.vectorstore is None or 'vectorstore' in self.errors:
+            return False
+        if SEARCH_CONFIG.get('mode') == 'partitioned' and self.vector_index is None:
+            return False
+        return True
+
+    def status(self):
+        return {
+            'ready': self.is_ready(),
+            'embedder': self.embedder is not None,
+            'vectorstore': self.vectorstore is not None and 'vectorstore' not in self.errors,
+            'vector_index': self.vector_index is not None,
+            'suggest_index': self.suggest_index is not None,
+            'ingesting': self.jobs.active,
+            'errors': dict(self.errors),
+        }
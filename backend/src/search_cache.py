@@ -0,0 +1,93 @@
+import re
+import threading
+import time
+import unicodedata
+from collections import OrderedDict
+
+from prometheus_client import Counter
+
+from .config import SEARCH_CONFIG
+
+SEARCH_CACHE = Counter('backend_search_cache_total', 'Search result cache lookups by outcome', ['outcome'])
+
+
+def normalize_query(query: str) -> str:
+    # Model uncased: chữ hoa/thường và khoảng trắng thừa không đổi kết quả
+    return re.sub(r"\s+", " ", unicodedata.normalize('NFKC', query)).strip().lower()
+
+
+class SearchCache:
+    """LRU + TTL cache: (query đã chuẩn hóa, limit, ...) -> danh sách doc_id theo thứ tự.
+
+    Mỗi entry nhớ data generation lúc tạo; generation đổi (ingestion, xóa) thì entry cũ không dùng nữa.
+    """
+
+    def __init__(self, max_entries: int = 10000, ttl: float = 600.0):
+        self.max_entries = max_entries
+        self.ttl = ttl
+        self._entries = OrderedDict()
+        self._lock = threading.Lock()
+        self.counts = {'hit': 0, 'miss': 0, 'expired': 0, 'stale': 0, 'bypass': 0}
+
+    @classmethod
+    def from_config(cls, config: dict = None):
+        config = config or SEARCH_CONFIG
+        return cls(config.get('cache_max_entries', 10000), config.get('cache_ttl', 600))
+
+    @property
+    def enabled(self):
+        return self.max_entries > 0
+
+    def key(self, query: str, limit: int, *extra):
+        return (normalize_query(query), limit, *extra)
+
+    def get(self, key, generation: int):
+        with self._lock:
+            entry = self._entries.get(key)
+            if entry is None:
+                outcome = 'miss'
+            elif entry[0] != generation:
+                outcome = 'stale'
+                del self._entries[key]
+            elif time.monotonic() - entry[1] > self.ttl:
+                outcome = 'expired'
+                del self._entries[key]
+            else:
+                outcome = 'hit'
+                self._entries.move_to_end(key)
+            self._record(outcome)
+        return entry[2] if outcome == 'hit' else None
+
+    def put(self, key, generation: int, doc_ids):
+        if not self.enabled:
+            return
+        with self._lock:
+            self._entries[key] = (generation, time.monotonic(), tuple(doc_ids))
+            self._entries.move_to_end(key)
+            while len(self._entries) > self.max_entries:
+                self._entries.popitem(last=False)
+
+    def bypass(self):
+        with self._lock:
+            self._record('bypass')
+
+    def clear(self):
+        with self._lock:
+            self._entries.clear()
+
+    def _record(self, outcome):
+        self.counts[outcome] += 1
+        SEARCH_CACHE.labels(outcome).inc()
+
+    def status(self):
+        with self._lock:
+            counts = dict(self.counts)
+            size = len(self._entries)
+        lookups = counts['hit'] + counts['miss'] + counts['expired'] + counts['stale']
+        return {
+            'entries': size,
+            'max_entries': self.max_entries,
+            'ttl': self.ttl,
+            **counts,
+            'hit_rate': round(counts['hit'] / lookups, 4) if lookups else None,
+        }
@@ -0,0 +1,249 @@
+"""Snapshot export / import: SQL tables as Parquet + title/summary vectors as .npy + manifest.json.
+
+Run from backend/:
+    python -m src.snapshot export data/snapshot
+    python -m src.snapshot import data/snapshot [--replace]
+Import does not load the embedding model; it refuses snapshots built with a different model.
+"""
+import argparse
+import hashlib
+import json
+import os
+import time
+
+import numpy as np
+from sqlalchemy import Float, Integer, func, select, text
+
+from .config import HUGGING_FACE_MODEL_NAME
+from .models import Base, DataState, FacetCount, IngestionJobRecord
+
+FORMAT_VERSION = 1
+MANIFEST = 'manifest.json'
+VECTOR_FILES = {'doc_ids': 'doc_ids.npy', 'title': 'title_vectors.npy', 'summary': 'summary_vectors.npy'}
+# data_state không đi theo snapshot: generation của DB đích chỉ tăng lên khi import
+# facet_counts là dữ liệu suy ra, được tính lại sau khi import; ingestion_jobs là lịch sử của môi trường nguồn
+SKIPPED_TABLES = {DataState.__tablename__, FacetCount.__tablename__, IngestionJobRecord.__tablename__}
+
+
+class SnapshotError(Exception):
+    """Snapshot không hợp lệ hoặc không dùng được cho môi trường này"""
+
+
+def snapshot_tables():
+    return [t for t in Base.metadata.sorted_tables if t.name not in SKIPPED_TABLES]
+
+
+def _arrow_schema(table):
+    import pyarrow as pa
+
+    fields = []
+    for column in table.columns:
+        if isinstance(column.type, Integer):
+            arrow_type = pa.int64()
+        elif isinstance(column.type, Float):
+            arrow_type = pa.float64()
+        else:
+            arrow_type = pa.string()
+        fields.append(pa.field(column.name, arrow_type))
+    return pa.schema(fields)
+
+
+def _sha256(path, chunk_size=1 << 20):
+    digest = hashlib.sha256()
+    with open(path, 'rb') as f:
+        for chunk in iter(lambda: f.read(chunk_size), b''):
+            digest.update(chunk)
+    return digest.hexdigest()
+
+
+# ---------- Export ----------
+def export_snapshot(db, vectorstore, out_dir, model_name=HUGGING_FACE_MODEL_NAME, batch_size=50_000):
+    import pyarrow as pa
+    import pyarrow.parquet as pq
+
+    os.makedirs(out_dir, exist_ok=True)
+    start = time.perf_counter()
+    counts = {}
+
+    with db.engine.connect() as conn:
+        for table in snapshot_tables():
+            schema = _arrow_schema(table)
+            path = os.path.join(out_dir, f'{table.name}.parquet')
+            rows = 0
+            with pq.ParquetWriter(path, schema) as writer:
+                result = conn.execution_options(stream_results=True).execute(select(table))
+                while True:
+                    batch = result.fetchmany(batch_size)
+                    if not batch:
+                        break
+                    columns = list(zip(*batch))
+                    writer.write_table(pa.Table.from_arrays(
+                        [pa.array(col, type=field.type) for col, field in zip(columns, schema)], schema=schema
+                    ))
+                    rows += len(batch)
+            counts[table.name] = rows
+
+    doc_ids, title_vectors, summary_vectors = vectorstore.fetch_all_vectors()
+    title_vectors = np.asarray(title_vectors, dtype=np.float32)
+    summary_vectors = np.asarray(summary_vectors, dtype=np.float32)
+    np.save(os.path.join(out_dir, VECTOR_FILES['doc_ids']), np.asarray(doc_ids, dtype=np.int64))
+    np.save(os.path.join(out_dir, VECTOR_FILES['title']), title_vectors)
+    np.save(os.path.join(out_dir, VECTOR_FILES['summary']), summary_vectors)
+    counts['vectors'] = len(doc_ids)
+
+    files = [f'{t.name}.parquet' for t in snapshot_tables()] + list(VECTOR_FILES.values())
+    manifest = {
+        'format_version': FORMAT_VERSION,
+        'created_at': time.strftime('%Y-%m-%dT%H:%M:%S'),
+        'model_name': model_name,
+        'dim': int(title_vectors.shape[1]) if title_vectors.ndim == 2 else 0,
+        'counts': counts,
+        'files': {
+            name: {'sha256': _sha256(os.path.join(out_dir, name)), 'bytes': os.path.getsize(os.path.join(out_dir, name))}
+            for name in files
+        },
+    }
+    with open(os.path.join(out_dir, MANIFEST), 'w', encoding='utf-8') as f:
+        json.dump(manifest, f, indent=2)
+
+    print(f"[SUCCESS] Snapshot written to {out_dir} in {time.perf_counter() - start:.1f}s: {counts}")
+    return manifest
+
+
+# ---------- Import ----------
+def read_manifest(in_dir, model_name=HUGGING_FACE_MODEL_NAME, verify=True):
+    path = os.path.join(in_dir, MANIFEST)
+    if not os.path.exists(path):
+        raise SnapshotError(f"No {MANIFEST} in {in_dir}")
+    with open(path, 'r', encoding='utf-8') as f:
+        manifest = json.load(f)
+
+    if manifest.get('format_version') != FORMAT_VERSION:
+        raise SnapshotError(f"Unsupported snapshot format {manifest.get('format_version')}")
+    if manifest.get('model_name') != model_name:
+        raise SnapshotError(
+            f"Snapshot vectors were built with '{manifest.get('model_name')}', configured model is '{model_name}'"
+        )
+    if verify:
+        for name, info in manifest['files'].items():
+            file_path = os.path.join(in_dir, name)
+            if not os.path.exists(file_path):
+                raise SnapshotError(f"Missing snapshot file {name}")
+            if _sha256(file_path) != info['sha256']:
+                raise SnapshotError(f"Checksum mismatch for {name}")
+    return manifest
+
+
+def import_snapshot(db, vectorstore, in_dir, model_name=HUGGING_FACE_MODEL_NAME, replace=False,
+                    batch_size=10_000, vector_batch_size=500, verify=True):
+    import pyarrow.parquet as pq
+
+    manifest = read_manifest(in_dir, model_name, verify=verify)
+    start = time.perf_counter()
+    tables = snapshot_tables()
+
+    # Vector của môi trường cũ trộn với doc id của snapshot sẽ trả về sai document
+    vector_count = vectorstore.get_object_count()
+    if vector_count and not replace:
+        raise SnapshotError(f"Vector store already has {vector_count} objects (use --replace to overwrite)")
+
+    with db.engine.begin() as conn:
+        existing = conn.execute(select(func.count()).select_from(Base.metadata.tables['documents'])).scalar()
+        if existing and not replace:
+            raise SnapshotError(f"Database already has {existing} documents (use --replace to overwrite)")
+        if replace:
+            for table in reversed(tables):
+                conn.execute(table.delete())
+            conn.execute(FacetCount.__table__.delete())
+
+        for table in tables:
+            parquet = pq.ParquetFile(os.path.join(in_dir, f'{table.name}.parquet'))
+            for batch in parquet.iter_batches(batch_size=batch_size):
+                rows = batch.to_pylist()
+                if rows:
+                    conn.execute(table.insert(), rows)
+        if conn.dialect.name == 'postgresql':
+            _reset_sequences(conn, tables)
+
+        # SQL đổi -> tăng generation (ETag của /categories, /facets cũ hết hiệu lực)
+        updated = conn.execute(
+            DataState.__table__.update()
+            .where(DataState.key == 'data_generation')
+            .values(value=DataState.value + 1)
+        ).rowcount
+        if not updated:
+            conn.execute(DataState.__table__.insert(), [{'key': 'data_generation', 'value': 1}])
+    sql_seconds = time.perf_counter() - start
+
+    failed = {}
+    try:
+        db.rebuild_facets()
+        if replace:
+            vectorstore.clear_all()
+        doc_ids = np.load(os.path.join(in_dir, VECTOR_FILES['doc_ids']))
+        title_vectors = np.load(os.path.join(in_dir, VECTOR_FILES['title']), mmap_mode='r')
+        summary_vectors = np.load(os.path.join(in_dir, VECTOR_FILES['summary']), mmap_mode='r')
+        for i in range(0, len(doc_ids), vector_batch_size):
+            ids = doc_ids[i:i + vector_batch_size].tolist()
+            errors = vectorstore.add_documents(
+                ids,
+                np.asarray(title_vectors[i:i + vector_batch_size]).tolist(),
+                np.asarray(summary_vectors[i:i + vector_batch_size]).tolist(),
+            )
+            failed.update(errors or {})
+    finally:
+        # Tăng lần nữa sau khi vector đã nạp (kể cả khi nạp dở): kết quả search tính trong lúc nạp
+        # được cache theo generation trên, không theo generation cuối
+        db.bump_data_generation()
+
+    stats = {
+        **manifest['counts'],
+        'vectors_failed': len(failed),
+        'sql_seconds': round(sql_seconds, 3),
+        'seconds': round(time.perf_counter() - start, 3),
+    }
+    if failed:
+        print(f"[WARNING] {len(failed)} vectors failed to load, e.g. {next(iter(failed.items()))}")
+    print(f"[SUCCESS] Snapshot {in_dir} restored: {stats}")
+    return stats
+
+
+def _reset_sequences(conn, tables):
+    # Insert kèm id không làm tăng sequence của Postgres
+    for table in tables:
+        if 'id' in table.columns and isinstance(table.columns['id'].type, Integer):
+            conn.execute(text(
+                f"SELECT setval(pg_get_serial_sequence('{table.name}', 'id'), "
+                f"COALESCE((SELECT MAX(id) FROM {table.name}), 0) + 1, false)"
+            ))
+
+
+def main():
+    from .sql_db import SqlDB
+    from .vector_strore import WeaviateVectorStore
+
+    parser = argparse.ArgumentParser(description=__doc__, formatter_class=argparse.RawDescriptionHelpFormatter)
+    sub = parser.add_subparsers(dest='command', required=True)
+    export_parser = sub.add_parser('export', help='write SQL tables, vectors and manifest to a directory')
+    export_parser.add_argument('path')
+    import_parser = sub.add_parser('import', help='restore a snapshot without re-embedding')
+    import_parser.add_argument('path')
+    import_parser.add_argument('--replace', action='store_true', help='clear existing SQL rows and vectors first')
+    args = parser.parse_args()
+
+    db = SqlDB()
+    if args.command == 'import':
+        # Kiểm tra manifest + checksum trước khi kết nối Weaviate
+        read_manifest(args.path)
+    vectorstore = WeaviateVectorStore()
+    try:
+        if args.command == 'export':
+            export_snapshot(db, vectorstore, args.path)
+        else:
+            import_snapshot(db, vectorstore, args.path, replace=args.replace, verify=False)
+    finally:
+        vectorstore.close()
+
+
+if __name__ == '__main__':
+    main()
@@ -3,22 +3,35 @@ from sqlalchemy import create_engine, inspect, func
 from sqlalchemy.orm import sessionmaker
 # backend/src/sql_db.py
 from sqlalchemy import create_engine, inspect, func
-from sqlalchemy.orm import sessionmaker
+from sqlalchemy.orm import selectinload, sessionmaker
 from sqlalchemy.exc import SQLAlchemyError
-from .models import Base, Category, Keyword, Document
+from .models import Base, Category, Keyword, Document, ArticleSummary, DataState, FacetCount, IngestionJobRecord, document_keywords
 from typing import List
+from collections import Counter
+import json
+import time
+
+# Số id tối đa trong một mệnh đề IN
+IN_CHUNK_SIZE = 500
+
 
 class SqlDB:
-    def __init__(self):
+    def __init__(self, url: str = "sqlite:///./data.db"):
         try:
             # ✅ Dùng SQLite file local, không cần Postgres
-            self.engine = create_engine("sqlite:///./data.db", echo=False, connect_args={"check_same_thread": False})
+            self.engine = create_engine(url, echo=False, connect_args={"check_same_thread": False})
             self.SessionLocal = sessionmaker(autocommit=False, autoflush=False, bind=self.engine)
 
             inspector = inspect(self.engine)
-            if not inspector.get_table_names():
-                Base.metadata.create_all(bind=self.engine)
+            tables = inspector.get_table_names()
+            is_new = not tables
+            # create_all chỉ tạo bảng còn thiếu (DB cũ cũng có bảng mới)
+            Base.metadata.create_all(bind=self.engine)
+            if is_new:
                 print("[INFO] SQLite database created successfully ✅")
+            elif FacetCount.__tablename__ not in tables:
+                # DB có từ trước khi có bảng facet: tính lại một lần
+                self.rebuild_facets()
 
         except SQLAlchemyError as e:
             raise RuntimeError(f"Cannot connect to database: {e}")
@@ -26,6 +39,262 @@ class SqlDB:
     def get_session(self):
         return self.SessionLocal()
 
+    # ---------- Facets ----------
+    def _apply_facet_deltas(self, db, deltas: Counter):
+        """deltas: {(facet, value_id): +n / -n}, ghi trong cùng transaction với thay đổi document"""
+        for (facet, value_id), delta in deltas.items():
+            if not delta or value_id is None:
+                continue
+            updated = (
+                db.query(FacetCount)
+                .filter_by(facet=facet, value_id=value_id)
+                .update({FacetCount.count: FacetCount.count + delta}, synchronize_session=False)
+            )
+            if not updated:
+                db.add(FacetCount(facet=facet, value_id=value_id, count=delta))
+
+    @staticmethod
+    def _document_facets(category_id, keyword_ids, sign: int = 1):
+        deltas = Counter({('category', category_id): sign})
+        for keyword_id in set(keyword_ids):
+            deltas[('keyword', keyword_id)] += sign
+        return deltas
+
+    def rebuild_facets(self):
+        """Tính lại toàn bộ facet_counts từ documents / document_keywords"""
+        db = self.get_session()
+        try:
+            db.query(FacetCount).delete()
+            category_rows = (
+                db.query(Document.category_id, func.count(Document.id))
+                .filter(Document.category_id.isnot(None))
+                .group_by(Document.category_id)
+                .all()
+            )
+            keyword_rows = (
+                db.query(document_keywords.c.keyword_id, func.count(func.distinct(document_keywords.c.document_id)))
+                .group_by(document_keywords.c.keyword_id)
+                .all()
+            )
+            db.add_all(FacetCount(facet='category', value_id=v, count=c) for v, c in category_rows)
+            db.add_all(FacetCount(facet='keyword', value_id=v, count=c) for v, c in keyword_rows)
+            db.commit()
+        except Exception:
+            db.rollback()
+            raise
+        finally:
+            db.close()
+
+    def get_facets(self, keyword_limit: int = 20):
+        """Số document theo category và top keywords, đọc thẳng từ facet_counts"""
+        db = self.get_session()
+        try:
+            categories = (
+                db.query(Category.id, Category.name, FacetCount.count)
+                .join(FacetCount, (FacetCount.facet == 'category') & (FacetCount.value_id == Category.id))
+                .filter(FacetCount.count > 0)
+                .order_by(FacetCount.count.desc(), Category.id)
+                .all()
+            )
+            keywords = (
+                db.query(Keyword.id, Keyword.name, FacetCount.count)
+                .join(FacetCount, (FacetCount.facet == 'keyword') & (FacetCount.value_id == Keyword.id))
+                .filter(FacetCount.count > 0)
+                .order_by(FacetCount.count.desc(), Keyword.id)
+                .limit(keyword_limit)
+                .all()
+            )
+            return _facet_payload(categories, keywords)
+        finally:
+            db.close()
+
+    def get_facets_for_documents(self, ids: List[int], keyword_limit: int = 20):
+        """Facet chỉ trong một tập document (vd. kết quả search hiện tại)"""
+        ids = sorted(set(ids))
+        categories = Counter()
+        keywords = Counter()
+        db = self.get_session()
+        try:
+            # IN theo lô (SQLite giới hạn số tham số mỗi câu lệnh); các lô không giao nhau nên cộng dồn được
+            for start in range(0, len(ids), IN_CHUNK_SIZE):
+                chunk = ids[start:start + IN_CHUNK_SIZE]
+                rows = (
+                    db.query(Category.id, Category.name, func.count(Document.id))
+                    .join(Document, Document.category_id == Category.id)
+                    .filter(Document.id.in_(chunk))
+                    .group_by(Category.id, Category.name)
+                )
+                categories.update({(i, name): count for i, name, count in rows})
+                rows = (
+                    db.query(Keyword.id, Keyword.name, func.count(func.distinct(document_keywords.c.document_id)))
+                    .join(document_keywords, document_keywords.c.keyword_id == Keyword.id)
+                    .filter(document_keywords.c.document_id.in_(chunk))
+                    .group_by(Keyword.id, Keyword.name)
+                )
+                keywords.update({(i, name): count for i, name, count in rows})
+        finally:
+            db.close()
+
+        def ranked(counts):
+            return sorted(((i, name, count) for (i, name), count in counts.items()), key=lambda r: (-r[2], r[0]))
+
+        return _facet_payload(ranked(categories), ranked(keywords)[:keyword_limit])
+
+    def iter_document_titles(self, batch_size: int = 10000):
+        """Yield title của mọi document, đọc theo batch (không giữ ORM object)"""
+        db = self.get_session()
+        try:
+            for (title,) in db.query(Document.title).yield_per(batch_size):
+                yield title
+        finally:
+            db.close()
+
+    def iter_document_texts(self, batch_size: int = 10000):
+        """Yield (id, title, summary) của mọi document theo thứ tự id"""
+        db = self.get_session()
+        try:
+            query = db.query(Document.id, Document.title, Document.summary).order_by(Document.id)
+            for row in query.yield_per(batch_size):
+                yield tuple(row)
+        finally:
+            db.close()
+
+    def get_keyword_document_counts(self):
+        """(tên keyword, số document) từ facet_counts"""
+        db = self.get_session()
+        try:
+            rows = (
+                db.query(Keyword.name, FacetCount.count)
+                .join(FacetCount, (FacetCount.facet == 'keyword') & (FacetCount.value_id == Keyword.id))
+                .filter(FacetCount.count > 0)
+                .all()
+            )
+            return [(name, count) for name, count in rows]
+        finally:
+            db.close()
+
+    # ---------- Ingestion jobs ----------
+    ACTIVE_JOB_STATUSES = ('queued', 'counting', 'running', 'cancelling')
+
+    def claim_ingestion_job(self, job_id: str, path: str, stale_after: float = 30.0):
+        """Tạo job mới nếu không có job nào đang chạy (single writer, kể cả giữa các worker).
+
+        Trả về (job, True) khi tạo được, (job đang chạy, False) nếu đã có.
+        """
+        db = self.get_session()
+        try:
+            now = time.time()
+            # UPDATE dòng khóa trước để các lần claim đồng thời phải xếp hàng
+            locked = (
+                db.query(DataState)
+                .filter_by(key='ingestion_lock')
+                .update({DataState.value: DataState.value + 1}, synchronize_session=False)
+            )
+            if not locked:
+                db.add(DataState(key='ingestion_lock', value=1))
+                db.flush()
+
+            active = db.query(IngestionJobRecord).filter(IngestionJobRecord.status.in_(self.ACTIVE_JOB_STATUSES))
+            for job in active.all():
+                if job.updated_at >= now - stale_after:
+                    result = _job_dict(job)
+                    db.rollback()
+                    return result, False
+                # Worker chạy job đã chết (không còn heartbeat)
+                job.status = 'failed'
+                job.error = 'Worker stopped responding'
+                job.finished_at = now
+
+            job = IngestionJobRecord(id=job_id, path=path, status='queued', created_at=now, updated_at=now)
+            db.add(job)
+            db.commit()
+            return _job_dict(job), True
+        except Exception:
+            db.rollback()
+            raise
+        finally:
+            db.close()
+
+    def update_ingestion_job(self, job_id: str, **fields):
+        """Ghi tiến độ / trạng thái + heartbeat; trả về job sau khi cập nhật"""
+        db = self.get_session()
+        try:
+            job = db.get(IngestionJobRecord, job_id)
+            if job is None:
+                return None
+            for key, value in fields.items():
+                setattr(job, key, value)
+            job.updated_at = time.time()
+            db.commit()
+            return _job_dict(job)
+        except Exception:
+            db.rollback()
+            raise
+        finally:
+            db.close()
+
+    def get_ingestion_job(self, job_id: str):
+        db = self.get_session()
+        try:
+            job = db.get(IngestionJobRecord, job_id)
+            return _job_dict(job) if job else None
+        finally:
+            db.close()
+
+    def cancel_ingestion_job(self, job_id: str):
+        """Job đang chạy: yêu cầu hủy (worker sở hữu job sẽ dừng). Job đã xong: xóa bản ghi."""
+        db = self.get_session()
+        try:
+            job = db.get(IngestionJobRecord, job_id)
+            if job is None:
+                return None
+            if job.status in self.ACTIVE_JOB_STATUSES:
+                job.cancel_requested = 1
+                job.status = 'cancelling'
+                result = _job_dict(job)
+            else:
+                result = {**_job_dict(job), 'deleted': True}
+                db.delete(job)
+            db.commit()
+            return result
+        except Exception:
+            db.rollback()
+            raise
+        finally:
+            db.close()
+
+    # ---------- Data generation ----------
+    def get_data_generation(self):
+        """Số thế hệ dữ liệu: đổi mỗi khi document/category/keyword được tạo, sửa hoặc xóa"""
+        db = self.get_session()
+        try:
+            row = db.get(DataState, 'data_generation')
+            return row.value if row else 0
+        finally:
+            db.close()
+
+    def bump_data_generation(self):
+        """Tăng generation khi dữ liệu search đổi ngoài SQL (vector đã ghi xong, index trong bộ nhớ build lại)"""
+        db = self.get_session()
+        try:
+            self._bump_generation(db)
+            db.commit()
+        except Exception:
+            db.rollback()
+            raise
+        finally:
+            db.close()
+
+    def _bump_generation(self, db):
+        # Gọi trong cùng transaction với thay đổi dữ liệu, trước commit; UPDATE nguyên tử để không mất lượt tăng
+        updated = (
+            db.query(DataState)
+            .filter_by(key='data_generation')
+            .update({DataState.value: DataState.value + 1}, synchronize_session=False)
+        )
+        if not updated:
+            db.add(DataState(key='data_generation', value=1))
+
     def create_category(self, name: str):
         db = self.get_session()
         try:
@@ -34,6 +303,7 @@ class SqlDB:
                 return category
             category = Category(name=name)
             db.add(category)
+            self._bump_generation(db)
             db.commit()
             db.refresh(category)
             return category
@@ -128,6 +398,8 @@ class SqlDB:
                 print(f"[WARNING] Document with link already exists: {title[:50]}...")
                 print(f"[INFO] Updating document ID: {existing.id}")
                 
+                deltas = self._document_facets(existing.category_id, [k.id for k in existing.keywords], -1)
+
                 # Cập nhật thông tin
                 existing.title = title
                 existing.summary = summary
@@ -136,6 +408,9 @@ class SqlDB:
                 # Cập nhật keywords
                 keywords = db.query(Keyword).filter(Keyword.id.in_(keyword_ids)).all()
                 existing.keywords = keywords
+                deltas.update(self._document_facets(category_id, [k.id for k in keywords]))
+                self._apply_facet_deltas(db, deltas)
+                self._bump_generation(db)
                 
                 db.commit()
                 db.refresh(existing)
@@ -162,6 +437,8 @@ class SqlDB:
                 keywords=keywords
             )
             db.add(doc)
+            self._apply_facet_deltas(db, self._document_facets(category.id, [k.id for k in keywords]))
+            self._bump_generation(db)
             db.commit()
             db.refresh(doc)
             return doc
@@ -172,10 +449,62 @@ class SqlDB:
         finally:
             db.close()
         
-    def get_documents_by_category(self, category_id: int):
+    def create_documents(self, items: List[dict]):
+        """Bulk version of create_document in one transaction; returns doc ids in input order.
+
+        items: dicts with title, summary, link, category_id, keyword_ids. Same link => update.
+        Raises if any item is invalid so the caller can retry row by row.
+        """
+        db = self.get_session()
+        try:
+            links = {item['link'] for item in items}
+            existing = {d.link: d for d in db.query(Document).filter(Document.link.in_(links)).all()}
+
+            keyword_ids = {k for item in items for k in item['keyword_ids']}
+            keywords = {k.id: k for k in db.query(Keyword).filter(Keyword.id.in_(keyword_ids)).all()}
+            category_ids = {item['category_id'] for item in items}
+            found_categories = {cid for (cid,) in db.query(Category.id).filter(Category.id.in_(category_ids)).all()}
+
+            docs = []
+            deltas = Counter()
+            for item in items:
+                if item['category_id'] not in found_categories:
+                    raise ValueError(f"Category {item['category_id']} not found")
+                doc_keywords = [keywords[k] for k in item['keyword_ids'] if k in keywords]
+                if len(doc_keywords) != len(item['keyword_ids']):
+                    raise ValueError("Some keywords not found")
+
+                doc = existing.get(item['link'])
+                if doc is None:
+                    doc = Document(link=item['link'])
+                    db.add(doc)
+                    existing[item['link']] = doc
+                else:
+                    deltas.update(self._document_facets(doc.category_id, [k.id for k in doc.keywords], -1))
+                deltas.update(self._document_facets(item['category_id'], [k.id for k in doc_keywords]))
+                doc.title = item['title']
+                doc.summary = item['summary']
+                doc.category_id = item['category_id']
+                doc.keywords = doc_keywords
+                docs.append(doc)
+
+            db.flush()
+            ids = [doc.id for doc in docs]
+            self._apply_facet_deltas(db, deltas)
+            self._bump_generation(db)
+            db.commit()
+            return ids
+        except Exception:
+            db.rollback()
+            raise
+        finally:
+            db.close()
+
+    def get_documents_by_category(self, category_id: int, include_relations: bool = False):
+        """include_relations: trả về dict kèm category + keywords (xem _documents_query)"""
         db = self.get_session()
         try:
-            docs = db.query(Document).filter(Document.category_id == category_id).all()
+            docs = self._documents_query(db, include_relations).filter(Document.category_id == category_id).all()
             
             # Loại bỏ duplicate dựa trên link
             seen_links = set()
@@ -186,14 +515,21 @@ class SqlDB:
                     seen_links.add(doc.link)
                     unique_docs.append(doc)
             
-            return unique_docs
+            return [_document_dict(d) for d in unique_docs] if include_relations else unique_docs
         finally:
             db.close()
     
-    def get_documents_by_ids(self, ids: List[int]):
+    def get_documents_by_ids(self, ids: List[int], include_relations: bool = False):
         db = self.get_session()
         try:
-            docs = db.query(Document).filter(Document.id.in_(ids)).all()
+            unique_ids = list(dict.fromkeys(ids))
+            docs = [
+                doc
+                for start in range(0, len(unique_ids), IN_CHUNK_SIZE)
+                for doc in self._documents_query(db, include_relations)
+                .filter(Document.id.in_(unique_ids[start:start + IN_CHUNK_SIZE]))
+                .all()
+            ]
             
             # Sắp xếp theo thứ tự ids và loại bỏ duplicate
             docs_dict = {d.id: d for d in docs}
@@ -205,10 +541,76 @@ class SqlDB:
                     ordered_docs.append(docs_dict[doc_id])
                     seen_ids.add(doc_id)
             
-            return ordered_docs
+            return [_document_dict(d) for d in ordered_docs] if include_relations else ordered_docs
         finally:
             db.close()
+
+    @staticmethod
+    def _documents_query(db, include_relations: bool):
+        # Quan hệ lazy sẽ tốn 1 query / document; selectinload: 1 query cho categories + 1 cho keywords
+        # của cả trang (SQLAlchemy chia IN theo lô 500 id)
+        query = db.query(Document)
+        if include_relations:
+            query = query.options(selectinload(Document.category), selectinload(Document.keywords))
+        return query
     
+    def get_document_category_map(self):
+        db = self.get_session()
+        try:
+            rows = db.query(Document.id, Document.category_id).all()
+            return {doc_id: category_id for doc_id, category_id in rows}
+        finally:
+            db.close()
+
+    def get_article_summary(self, link: str):
+        db = self.get_session()
+        try:
+            row = db.query(ArticleSummary).filter_by(link=link).first()
+            if not row:
+                return None
+            return {
+                "title": row.title,
+                "authors": json.loads(row.authors),
+                "summary": json.loads(row.summary),
+                "pdf_url": row.pdf_url,
+            }
+        finally:
+            db.close()
+
+    def save_article_summary(self, link: str, data: dict):
+        db = self.get_session()
+        try:
+            row = db.query(ArticleSummary).filter_by(link=link).first()
+            if row is None:
+                row = ArticleSummary(link=link)
+                db.add(row)
+            row.title = data.get("title", "")
+            row.authors = json.dumps(data.get("authors", []))
+            row.summary = json.dumps(data.get("summary", {}))
+            row.pdf_url = data.get("pdf_url", "") or ""
+            row.fetched_at = time.time()
+            db.commit()
+        except Exception:
+            db.rollback()
+            raise
+        finally:
+            db.close()
+
+    def get_unsummarized_documents(self):
+        """(doc_id, link) của các document chưa có summary lưu sẵn, theo thứ tự id"""
+        db = self.get_session()
+        try:
+            rows = (
+                db.query(Document.id, Document.link)
+                .outerjoin(ArticleSummary, ArticleSummary.link == Document.link)
+                .filter(ArticleSummary.id.is_(None))
+                .order_by(Document.id)
+                .all()
+            )
+            return [(doc_id, link) for doc_id, link in rows]
+        finally:
+            db.close()
+
     # Thêm các methods mới
     def get_all_documents(self):
         db = self.get_session()
@@ -233,6 +635,8 @@ class SqlDB:
             db.query(Document).delete()
             db.query(Keyword).delete()
             db.query(Category).delete()
+            db.query(FacetCount).delete()
+            self._bump_generation(db)
             
             db.commit()
             print("[SUCCESS] Database cleared successfully!")
@@ -306,9 +710,13 @@ class SqlDB:
                 print(f"  Removing IDs: {[d.id for d in to_remove]}")
                 
                 for doc in to_remove:
+                    self._apply_facet_deltas(
+                        db, self._document_facets(doc.category_id, [k.id for k in doc.keywords], -1)
+                    )
                     db.delete(doc)
                     removed_count += 1
             
+            self._bump_generation(db)
             db.commit()
             print(f"\n[SUCCESS] Removed {removed_count} duplicate documents")
             return removed_count
@@ -318,4 +726,43 @@ class SqlDB:
             print(f"[ERROR] Failed to remove duplicates: {e}")
             raise
         finally:
-            db.close()
\ No newline at end of file
+            db.close()
+
+
+def _document_dict(doc):
+    """Document + category + keywords dạng dict, dùng được sau khi session đóng"""
+    return {
+        "id": doc.id,
+        "title": doc.title,
+        "summary": doc.summary,
+        "link": doc.link,
+        "category_id": doc.category_id,
+        "category": {"id": doc.category.id, "name": doc.category.name} if doc.category else None,
+        "keywords": [{"id": k.id, "name": k.name} for k in sorted(doc.keywords, key=lambda k: k.id)],
+    }
+
+
+def _facet_payload(categories, keywords):
+    return {
+        "categories": [{"id": i, "name": name, "count": count} for i, name, count in categories],
+        "keywords": [{"id": i, "name": name, "count": count} for i, name, count in keywords],
+    }
+
+
+def _job_dict(job):
+    return {
+        "id": job.id,
+        "path": job.path,
+        "status": job.status,
+        "total_rows": job.total_rows,
+        "rows_read": job.rows_read or 0,
+        "documents": job.documents or 0,
+        "vectors": job.vectors or 0,
+        "failed": job.failed or 0,
+        "cancel_requested": bool(job.cancel_requested),
+        "error": job.error,
+        "created_at": job.created_at,
+        "started_at": job.started_at,
+        "finished_at": job.finished_at,
+        "updated_at": job.updated_at,
+    }
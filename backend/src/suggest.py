@@ -0,0 +1,127 @@
+import heapq
+import re
+import time
+from bisect import bisect_left
+from collections import Counter
+
+import numpy as np
+
+from .config import SUGGEST_CONFIG
+from .search_cache import normalize_query
+
+TOKEN_RE = re.compile(r"[^\W_][\w\-]*[^\W_]|[^\W_]")
+# Từ phổ biến trong title, không có ích khi gợi ý
+STOPWORDS = frozenset(
+    "a an and are as at be by for from in into is its of on or the to under via vs was were with".split()
+)
+MAX_CHAR = '\U0010ffff'
+
+
+def title_tokens(title: str):
+    return {t for t in TOKEN_RE.findall(normalize_query(title)) if len(t) > 1 and t not in STOPWORDS}
+
+
+class SuggestIndex:
+    """Prefix index cho typeahead: mảng term đã sort + bisect, xếp hạng theo số document.
+
+    Prefix khớp nhiều hơn `precompute_threshold` term (thường là 1-3 ký tự đầu) có sẵn top-k,
+    prefix còn lại chỉ quét một khoảng nhỏ của mảng -> mỗi lookup tốn O(log n + threshold).
+    """
+
+    def __init__(self, max_limit: int = 10, precompute_threshold: int = 256):
+        self.max_limit = max_limit
+        self.precompute_threshold = precompute_threshold
+        self.terms = []
+        self.doc_counts = []
+        self.is_keyword = []
+        self._top = {}
+
+    def __len__(self):
+        return len(self.terms)
+
+    @classmethod
+    def from_db(cls, db, config: dict = None):
+        config = config or SUGGEST_CONFIG
+        start = time.perf_counter()
+        token_counts = Counter()
+        for title in db.iter_document_titles():
+            token_counts.update(title_tokens(title or ''))
+        keyword_counts = {normalize_query(name): count for name, count in db.get_keyword_document_counts()}
+
+        index = cls(config.get('max_limit', 10), config.get('precompute_threshold', 256))
+        index.build(token_counts, keyword_counts)
+        print(f"[INFO] Suggest index ready: {len(index)} terms in {time.perf_counter() - start:.1f}s")
+        return index
+
+    def build(self, token_counts: dict, keyword_counts: dict = None):
+        """token_counts / keyword_counts: term -> số document chứa term"""
+        keyword_counts = keyword_counts or {}
+        merged = dict(token_counts)
+        for name, count in keyword_counts.items():
+            merged[name] = max(count, merged.get(name, 0))
+        self.terms = sorted(t for t in merged if t)
+        self.doc_counts = [merged[t] for t in self.terms]
+        self.is_keyword = [t in keyword_counts for t in self.terms]
+        self._precompute()
+        return self
+
+    def _precompute(self):
+        """Top-k cho mọi prefix có khoảng lớn hơn threshold, chia nhỏ dần theo từng ký tự"""
+        self._top = {}
+        counts = np.asarray(self.doc_counts, dtype=np.int64)
+        order_key = np.arange(len(counts))
+        stack = [(0, len(self.terms), 0)]
+        while stack:
+            lo, hi, depth = stack.pop()
+            if hi - lo <= self.precompute_threshold:
+                continue
+            if depth > 0:
+                # Sắp theo doc count giảm dần, cùng count thì theo thứ tự chữ cái
+                block = np.lexsort((order_key[lo:hi], -counts[lo:hi]))[:self.max_limit]
+                self._top[self.terms[lo][:depth]] = tuple(int(i) + lo for i in block)
+            # Term đúng bằng prefix đứng đầu khoảng, không thuộc nhóm con nào
+            i = lo
+            while i < hi and len(self.terms[i]) <= depth:
+                i += 1
+            while i < hi:
+                child = self.terms[i][:depth + 1]
+                j = bisect_left(self.terms, child + MAX_CHAR, i, hi)
+                stack.append((i, j, depth + 1))
+                i = j
+
+    # ---------- Lookup ----------
+    def _prefix_top(self, prefix: str, k: int):
+        top = self._top.get(prefix)
+        if top is not None:
+            return top[:k]
+        lo = bisect_left(self.terms, prefix)
+        hi = bisect_left(self.terms, prefix + MAX_CHAR, lo)
+        counts = self.doc_counts
+        return heapq.nsmallest(k, range(lo, hi), key=lambda i: (-counts[i], i))
+
+    def suggest(self, query: str, limit: int = 8):
+        limit = max(1, min(limit, self.max_limit))
+        query = normalize_query(query)
+        if not query:
+            return []
+        results = [(self.terms[i], i) for i in self._prefix_top(query, limit)]
+
+        # "mice bon" -> hoàn thành từ cuối: "mice bone"
+        head, _, last = query.rpartition(' ')
+        if head and last and len(results) < limit:
+            seen = {text for text, _ in results}
+            for i in self._prefix_top(last, limit):
+                text = f"{head} {self.terms[i]}"
+                if text not in seen:
+                    results.append((text, i))
+                if len(results) >= limit:
+                    break
+
+        return [
+            {
+                'text': text,
+                'type': 'keyword' if self.is_keyword[i] else 'term',
+                'doc_count': self.doc_counts[i],
+            }
+            for text, i in results
+        ]
@@ -0,0 +1,240 @@
+import numpy as np
+
+
+class PartitionedVectorIndex:
+    """In-memory IVF-style index: route query to top-nprobe partitions, then exact search inside them.
+
+    With reduce_dims > 0 the scan inside partitions runs on reduced vectors (PCA or truncation) and
+    the top `rerank` candidates are re-scored with the full vectors.
+    """
+
+    def __init__(
+        self,
+        partition_by: str = 'category',
+        n_clusters: int = 16,
+        nprobe: int = 2,
+        seed: int = 0,
+        reduce_dims: int = 0,
+        reduction: str = 'pca',
+        rerank: int = 100,
+    ):
+        self.partition_by = partition_by
+        self.n_clusters = n_clusters
+        self.nprobe = nprobe
+        self.seed = seed
+        self.reduce_dims = reduce_dims
+        self.reduction = reduction
+        self.rerank = rerank
+
+        self.doc_ids = np.zeros(0, dtype=np.int64)
+        self.title_vectors = np.zeros((0, 0), dtype=np.float32)
+        self.summary_vectors = np.zeros((0, 0), dtype=np.float32)
+        self.partition_keys = []
+        self.centroids = np.zeros((0, 0), dtype=np.float32)
+        # Rows of partition p are stored in [offsets[p], offsets[p + 1])
+        self.offsets = np.zeros(1, dtype=np.int64)
+
+        # Reduced copies for the first pass: x -> (x - mean) @ projection
+        self.projection = None
+        self.mean = None
+        self.title_reduced = None
+        self.summary_reduced = None
+
+    def __len__(self):
+        return len(self.doc_ids)
+
+    @property
+    def n_partitions(self):
+        return len(self.partition_keys)
+
+    @classmethod
+    def from_store(cls, vectorstore, db, **kwargs):
+        """Build index from vectors stored in Weaviate and categories in SQL"""
+        doc_ids, title_vectors, summary_vectors = vectorstore.fetch_all_vectors()
+        category_map = db.get_document_category_map()
+        categories = [category_map.get(doc_id) for doc_id in doc_ids]
+
+        index = cls(**kwargs)
+        index.build(doc_ids, title_vectors, summary_vectors, categories)
+        return index
+
+    def build(self, doc_ids, title_vectors, summary_vectors, categories=None):
+        doc_ids = np.asarray(doc_ids, dtype=np.int64)
+        title_vectors = np.asarray(title_vectors, dtype=np.float32)
+        summary_vectors = np.asarray(summary_vectors, dtype=np.float32)
+        # Một vector NaN/inf làm hỏng centroid và mọi điểm số của partition chứa nó
+        for name, vectors in (('title', title_vectors), ('summary', summary_vectors)):
+            if not np.isfinite(vectors).all():
+                raise ValueError(f"{name} vectors contain NaN or inf")
+
+        if len(doc_ids) == 0:
+            self.__init__(
+                self.partition_by, self.n_clusters, self.nprobe, self.seed,
+                self.reduce_dims, self.reduction, self.rerank,
+            )
+            return self
+
+        if self.partition_by == 'kmeans' or categories is None:
+            labels, keys = self._kmeans_labels(title_vectors, summary_vectors)
+        else:
+            keys = sorted(set(categories), key=lambda c: (c is None, str(c)))
+            key_pos = {key: i for i, key in enumerate(keys)}
+            labels = np.array([key_pos[c] for c in categories], dtype=np.int64)
+
+        # Sắp xếp theo partition để mỗi partition là một đoạn liên tục
+        order = np.argsort(labels, kind='stable')
+        labels = labels[order]
+        self.doc_ids = doc_ids[order]
+        self.title_vectors = np.ascontiguousarray(title_vectors[order])
+        self.summary_vectors = np.ascontiguousarray(summary_vectors[order])
+        self.partition_keys = list(keys)
+
+        counts = np.bincount(labels, minlength=len(keys))
+        self.offsets = np.concatenate([[0], np.cumsum(counts)]).astype(np.int64)
+
+        dim = self.title_vectors.shape[1]
+        self.centroids = np.zeros((len(keys), dim), dtype=np.float32)
+        for p in range(len(keys)):
+            start, end = self.offsets[p], self.offsets[p + 1]
+            if start == end:
+                continue
+            centroid = self.title_vectors[start:end].sum(axis=0) + self.summary_vectors[start:end].sum(axis=0)
+            self.centroids[p] = _normalize(centroid)
+
+        if 0 < self.reduce_dims < dim:
+            self._build_reduced()
+        return self
+
+    def _build_reduced(self, max_fit_rows: int = 20000):
+        dim = self.title_vectors.shape[1]
+        if self.reduction == 'truncate':
+            # Chỉ hợp lý với model kiểu Matryoshka (các chiều đầu mang nhiều thông tin nhất)
+            self.mean = np.zeros(dim, dtype=np.float32)
+            self.projection = np.eye(dim, self.reduce_dims, dtype=np.float32)
+        else:
+            # PCA trên mẫu title + summary; q·x = q·mean + q·(x - mean), số hạng đầu như nhau cho mọi doc
+            rng = np.random.default_rng(self.seed)
+            sample = np.concatenate([self.title_vectors, self.summary_vectors])
+            if len(sample) > max_fit_rows:
+                sample = sample[rng.choice(len(sample), size=max_fit_rows, replace=False)]
+            self.mean = sample.mean(axis=0)
+            _, _, vt = np.linalg.svd(sample - self.mean, full_matrices=False)
+            self.projection = np.ascontiguousarray(vt[:self.reduce_dims].T, dtype=np.float32)
+        self.title_reduced = self._reduce(self.title_vectors)
+        self.summary_reduced = self._reduce(self.summary_vectors)
+
+    def _reduce(self, vectors):
+        return np.ascontiguousarray((vectors - self.mean) @ self.projection, dtype=np.float32)
+
+    def _kmeans_labels(self, title_vectors, summary_vectors, iters: int = 20):
+        """Spherical k-means over the mean of title and summary vectors"""
+        points = _normalize(title_vectors + summary_vectors)
+        k = max(1, min(self.n_clusters, len(points)))
+        rng = np.random.default_rng(self.seed)
+        centroids = points[rng.choice(len(points), size=k, replace=False)]
+
+        labels = np.zeros(len(points), dtype=np.int64)
+        for i in range(iters):
+            similarities = points @ centroids.T
+            new_labels = np.argmax(similarities, axis=1)
+            if i > 0 and np.array_equal(new_labels, labels):
+                break
+            labels = new_labels
+            self._reseed_empty(points, labels, similarities, centroids)
+            for c in range(k):
+                members = points[labels == c]
+                if len(members):
+                    centroids[c] = _normalize(members.sum(axis=0))
+        return labels, list(range(k))
+
+    @staticmethod
+    def _reseed_empty(points, labels, similarities, centroids):
+        """Cluster rỗng nhận các điểm xa centroid của chúng nhất (lấy từ cluster còn >= 2 điểm); sửa labels tại chỗ"""
+        k = len(centroids)
+        counts = np.bincount(labels, minlength=k)
+        empty = np.flatnonzero(counts == 0)
+        if len(empty) == 0:
+            return
+        fit = similarities[np.arange(len(points)), labels]
+        fit[counts[labels] < 2] = np.inf
+        candidates = iter(np.argsort(fit, kind='stable'))
+        for c in empty:
+            point = next((p for p in candidates if np.isfinite(fit[p]) and counts[labels[p]] >= 2), None)
+            if point is None:
+                return
+            counts[labels[point]] -= 1
+            labels[point] = c
+            centroids[c] = points[point]
+
+    def route(self, query_vector, nprobe: int = None):
+        """Return partition indices ordered by centroid similarity"""
+        nprobe = self.nprobe if nprobe is None else nprobe
+        nprobe = max(1, min(int(nprobe), self.n_partitions))
+        scores = self.centroids @ np.asarray(query_vector, dtype=np.float32)
+        if nprobe == self.n_partitions:
+            return np.argsort(-scores)
+        top = np.argpartition(-scores, nprobe - 1)[:nprobe]
+        return top[np.argsort(-scores[top])]
+
+    def search(self, query_vector, k: int = 10, nprobe: int = None, rerank: int = None):
+        """Tìm kiếm trong top-nprobe partitions, trả về doc_ids"""
+        if len(self) == 0 or k <= 0:
+            return []
+        query = np.asarray(query_vector, dtype=np.float32)
+        partitions = self.route(query, nprobe)
+
+        if len(partitions) == self.n_partitions:
+            segments = [slice(0, len(self))]
+            positions = None
+        else:
+            # Partition là đoạn liên tục nên chỉ dùng slice (view), không copy vectors
+            segments = [slice(self.offsets[p], self.offsets[p + 1]) for p in partitions]
+            positions = np.concatenate([np.arange(s.start, s.stop) for s in segments])
+
+        reduced = self.projection is not None
+        if reduced:
+            reduced_query = query @ self.projection
+            scores = np.concatenate([self._score_reduced(s, reduced_query) for s in segments])
+        else:
+            scores = np.concatenate([self._score(s, query) for s in segments])
+        if len(scores) == 0:
+            return []
+
+        # Pass 1: top k (exact) hoặc top `rerank` ứng viên (reduced)
+        rerank = self.rerank if rerank is None else rerank
+        n_first = min(len(scores), max(k, rerank) if reduced else k)
+        top = np.argpartition(-scores, n_first - 1)[:n_first]
+        rows = top if positions is None else positions[top]
+
+        # Pass 2 (reduced): chấm lại ứng viên bằng vector đầy đủ
+        scores = self._score(rows, query) if reduced else scores[top]
+        k = min(k, len(rows))
+        best = np.argpartition(-scores, k - 1)[:k]
+        best = best[np.argsort(-scores[best], kind='stable')]
+        return self.doc_ids[rows[best]].tolist()
+
+    def full_search(self, query_vector, k: int = 10):
+        """Exact search: mọi document, vector đầy đủ (không qua pass giảm chiều) - ground truth cho recall"""
+        if len(self) == 0 or k <= 0:
+            return []
+        scores = self._score(slice(0, len(self)), np.asarray(query_vector, dtype=np.float32))
+        k = min(k, len(scores))
+        best = np.argpartition(-scores, k - 1)[:k]
+        best = best[np.argsort(-scores[best], kind='stable')]
+        return self.doc_ids[best].tolist()
+
+    def _score(self, rows: slice, query):
+        # Giống Weaviate multi-target mặc định: lấy khoảng cách nhỏ nhất giữa title và summary
+        title_scores = self.title_vectors[rows] @ query
+        summary_scores = self.summary_vectors[rows] @ query
+        return np.maximum(title_scores, summary_scores)
+
+    def _score_reduced(self, rows: slice, reduced_query):
+        return np.maximum(self.title_reduced[rows] @ reduced_query, self.summary_reduced[rows] @ reduced_query)
+
+
+def _normalize(vectors):
+    vectors = np.asarray(vectors, dtype=np.float32)
+    norms = np.linalg.norm(vectors, axis=-1, keepdims=True)
+    norms[norms == 0] = 1.0
+    return vectors / norms
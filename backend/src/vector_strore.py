@@ -2,6 +2,7 @@
 import weaviate
 from weaviate.classes.config import Property, DataType, Configure
 from weaviate.classes.query import Filter
+from weaviate.classes.data import DataObject
 import os
 import time
 
@@ -59,6 +60,12 @@ class WeaviateVectorStore:
     def close(self):
         if self.client:
             self.client.close()
+
+    def is_ready(self):
+        try:
+            return self.client is not None and self.client.is_ready()
+        except Exception:
+            return False
     
     def add_document(self, doc_id, title_embedding, summary_embedding):
         """Thêm document vào vector store với kiểm tra duplicate"""
@@ -86,6 +93,32 @@ class WeaviateVectorStore:
             print(f"[ERROR] Failed to add document {doc_id}: {e}")
             raise
     
+    def add_documents(self, doc_ids, title_embeddings, summary_embeddings):
+        """Thêm nhiều documents trong một request; trả về {doc_id: lỗi} cho object thất bại"""
+        response = self.collection.query.fetch_objects(
+            filters=Filter.by_property("doc_id").contains_any(list(doc_ids)),
+            limit=len(doc_ids)
+        )
+        skip = {obj.properties.get('doc_id') for obj in response.objects}
+
+        objects = []
+        for doc_id, title_embedding, summary_embedding in zip(doc_ids, title_embeddings, summary_embeddings):
+            if doc_id in skip:
+                continue
+            skip.add(doc_id)
+            objects.append(DataObject(
+                properties={'doc_id': doc_id},
+                vector={
+                    'title_vector': title_embedding,
+                    'summary_vector': summary_embedding
+                }
+            ))
+        if not objects:
+            return {}
+
+        result = self.collection.data.insert_many(objects)
+        return {objects[i].properties['doc_id']: err.message for i, err in result.errors.items()}
+
     def similarity_search(self, query_vector, k: int = 10):
         """Tìm kiếm documents tương tự"""
         response = self.collection.query.near_vector(
@@ -107,6 +140,23 @@ class WeaviateVectorStore:
         
         return unique_doc_ids
     
+    def fetch_all_vectors(self):
+        """Lấy toàn bộ title/summary vectors (dùng cho index trong bộ nhớ)"""
+        doc_ids, title_vectors, summary_vectors = [], [], []
+        seen_ids = set()
+        for obj in self.collection.iterator(include_vector=True):
+            doc_id = obj.properties.get('doc_id')
+            vectors = obj.vector or {}
+            if not doc_id or doc_id in seen_ids:
+                continue
+            if 'title_vector' not in vectors or 'summary_vector' not in vectors:
+                continue
+            seen_ids.add(doc_id)
+            doc_ids.append(doc_id)
+            title_vectors.append(vectors['title_vector'])
+            summary_vectors.append(vectors['summary_vector'])
+        return doc_ids, title_vectors, summary_vectors
+
     def get_object_count(self):
         """Đếm số lượng objects trong collection"""
         try:
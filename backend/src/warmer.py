@@ -0,0 +1,193 @@
+import heapq
+import itertools
+import threading
+import time
+from urllib.parse import urlparse
+
+# Độ ưu tiên: số nhỏ được crawl trước
+PRIORITY_HIGH = 0
+PRIORITY_NORMAL = 1
+
+
+class ArticleWarmer:
+    """Background crawl + summarize các document đã ingest để click /article_content được trả từ storage.
+
+    - Hàng đợi ưu tiên: document vừa xuất hiện trong kết quả search được đẩy lên trước, còn lại theo id.
+    - `concurrency` worker threads; mỗi host cách nhau ít nhất `host_delay` giây (politeness).
+    - Khi chỉ có summary fallback (Groq lỗi / không trả JSON), item được trả lại hàng đợi và worker nghỉ
+      `retry_delay` giây; sau `max_attempts` lần như vậy document được tính là failed.
+    """
+
+    def __init__(self, db, crawl, concurrency: int = 2, host_delay: float = 5.0, retry_delay: float = 60.0,
+                 max_attempts: int = 3):
+        self.db = db
+        self.crawl = crawl
+        self.concurrency = max(1, concurrency)
+        self.host_delay = host_delay
+        self.retry_delay = retry_delay
+        self.max_attempts = max(1, max_attempts)
+
+        self._heap = []
+        self._priority = {}  # doc_id -> priority hiện tại (entry cũ trong heap bị bỏ qua)
+        self._links = {}
+        # Đang crawl / đã xử lý xong: refresh() không xếp hàng và không đếm lại vào total
+        self._in_flight = set()
+        self._finished = set()
+        self._attempts = {}  # doc_id -> số lần chỉ nhận được summary fallback
+        self._seq = itertools.count()
+        self._host_next = {}
+        self._lock = threading.Lock()
+        self._stop = threading.Event()
+        self._threads = []
+
+        self.counts = {'total': 0, 'done': 0, 'failed': 0, 'skipped': 0, 'deferred': 0, 'in_flight': 0}
+        self.started_at = None
+        self.loaded = False
+        self.last_error = None
+
+    # ---------- Control ----------
+    def start(self):
+        self._stop.clear()
+        self.started_at = time.time()
+        loader = threading.Thread(target=self._load, name='warmer-loader', daemon=True)
+        loader.start()
+        self._threads = [loader]
+        for i in range(self.concurrency):
+            thread = threading.Thread(target=self._work, name=f'warmer-{i}', daemon=True)
+            thread.start()
+            self._threads.append(thread)
+
+    def stop(self):
+        self._stop.set()
+        for thread in self._threads:
+            thread.join(timeout=5)
+        self._threads = []
+
+    @property
+    def running(self):
+        return any(t.is_alive() for t in self._threads)
+
+    # ---------- Queue ----------
+    def refresh(self):
+        """Nạp thêm document mới (vd. sau ingestion); document đang chờ, đang crawl hoặc đã xử lý được bỏ qua"""
+        threading.Thread(target=self._load, name='warmer-loader', daemon=True).start()
+
+    def _load(self):
+        try:
+            candidates = self.db.get_unsummarized_documents()
+        except Exception as e:
+            self.last_error = f"load: {e}"
+            print(f"[ERROR] Warmer failed to load documents: {e}")
+            return
+        with self._lock:
+            added = sum(
+                self._push(doc_id, link, PRIORITY_NORMAL)
+                for doc_id, link in candidates
+                if doc_id not in self._in_flight and doc_id not in self._finished
+            )
+            self.counts['total'] += added
+            self.loaded = True
+        print(f"[INFO] Warmer queued {added} documents")
+
+    def _push(self, doc_id, link, priority):
+        current = self._priority.get(doc_id)
+        if current is not None and current <= priority:
+            return False
+        self._priority[doc_id] = priority
+        self._links[doc_id] = link
+        heapq.heappush(self._heap, (priority, next(self._seq), doc_id))
+        return current is None
+
+    def prioritize(self, doc_ids):
+        """Đẩy các document (vd. vừa có trong kết quả search) lên đầu hàng đợi"""
+        with self._lock:
+            for doc_id in doc_ids:
+                if doc_id in self._priority:
+                    self._push(doc_id, self._links[doc_id], PRIORITY_HIGH)
+
+    def _pop(self):
+        with self._lock:
+            while self._heap:
+                priority, _, doc_id = heapq.heappop(self._heap)
+                if self._priority.get(doc_id) != priority:
+                    continue
+                del self._priority[doc_id]
+                self._in_flight.add(doc_id)
+                self.counts['in_flight'] += 1
+                return doc_id, self._links.pop(doc_id), priority
+        return None
+
+    def _wait_for_host(self, host):
+        with self._lock:
+            now = time.monotonic()
+            slot = max(now, self._host_next.get(host, now))
+            self._host_next[host] = slot + self.host_delay
+        if slot > now:
+            self._stop.wait(slot - now)
+
+    # ---------- Worker ----------
+    def _work(self):
+        while not self._stop.is_set():
+            item = self._pop()
+            if item is None:
+                self._stop.wait(1)
+                continue
+            doc_id, link, priority = item
+            outcome = 'failed'
+            try:
+                if self.db.get_article_summary(link):
+                    outcome = 'skipped'
+                    continue
+                self._wait_for_host(urlparse(link).netloc)
+                if self._stop.is_set():
+                    outcome = 'deferred'
+                    continue
+                data, final = self.crawl(link)
+                if final:
+                    self.db.save_article_summary(link, data)
+                    outcome = 'done'
+                else:
+                    outcome = 'deferred'
+            except Exception as e:
+                self.last_error = f"{link}: {str(e)[:200]}"
+            finally:
+                self._finish(doc_id, link, priority, outcome)
+            if outcome == 'deferred':
+                self._stop.wait(self.retry_delay)
+
+    def _finish(self, doc_id, link, priority, outcome):
+        with self._lock:
+            self._in_flight.discard(doc_id)
+            self.counts['in_flight'] -= 1
+            if outcome == 'deferred' and not self._stop.is_set():
+                attempts = self._attempts[doc_id] = self._attempts.get(doc_id, 0) + 1
+                if attempts >= self.max_attempts:
+                    outcome = 'failed'
+                    self.last_error = f"{link}: no LLM summary after {attempts} attempts"
+            if outcome == 'deferred':
+                self.counts['deferred'] += 1
+                self._push(doc_id, link, priority)
+            else:
+                self._attempts.pop(doc_id, None)
+                self._finished.add(doc_id)
+                self.counts[outcome] += 1
+
+    # ---------- Progress ----------
+    def progress(self):
+        with self._lock:
+            counts = dict(self.counts)
+            pending = len(self._priority)
+        finished = counts['done'] + counts['failed'] + counts['skipped']
+        elapsed = time.time() - self.started_at if self.started_at else 0
+        rate = counts['done'] / elapsed if elapsed > 0 else 0
+        return {
+            'running': self.running,
+            'loaded': self.loaded,
+            'concurrency': self.concurrency,
+            'pending': pending,
+            'finished': finished,
+            **counts,
+            'rate_per_minute': round(rate * 60, 2),
+            'eta_seconds': round(pending / rate) if rate > 0 else None,
+            'last_error': self.last_error,
+        }
@@ -0,0 +1,38 @@
+import os
+import sys
+import types
+
+import pytest
+
+BACKEND_DIR = os.path.abspath(os.path.join(os.path.dirname(__file__), '..'))
+sys.path.insert(0, BACKEND_DIR)
+
+from benchmarks.stubs import InMemoryVectorStore, StubEmbedder  # noqa: E402
+from src.sql_db import SqlDB  # noqa: E402
+
+
+@pytest.fixture(autouse=True)
+def backend_cwd(monkeypatch):
+    # Path trong config.yaml (data/data.csv, ...) tương đối với backend/
+    monkeypatch.chdir(BACKEND_DIR)
+
+
+@pytest.fixture
+def db(tmp_path):
+    db = SqlDB(f"sqlite:///{tmp_path / 'test.db'}")
+    yield db
+    db.engine.dispose()
+
+
+@pytest.fixture
+def stub_resources(db):
+    """Resources tối thiểu cho IngestionJobs: SQLite tạm, vector store trong bộ nhớ, embedder giả"""
+    resources = types.SimpleNamespace(
+        db=db, vectorstore=InMemoryVectorStore(), embedder=StubEmbedder(), after_ingestion_calls=0
+    )
+
+    def after_ingestion():
+        resources.after_ingestion_calls += 1
+
+    resources.after_ingestion = after_ingestion
+    return resources
@@ -0,0 +1,60 @@
+import pytest
+from fastapi.testclient import TestClient
+
+from benchmarks.corpus import populate_sql, synthetic_vectors
+from benchmarks.stubs import InMemoryVectorStore, StubEmbedder
+
+
+@pytest.fixture
+def client(db, monkeypatch):
+    import src.main
+
+    populate_sql(db, 300)
+    store = InMemoryVectorStore(capacity=300)
+    store.add_documents(*synthetic_vectors(300)[:3])
+    for name, value in (('db', db), ('vectorstore', store), ('embedder', StubEmbedder())):
+        monkeypatch.setattr(src.main.resources, name, value)
+    monkeypatch.setattr(src.main.admission, 'enabled', False)
+    # Không chạy lifespan: dùng đúng các stand-in ở trên
+    return TestClient(src.main.app)
+
+
+def test_compressed_etag_revalidates_with_same_etag(client):
+    url = '/categories/1/documents'
+    resp = client.get(url, headers={'Accept-Encoding': 'gzip'})
+    assert resp.headers['content-encoding'] == 'gzip'
+    etag = resp.headers['etag']
+    assert etag.endswith('-gzip"')
+    assert 'Accept-Encoding' in resp.headers['vary']
+
+    revalidated = client.get(url, headers={'Accept-Encoding': 'gzip', 'If-None-Match': etag})
+    assert revalidated.status_code == 304
+    assert revalidated.headers['etag'] == etag
+    assert 'Accept-Encoding' in revalidated.headers['vary']
+
+
+def test_uncompressed_responses_vary_on_accept_encoding(client):
+    for url, encoding in (('/categories/1/documents', 'identity'), ('/categories', 'gzip')):
+        resp = client.get(url, headers={'Accept-Encoding': encoding})
+        assert 'content-encoding' not in resp.headers
+        assert 'Accept-Encoding' in resp.headers['vary']
+        etag = resp.headers['etag']
+        assert not etag.endswith('-gzip"')
+        revalidated = client.get(url, headers={'Accept-Encoding': encoding, 'If-None-Match': etag})
+        assert revalidated.status_code == 304
+        assert revalidated.headers['etag'] == etag
+
+
+def test_cors_vary_is_merged(client):
+    resp = client.get('/categories', headers={'Accept-Encoding': 'gzip', 'Origin': 'http://localhost:5173'})
+    assert resp.headers['vary'] == 'Origin, Accept-Encoding'
+
+
+def test_search_is_not_conditional(client):
+    body = {'query': 'microgravity bone loss', 'limit': 5}
+    resp = client.post('/search', json=body)
+    assert resp.json()['status'] == 'success'
+    assert 'etag' not in resp.headers
+    resp = client.post('/search', json=body, headers={'If-None-Match': '*'})
+    assert resp.status_code == 200
+    assert len(resp.json()['data']) == 5
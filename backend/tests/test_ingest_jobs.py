@@ -0,0 +1,63 @@
+import os
+import time
+
+import pytest
+
+from src.config import INGESTION_CONFIG
+from src.ingest_jobs import IngestionJobs
+
+
+def wait_for(jobs, job_id, timeout=60):
+    deadline = time.time() + timeout
+    while time.time() < deadline:
+        job = jobs.get(job_id)
+        if job['finished_at']:
+            return job
+        time.sleep(0.1)
+    raise AssertionError(f"job {job_id} did not finish")
+
+
+def test_resolve_default_path_is_configured_file(stub_resources):
+    jobs = IngestionJobs(stub_resources)
+    assert jobs.resolve_path(None) == os.path.abspath(INGESTION_CONFIG['path'])
+    # Cả path kiểu config (so với cwd) lẫn tên file trong thư mục data
+    assert jobs.resolve_path(INGESTION_CONFIG['path']) == os.path.abspath(INGESTION_CONFIG['path'])
+    assert jobs.resolve_path(os.path.basename(INGESTION_CONFIG['path'])) == os.path.abspath(INGESTION_CONFIG['path'])
+
+
+def test_resolve_rejects_paths_outside_data_dir(stub_resources):
+    jobs = IngestionJobs(stub_resources)
+    with pytest.raises(ValueError):
+        jobs.resolve_path('../../requirements.txt')
+    with pytest.raises(ValueError):
+        jobs.resolve_path('missing.csv')
+
+
+def test_submit_configured_default_path(stub_resources):
+    jobs = IngestionJobs(stub_resources, heartbeat=0.1)
+    job = jobs.submit(None, allow_existing=False)
+    job = wait_for(jobs, job['id'])
+
+    assert job['status'] == 'completed', job['error']
+    assert job['rows_read'] == job['total_rows'] > 0
+    assert job['vectors'] > 0
+    assert stub_resources.db.get_document_count() > 0
+    assert stub_resources.after_ingestion_calls == 1
+
+
+def test_generation_bumped_after_vectors_and_index_rebuild(stub_resources):
+    db = stub_resources.db
+    seen = {}
+
+    def after_ingestion():
+        seen['generation'] = db.get_data_generation()
+        seen['vectors'] = len(stub_resources.vectorstore)
+
+    stub_resources.after_ingestion = after_ingestion
+    jobs = IngestionJobs(stub_resources, heartbeat=0.1)
+    job = wait_for(jobs, jobs.submit(None)['id'])
+
+    assert job['status'] == 'completed'
+    # Vector đã ghi xong trước khi index build lại; generation cuối cùng mới hơn mọi kết quả cache trước đó
+    assert seen['vectors'] == db.get_document_count() > 0
+    assert db.get_data_generation() > seen['generation']
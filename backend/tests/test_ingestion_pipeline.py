@@ -0,0 +1,85 @@
+import threading
+
+from benchmarks.stubs import InMemoryVectorStore, StubEmbedder
+from src.ingestion_pipeline import IngestionPipeline
+
+
+def records(n, batch=50):
+    rows = [
+        {
+            'row': i + 1, 'title': f'Title {i} about bone loss in mice', 'summary': f'Summary number {i} of a study',
+            'link': f'https://example.org/{i}', 'category': f'cat{i % 3}', 'keywords': ['space biology'],
+        }
+        for i in range(n)
+    ]
+    return [rows[i:i + batch] for i in range(0, n, batch)]
+
+
+def run_with_timeout(pipeline, chunks, timeout=30):
+    result = {}
+    thread = threading.Thread(target=lambda: result.update(stats=pipeline.run(chunks)), daemon=True)
+    thread.start()
+    thread.join(timeout)
+    assert not thread.is_alive(), "pipeline.run() did not return"
+    return result['stats']
+
+
+def make_pipeline(db, vectorstore=None, embedder=None, **kwargs):
+    return IngestionPipeline(
+        db,
+        InMemoryVectorStore() if vectorstore is None else vectorstore,
+        StubEmbedder() if embedder is None else embedder,
+        batch_size=8, embed_workers=2, queue_size=1, **kwargs,
+    )
+
+
+def test_pipeline_completes(db):
+    stats = run_with_timeout(make_pipeline(db), records(100))
+    assert stats['rows_read'] == stats['documents'] == stats['vectors'] == 100
+    assert 'error' not in stats
+
+
+class BrokenVectorStore(InMemoryVectorStore):
+    def add_documents(self, doc_ids, title_embeddings, summary_embeddings):
+        # Kết quả sai kiểu: lỗi xảy ra ngoài try của từng batch trong vector writer
+        return 5
+
+
+def test_failing_vector_stage_returns(db):
+    stats = run_with_timeout(make_pipeline(db, vectorstore=BrokenVectorStore()), records(400))
+    assert 'vector' in stats['error']
+    assert stats['rows_read'] < 400
+    assert not stats['cancelled']
+
+
+class BrokenEmbedder(StubEmbedder):
+    def embed_batch(self, texts):
+        return None  # vectors[:n] -> TypeError ngoài try của batch
+
+
+def test_failing_embed_stage_returns(db):
+    stats = run_with_timeout(make_pipeline(db, embedder=BrokenEmbedder()), records(400))
+    assert 'embed' in stats['error']
+
+
+class BrokenNearDuplicates:
+    @property
+    def hasher(self):
+        raise RuntimeError("broken index")
+
+
+def test_failing_near_duplicate_check_does_not_stop_ingestion(db):
+    pipeline = make_pipeline(db, near_duplicates=BrokenNearDuplicates())
+    stats = run_with_timeout(pipeline, records(100))
+    assert 'error' not in stats
+    assert stats['vectors'] == 100
+
+
+def test_duplicate_links_are_counted_once(db):
+    chunks = records(40, batch=20)
+    # Link trùng trong cùng batch và giữa hai batch -> cùng doc_id
+    chunks[0][5]['link'] = chunks[0][4]['link']
+    chunks[1][0]['link'] = chunks[0][0]['link']
+    vectorstore = InMemoryVectorStore()
+    stats = run_with_timeout(make_pipeline(db, vectorstore=vectorstore), chunks)
+    assert stats['vectors'] == len(vectorstore) == db.get_document_count() == 38
@@ -0,0 +1,185 @@
+import json
+import threading
+import time
+from http.server import BaseHTTPRequestHandler, ThreadingHTTPServer
+
+import pytest
+import requests
+
+from src.llm_client import LLMClient, LLMUnavailable
+from src.rate_limit import CircuitBreaker
+
+
+class StubLLMServer:
+    """Groq giả: mỗi request lấy một phản hồi từ `script` (status, delay giây); hết script thì trả 200"""
+
+    def __init__(self):
+        self.script = []
+        self.calls = 0
+        server = self
+
+        class Handler(BaseHTTPRequestHandler):
+            def do_POST(self):
+                self.rfile.read(int(self.headers.get('Content-Length', 0)))
+                server.calls += 1
+                status, delay = server.script.pop(0) if server.script else (200, 0)
+                time.sleep(delay)
+                body = json.dumps({'choices': [{'message': {'content': ' ok '}}]}).encode()
+                try:
+                    self.send_response(status)
+                    self.send_header('Content-Type', 'application/json')
+                    self.send_header('Content-Length', str(len(body)))
+                    self.end_headers()
+                    self.wfile.write(body)
+                except (BrokenPipeError, ConnectionResetError):
+                    # Client đã bỏ cuộc (timeout)
+                    pass
+
+            def log_message(self, *args):
+                pass
+
+        self.httpd = ThreadingHTTPServer(('127.0.0.1', 0), Handler)
+        self.url = f"http://127.0.0.1:{self.httpd.server_address[1]}/chat"
+        threading.Thread(target=self.httpd.serve_forever, daemon=True).start()
+
+    def close(self):
+        self.httpd.shutdown()
+        self.httpd.server_close()
+
+
+@pytest.fixture
+def server():
+    server = StubLLMServer()
+    yield server
+    server.close()
+
+
+@pytest.fixture
+def make_client(server, monkeypatch):
+    monkeypatch.setenv('TEST_LLM_KEY', 'key')
+    clients = []
+
+    def make(**overrides):
+        config = {
+            'url': server.url, 'api_key_env': 'TEST_LLM_KEY', 'rate_per_second': 1000, 'burst': 1000,
+            'max_retries': 2, 'backoff_base': 0.01, 'backoff_max': 0.05,
+            'failure_threshold': 2, 'reset_timeout': 0.2, 'total_timeout': 10,
+        }
+        client = LLMClient({**config, **overrides})
+        clients.append(client)
+        return client
+
+    yield make
+    for client in clients:
+        client.close()
+
+
+def chat(client, **kwargs):
+    return client.chat([{'role': 'user', 'content': 'hi'}], **kwargs)
+
+
+def test_retries_5xx_then_succeeds(server, make_client):
+    client = make_client()
+    server.script = [(503, 0), (500, 0)]
+    assert chat(client) == 'ok'
+    assert server.calls == 3
+    assert client.breaker.state == CircuitBreaker.CLOSED
+
+
+def test_client_error_is_not_retried(server, make_client):
+    client = make_client()
+    server.script = [(401, 0)]
+    with pytest.raises(LLMUnavailable):
+        chat(client)
+    assert server.calls == 1
+    assert client.breaker.failures == 0
+
+
+def test_breaker_opens_then_recovers_through_half_open(server, make_client):
+    client = make_client(max_retries=0)
+    server.script = [(503, 0), (503, 0)]
+    for _ in range(2):
+        with pytest.raises(LLMUnavailable):
+            chat(client)
+    assert client.breaker.state == CircuitBreaker.OPEN
+    with pytest.raises(LLMUnavailable, match='circuit'):
+        chat(client)
+    assert server.calls == 2
+
+    time.sleep(0.25)
+    assert chat(client) == 'ok'
+    assert client.breaker.state == CircuitBreaker.CLOSED
+
+
+def test_unexpected_request_exception_does_not_wedge_half_open(server, make_client):
+    client = make_client(max_retries=0, failure_threshold=1)
+    server.script = [(503, 0)]
+    with pytest.raises(LLMUnavailable):
+        chat(client)
+    time.sleep(0.25)
+
+    # Lượt thử half-open gặp lỗi requests ngoài Timeout/ConnectionError
+    def broken_post(*args, **kwargs):
+        raise requests.exceptions.ChunkedEncodingError("connection broken")
+
+    client.session.post = broken_post
+    with pytest.raises(LLMUnavailable):
+        chat(client)
+    assert client.breaker.state == CircuitBreaker.OPEN
+    del client.session.post
+
+    time.sleep(0.25)
+    assert chat(client) == 'ok'
+    assert client.breaker.state == CircuitBreaker.CLOSED
+
+
+def test_unexpected_error_releases_half_open_trial(server, make_client):
+    client = make_client(max_retries=0, failure_threshold=1)
+    server.script = [(503, 0)]
+    with pytest.raises(LLMUnavailable):
+        chat(client)
+    time.sleep(0.25)
+
+    def buggy_post(*args, **kwargs):
+        raise RuntimeError("bug")
+
+    client.session.post = buggy_post
+    with pytest.raises(RuntimeError):
+        chat(client)
+    del client.session.post
+    # Lượt thử được trả lại: request sau vẫn được gọi upstream
+    assert chat(client) == 'ok'
+
+
+def test_total_deadline_caps_retries(server, make_client):
+    client = make_client(max_retries=5, backoff_base=0.2, backoff_max=0.2)
+    server.script = [(200, 0.6)] * 6
+    start = time.monotonic()
+    with pytest.raises(LLMUnavailable):
+        chat(client, timeout=0.3, deadline=1.0)
+    assert time.monotonic() - start < 1.5
+    # Mỗi lần gọi bị cắt ở 0.3s (lần cuối: phần còn lại của deadline) nên không quá 4 lần dù backoff jitter về 0
+    assert server.calls <= 4
+
+
+def test_background_calls_use_their_own_bucket_and_leave_a_reserve(server, make_client):
+    client = make_client(rate_per_second=0, burst=4, background_rate_per_second=0, background_burst=3,
+                         background_reserve=2)
+    # Bucket chung 4 token, giữ lại 2: chỉ 2 call nền đi qua dù bucket nền còn token
+    assert chat(client, background=True) == 'ok'
+    assert chat(client, background=True) == 'ok'
+    with pytest.raises(LLMUnavailable, match='rate limit'):
+        chat(client, background=True)
+    # Request của user vẫn dùng được phần giữ lại
+    assert chat(client) == 'ok'
+    assert chat(client) == 'ok'
+    assert server.calls == 4
+    assert client.breaker.state == CircuitBreaker.CLOSED
+
+
+def test_background_calls_are_capped_by_their_own_rate(server, make_client):
+    client = make_client(background_rate_per_second=0, background_burst=1, background_reserve=0)
+    assert chat(client, background=True) == 'ok'
+    with pytest.raises(LLMUnavailable, match='rate limit'):
+        chat(client, background=True)
+    assert chat(client) == 'ok'
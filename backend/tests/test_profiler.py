@@ -0,0 +1,75 @@
+import threading
+import time
+
+import pytest
+from fastapi import FastAPI
+from fastapi.testclient import TestClient
+
+from src.profiler import Profiler, ProfiledRoute, ProfilerMiddleware, StackSampler
+
+
+def busy_noise(stop):
+    while not stop.is_set():
+        sum(range(1000))
+
+
+@pytest.fixture
+def noise():
+    stop = threading.Event()
+    thread = threading.Thread(target=busy_noise, args=(stop,), name='noise', daemon=True)
+    thread.start()
+    yield thread
+    stop.set()
+    thread.join()
+
+
+@pytest.fixture
+def profiler(tmp_path, monkeypatch):
+    monkeypatch.setenv('TEST_ADMIN_TOKEN', 'secret')
+    return Profiler({'interval_ms': 2, 'dir': str(tmp_path), 'admin_token_env': 'TEST_ADMIN_TOKEN'})
+
+
+@pytest.fixture
+def client(profiler):
+    app = FastAPI()
+    app.router.route_class = ProfiledRoute
+
+    @app.get('/slow')
+    def slow_endpoint():
+        time.sleep(0.3)
+        return {'status': 'success'}
+
+    app.add_middleware(ProfilerMiddleware, profiler=profiler)
+    return TestClient(app)
+
+
+def threads_in(collapsed):
+    return {line.split(';', 1)[0] for line in collapsed.splitlines()}
+
+
+def test_sampler_only_records_given_threads(noise):
+    sampler = StackSampler(interval=0.002, threads={threading.get_ident()}).start()
+    time.sleep(0.1)
+    sampler.stop()
+    assert sampler.samples > 0
+    assert threads_in(sampler.collapsed()) == {threading.current_thread().name}
+
+
+def test_request_profile_samples_only_the_request_threads(client, profiler, noise):
+    resp = client.get('/slow', headers={'X-Profile': 'true', 'X-Admin-Token': 'secret'})
+    profile_id = resp.headers['x-profile-id']
+    collapsed = profiler.read(profile_id)
+    assert 'slow_endpoint (test_profiler.py' in collapsed
+    assert 'noise' not in threads_in(collapsed)
+
+
+@pytest.mark.parametrize('value', ['0', 'false', 'no', 'off', 'maybe'])
+def test_profile_header_needs_an_explicit_true_value(client, value):
+    resp = client.get('/slow', headers={'X-Profile': value, 'X-Admin-Token': 'secret'})
+    assert resp.status_code == 200
+    assert 'x-profile-id' not in resp.headers
+
+
+def test_profile_requires_admin_token(client):
+    resp = client.get('/slow', headers={'X-Profile': '1', 'X-Admin-Token': 'wrong'})
+    assert 'x-profile-id' not in resp.headers
@@ -0,0 +1,73 @@
+import threading
+import time
+
+from benchmarks.corpus import synthetic_vectors
+from benchmarks.stubs import InMemoryVectorStore
+from src import resources as resources_module
+from src.resources import Resources
+from src.vector_index import PartitionedVectorIndex
+
+
+def test_failed_index_build_is_retried_with_backoff(db, monkeypatch):
+    monkeypatch.setitem(resources_module.SEARCH_CONFIG, 'mode', 'partitioned')
+    attempts = []
+    build = PartitionedVectorIndex.from_store.__func__
+
+    def flaky_from_store(cls, vectorstore, db, **kwargs):
+        attempts.append(time.monotonic())
+        if len(attempts) <= 2:
+            raise RuntimeError("vectors not readable yet")
+        return build(cls, vectorstore, db, **kwargs)
+
+    monkeypatch.setattr(PartitionedVectorIndex, 'from_store', classmethod(flaky_from_store))
+    store = InMemoryVectorStore(dim=384, capacity=50)
+    store.add_documents(*synthetic_vectors(50)[:3])
+    resources = Resources(reconnect_interval=0.05, max_backoff=1)
+    resources.db, resources.vectorstore = db, store
+
+    thread = threading.Thread(target=resources._vectorstore_loop, daemon=True)
+    thread.start()
+    try:
+        deadline = time.time() + 10
+        while resources.vector_index is None and time.time() < deadline:
+            time.sleep(0.01)
+    finally:
+        resources._stop.set()
+        thread.join()
+
+    assert resources.vector_index is not None and len(resources.vector_index) == 50
+    assert 'vector_index' not in resources.errors
+    assert len(attempts) == 3
+    # Backoff tăng dần: 0.05s rồi 0.1s
+    assert attempts[2] - attempts[1] > attempts[1] - attempts[0] >= 0.04
+
+
+def test_every_worker_rebuilds_indexes_when_generation_changes(db, monkeypatch):
+    monkeypatch.setitem(resources_module.SEARCH_CONFIG, 'mode', 'partitioned')
+    store = InMemoryVectorStore(dim=384, capacity=80)
+    doc_ids, title, summary, _ = synthetic_vectors(80)
+    store.add_documents(doc_ids[:40], title[:40], summary[:40])
+
+    # Worker không chạy ingestion: chỉ thấy dữ liệu đổi qua generation trong DB
+    resources = Resources(reconnect_interval=0.05, max_backoff=1)
+    resources.db, resources.vectorstore = db, store
+    resources.index_generation = db.get_data_generation()
+    thread = threading.Thread(target=resources._vectorstore_loop, daemon=True)
+    thread.start()
+    try:
+        deadline = time.time() + 10
+        while resources.vector_index is None and time.time() < deadline:
+            time.sleep(0.01)
+        assert len(resources.vector_index) == 40
+
+        store.add_documents(doc_ids[40:], title[40:], summary[40:])
+        db.bump_data_generation()
+        while len(resources.vector_index) != 80 and time.time() < deadline:
+            time.sleep(0.01)
+    finally:
+        resources._stop.set()
+        thread.join()
+
+    assert len(resources.vector_index) == 80
+    assert resources.suggest_index is not None
+    assert resources.index_generation == db.get_data_generation()
@@ -0,0 +1,54 @@
+import numpy as np
+import pytest
+
+from benchmarks.corpus import populate_sql, synthetic_vectors
+from benchmarks.stubs import InMemoryVectorStore
+from src.snapshot import SnapshotError, export_snapshot, import_snapshot
+from src.sql_db import SqlDB
+
+
+@pytest.fixture
+def snapshot_dir(db, tmp_path):
+    populate_sql(db, 30)
+    store = InMemoryVectorStore(dim=384, capacity=30)
+    doc_ids, title, summary, _ = synthetic_vectors(30)
+    store.add_documents(doc_ids + 1, title, summary)
+    out_dir = tmp_path / 'snapshot'
+    export_snapshot(db, store, str(out_dir))
+    return str(out_dir)
+
+
+@pytest.fixture
+def target_db(tmp_path):
+    db = SqlDB(f"sqlite:///{tmp_path / 'target.db'}")
+    yield db
+    db.engine.dispose()
+
+
+def test_import_refuses_non_empty_vector_store_without_replace(snapshot_dir, target_db):
+    store = InMemoryVectorStore(dim=384)
+    store.add_documents([999], np.ones((1, 384)), np.ones((1, 384)))
+
+    with pytest.raises(SnapshotError):
+        import_snapshot(target_db, store, snapshot_dir)
+    assert target_db.get_document_count() == 0
+
+    import_snapshot(target_db, store, snapshot_dir, replace=True)
+    assert len(store) == 30 and 999 not in store.fetch_all_vectors()[0]
+
+
+def test_generation_bumped_after_vectors_loaded(snapshot_dir, target_db):
+    store = InMemoryVectorStore(dim=384)
+    seen = []
+    add_documents = store.add_documents
+
+    def recording_add_documents(*args):
+        seen.append(target_db.get_data_generation())
+        return add_documents(*args)
+
+    store.add_documents = recording_add_documents
+    import_snapshot(target_db, store, snapshot_dir)
+
+    assert len(store) == 30
+    # Generation lúc nạp vector chưa phải generation cuối
+    assert target_db.get_data_generation() > max(seen)
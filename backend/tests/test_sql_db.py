@@ -0,0 +1,71 @@
+import contextlib
+
+import pytest
+from sqlalchemy import event
+
+from src import sql_db
+
+
+@pytest.fixture
+def populated(db):
+    categories = [db.create_category(f'category {i}').id for i in range(3)]
+    keywords = [db.create_keyword(f'keyword {i}').id for i in range(5)]
+    db.create_documents([
+        {
+            'title': f'title {i}', 'summary': f'summary {i}', 'link': f'https://example.org/{i}',
+            'category_id': categories[i % 3], 'keyword_ids': [keywords[i % 5], keywords[(i + 1) % 5]],
+        }
+        for i in range(1200)
+    ])
+    return db
+
+
+@contextlib.contextmanager
+def count_statements(db):
+    counter = {'n': 0}
+
+    def before_cursor_execute(*args):
+        counter['n'] += 1
+
+    event.listen(db.engine, 'before_cursor_execute', before_cursor_execute)
+    try:
+        yield counter
+    finally:
+        event.remove(db.engine, 'before_cursor_execute', before_cursor_execute)
+
+
+def test_include_relations_query_count_is_constant(populated):
+    counts = {}
+    for size in (1, 10, 100, 450):
+        with count_statements(populated) as counter:
+            docs = populated.get_documents_by_ids(list(range(1, size + 1)), include_relations=True)
+        assert len(docs) == size
+        counts[size] = counter['n']
+    # documents + categories + keywords, không phụ thuộc số document
+    assert set(counts.values()) == {3}, counts
+
+
+def test_include_relations_returns_detached_dicts(populated):
+    doc = populated.get_documents_by_ids([5, 2], include_relations=True)
+    assert [d['id'] for d in doc] == [5, 2]
+    assert doc[0]['category'] == {'id': doc[0]['category_id'], 'name': 'category 1'}
+    assert [k['name'] for k in doc[0]['keywords']] == ['keyword 0', 'keyword 4']
+
+    by_category = populated.get_documents_by_category(1, include_relations=True)
+    assert len(by_category) == 400
+    assert all(d['category']['id'] == 1 and len(d['keywords']) == 2 for d in by_category)
+
+
+def test_facets_for_large_id_lists_are_chunked(populated, monkeypatch):
+    monkeypatch.setattr(sql_db, 'IN_CHUNK_SIZE', 100)
+    ids = list(range(1, 1201)) + [1, 2, 3]
+    facets = populated.get_facets_for_documents(ids, keyword_limit=2)
+    assert sorted(c['count'] for c in facets['categories']) == [400, 400, 400]
+    assert [k['count'] for k in facets['keywords']] == [480, 480]
+    assert facets == populated.get_facets(keyword_limit=2)
+
+
+def test_streaming_readers(populated):
+    assert sum(1 for _ in populated.iter_document_titles(batch_size=100)) == 1200
+    assert [row[0] for row in populated.iter_document_texts(batch_size=100)][:3] == [1, 2, 3]
+    assert sorted(populated.get_keyword_document_counts()) == [(f'keyword {i}', 480) for i in range(5)]
@@ -0,0 +1,50 @@
+import numpy as np
+import pytest
+
+from benchmarks.corpus import synthetic_vectors
+from src.vector_index import PartitionedVectorIndex
+
+
+@pytest.fixture(scope='module')
+def corpus():
+    doc_ids, title, summary, topics = synthetic_vectors(3000, dim=64, noise=3.0, seed=1)
+    queries = synthetic_vectors(20, dim=64, noise=3.0, seed=2)[1]
+    return doc_ids, title, summary, topics, queries
+
+
+def brute_force(doc_ids, title, summary, query, k):
+    scores = np.maximum(title @ query, summary @ query)
+    return [doc_ids[i] for i in np.argsort(-scores, kind='stable')[:k]]
+
+
+def test_full_search_is_exact_with_reduced_dims(corpus):
+    doc_ids, title, summary, topics, queries = corpus
+    # Pass giảm chiều mạnh + rerank nhỏ: search() mất recall, full_search() thì không
+    index = PartitionedVectorIndex(nprobe=1, reduce_dims=4, rerank=10).build(doc_ids, title, summary, topics.tolist())
+    recall = []
+    for query in queries:
+        truth = brute_force(doc_ids, title, summary, query, 10)
+        assert index.full_search(query, k=10) == truth
+        recall.append(len(set(index.search(query, k=10)) & set(truth)) / 10)
+    assert np.mean(recall) < 1.0
+
+
+@pytest.mark.parametrize('seed', range(10))
+def test_kmeans_has_no_empty_clusters(seed):
+    rng = np.random.default_rng(seed)
+    # Nhiều điểm trùng nhau: centroid khởi tạo trùng -> cluster rỗng nếu không re-seed
+    base = rng.standard_normal((4, 32)).astype(np.float32)
+    vectors = np.concatenate([np.repeat(base[:1], 40, axis=0), base[1:], rng.standard_normal((12, 32))]).astype(np.float32)
+    index = PartitionedVectorIndex(partition_by='kmeans', n_clusters=8, seed=seed)
+    index.build(np.arange(len(vectors)), vectors, vectors)
+    sizes = np.diff(index.offsets)
+    assert len(sizes) == 8 and (sizes > 0).all()
+    assert np.linalg.norm(index.centroids, axis=1) == pytest.approx(1.0, abs=1e-5)
+
+
+def test_build_rejects_non_finite_vectors(corpus):
+    doc_ids, title, summary, topics, _ = corpus
+    summary = summary.copy()
+    summary[5] = np.nan
+    with pytest.raises(ValueError):
+        PartitionedVectorIndex(partition_by='kmeans').build(doc_ids, title, summary)
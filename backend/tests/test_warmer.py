@@ -0,0 +1,86 @@
+import threading
+import time
+
+from src.warmer import ArticleWarmer
+
+
+class FakeDB:
+    def __init__(self, n):
+        self.links = {i: f"https://host{i % 3}.example.org/{i}" for i in range(1, n + 1)}
+        self.summaries = {}
+
+    def get_unsummarized_documents(self):
+        return [(doc_id, link) for doc_id, link in self.links.items() if link not in self.summaries]
+
+    def get_article_summary(self, link):
+        return self.summaries.get(link)
+
+    def save_article_summary(self, link, data):
+        self.summaries[link] = data
+
+
+def wait_until(predicate, timeout=10):
+    deadline = time.time() + timeout
+    while not predicate():
+        assert time.time() < deadline
+        time.sleep(0.01)
+
+
+def test_refresh_does_not_requeue_in_flight_or_finished_documents():
+    db = FakeDB(6)
+    release = threading.Event()
+    crawled = []
+
+    def crawl(link):
+        crawled.append(link)
+        release.wait()
+        # Document 6 thất bại: vẫn chưa có summary nhưng không được xếp hàng lại
+        if link.endswith('/6'):
+            raise RuntimeError("boom")
+        return {'title': link}, True
+
+    warmer = ArticleWarmer(db, crawl, concurrency=2, host_delay=0, retry_delay=0)
+    warmer.start()
+    try:
+        wait_until(lambda: warmer.progress()['in_flight'] == 2)
+        # Ingestion xong giữa chừng: refresh trong lúc 2 document đang crawl
+        warmer.refresh()
+        warmer.refresh()
+        time.sleep(0.2)
+        assert warmer.progress()['total'] == 6
+        release.set()
+        wait_until(lambda: warmer.progress()['finished'] == 6)
+        warmer.refresh()
+        time.sleep(0.2)
+    finally:
+        warmer.stop()
+
+    progress = warmer.progress()
+    assert progress['total'] == 6
+    assert (progress['done'], progress['failed'], progress['pending']) == (5, 1, 0)
+    assert sorted(crawled) == sorted(db.links.values())
+
+
+def test_fallback_summaries_are_retried_then_failed_not_saved():
+    db = FakeDB(3)
+    attempts = {}
+
+    def crawl(link):
+        attempts[link] = attempts.get(link, 0) + 1
+        # Document 1 chỉ có summary fallback (final=False); document 2 có summary thật ở lần thử thứ 2
+        if link.endswith('/1') or (link.endswith('/2') and attempts[link] < 2):
+            return {'title': 'fallback'}, False
+        return {'title': link}, True
+
+    warmer = ArticleWarmer(db, crawl, concurrency=1, host_delay=0, retry_delay=0, max_attempts=3)
+    warmer.start()
+    try:
+        wait_until(lambda: warmer.progress()['finished'] == 3)
+    finally:
+        warmer.stop()
+
+    progress = warmer.progress()
+    assert (progress['done'], progress['failed'], progress['deferred']) == (2, 1, 3)
+    assert attempts[db.links[1]] == 3
+    assert db.links[1] not in db.summaries
+    assert db.summaries[db.links[2]] == {'title': db.links[2]}